@@ -15,6 +15,7 @@ class Points(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
+        db (Database): The shared Database cog used for all queries.
     """
 
     def __init__(self, bot):
@@ -25,24 +26,7 @@ class Points(commands.Cog):
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
-
-    def execute_query(self, query, params=None):
-        """
-        Execute an SQL query on the database.
-
-        Args:
-            query (str): The SQL query to execute.
-            params (tuple, optional): Parameters to bind to the query. Defaults to None.
-
-        Returns:
-            Varies: Results from the database query if applicable.
-
-        Note:
-            This method requires database connection logic that is not shown in the snippet.
-            The implementation should handle connection management and cursor operations.
-        """
-        # Database execution code would go here
-        pass
+        self.db = bot.get_cog("Database")
 
     # Example command to add points for a user
     @commands.command(help="Add study points to a user.")
@@ -74,11 +58,8 @@ class Points(commands.Cog):
             # Fetch user ID and the user object
             user_id = user.id
 
-            query = '''INSERT INTO study_points (user_id, points) 
-                       VALUES (?, ?) 
-                       ON CONFLICT(user_id) 
-                       DO UPDATE SET points = points + ?'''
-            self.execute_query(query, (user_id, points, points))
+            # Buffer the award; the Database cog writes it with the next batched flush
+            await self.db.add_points(user_id, points, 'addpoints')
             await ctx.send(f"🤠 Added {points} points to user {user.name} ({user_id}).")
 
         except ValueError:
@@ -3,18 +3,19 @@ Discord bot extension for administrative commands.
 This module provides functionality for server administrators to configure bot settings.
 """
 
+import discord
 from discord.ext import commands
+import asyncio
+import os
 import sqlite3
 import logging
+from utils.shop_items import SHOP_ITEMS
+from utils.question_bank import QuestionBank, QUESTION_IMPORT_DIR, load_question_file
+from utils.llm_client import llm
 
 # Setup logger for error handling and debugging
 logger = logging.getLogger(__name__)
 
-# Create a connection to the SQLite database
-# Note: SQLite operations are synchronous and may block the event loop
-conn = sqlite3.connect('study_points.db')
-c = conn.cursor()
-
 
 class Admin(commands.Cog):
     """
@@ -25,6 +26,7 @@ class Admin(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
+        db (Database): The shared Database cog used for all queries.
     """
 
     def __init__(self, bot):
@@ -35,15 +37,18 @@ class Admin(commands.Cog):
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
+        self.db = bot.get_cog("Database")
+        self.question_bank = QuestionBank(self.db)
 
     @commands.command(help="(Admin) Set this channel to receive automatic daily tips.")
+    @commands.guild_only()
     @commands.has_permissions(administrator=True)
     async def settipchannel(self, ctx):
         """
         Set the current channel to receive daily study tips.
 
-        This command stores the current channel's ID in the database settings table
-        with the key 'daily_tip_channel'. The bot will use this channel for posting
+        This command stores the current channel's ID as this guild's
+        'daily_tip_channel' setting. The bot will use this channel for posting
         automated daily study tips.
 
         Args:
@@ -57,17 +62,12 @@ class Admin(commands.Cog):
             sqlite3.Error: If there's an issue with the database operation.
 
         Note:
-            This command requires administrator permissions to use.
+            This command requires administrator permissions and only works in a server.
         """
         try:
-            # Set the current channel ID in the settings table in the database
-            # REPLACE works like INSERT but will update existing entries with the same key
-            c.execute("REPLACE INTO settings (key, value) VALUES (?, ?)",
-                      ('daily_tip_channel', str(ctx.channel.id)))
-
-            # Commit the changes to the database
-            # Warning: This is a synchronous operation that could block the bot
-            conn.commit()
+            # Store the current channel ID as this guild's tip channel
+            # The settings cache writes through to the database before updating itself
+            await self.db.settings.set_tip_channel(ctx.guild.id, ctx.channel.id)
 
             # Send confirmation message to the channel
             await ctx.send("🤠 This here channel's now set for daily tips, partner!")
@@ -78,6 +78,217 @@ class Admin(commands.Cog):
             # Send a user-friendly error message
             await ctx.send("Sorry, there was an error setting the tip channel. Try again later.")
 
+    @commands.command(help="(Admin) Set the price of a shop item in this server.")
+    @commands.has_permissions(administrator=True)
+    async def setprice(self, ctx, item_number: int, price: int):
+        """
+        Set the price of a shop item for this guild.
+
+        Args:
+            ctx (commands.Context): The invocation context.
+            item_number (int): The item's number as listed in `!shop`.
+            price (int): The new price in points.
+
+        Returns:
+            None: Feedback is sent directly to the Discord channel.
+
+        Note:
+            This command requires administrator permissions to use.
+        """
+        if not 1 <= item_number <= len(SHOP_ITEMS) or price < 0:
+            await ctx.send("🤠 Give me a valid item number from `!shop` and a price of zero or more, partner!")
+            return
+
+        item_name = list(SHOP_ITEMS)[item_number - 1]
+        try:
+            await self.db.settings.set_shop_price(ctx.guild and ctx.guild.id, item_name, price)
+            await ctx.send(f"🤠 **{item_name}** now costs {price} points 'round here.")
+        except sqlite3.Error as e:
+            logger.error(f"Database error while setting shop price: {e}")
+            await ctx.send("Sorry, there was an error setting the price. Try again later.")
+
+    @commands.command(help="(Admin) Set a command's per-user cooldown in this server.")
+    @commands.has_permissions(administrator=True)
+    async def setcooldown(self, ctx, command_name: str, seconds: float):
+        """
+        Set how long users must wait between uses of a command in this guild.
+
+        Args:
+            ctx (commands.Context): The invocation context.
+            command_name (str): The command to configure (e.g. "ask").
+            seconds (float): The cooldown in seconds.
+
+        Returns:
+            None: Feedback is sent directly to the Discord channel.
+
+        Note:
+            This command requires administrator permissions to use.
+        """
+        command = self.bot.get_command(command_name)
+        if command is None or seconds < 0:
+            await ctx.send("🤠 Give me a real command and a cooldown of zero or more seconds, partner!")
+            return
+
+        try:
+            await self.db.settings.set_cooldown(ctx.guild and ctx.guild.id, command.name, seconds)
+            await ctx.send(f"🤠 `!{command.name}` cooldown is now {seconds:g} seconds.")
+        except sqlite3.Error as e:
+            logger.error(f"Database error while setting cooldown: {e}")
+            await ctx.send("Sorry, there was an error setting the cooldown. Try again later.")
+
+    @commands.command(help="(Admin) Turn automatic study tracking on or off for a voice channel.")
+    @commands.guild_only()
+    @commands.has_permissions(administrator=True)
+    async def studyhall(self, ctx, channel: discord.VoiceChannel = None):
+        """
+        Toggle automatic study tracking for a voice channel in this guild.
+
+        Members sitting in a study voice channel earn study points every minute
+        without typing `!startstudy`. Without a channel, the current study
+        channels are listed.
+
+        Args:
+            ctx (commands.Context): The invocation context.
+            channel (discord.VoiceChannel, optional): The voice channel to toggle.
+
+        Returns:
+            None: Feedback is sent directly to the Discord channel.
+
+        Note:
+            This command requires administrator permissions and only works in a server.
+        """
+        channel_ids = self.db.settings.study_channels(ctx.guild.id)
+        if channel is None:
+            if channel_ids:
+                await ctx.send("🤠 Study halls 'round here: " + ", ".join(f"<#{c}>" for c in sorted(channel_ids)))
+            else:
+                await ctx.send("🤠 No study halls yet, partner. Try `!studyhall <voice channel>`.")
+            return
+
+        tracked = channel.id not in channel_ids
+        channel_ids ^= {channel.id}
+        try:
+            await self.db.settings.set_study_channels(ctx.guild.id, channel_ids)
+        except sqlite3.Error as e:
+            logger.error(f"Database error while setting study channels: {e}")
+            await ctx.send("Sorry, there was an error updating the study halls. Try again later.")
+            return
+
+        # Start or stop tracking whoever is already sitting in the channel
+        study_timer = self.bot.get_cog("StudyTimer")
+        if study_timer is not None:
+            await study_timer.sync_voice()
+
+        if tracked:
+            await ctx.send(f"🤠 {channel.mention} is now a study hall! Folks in there earn points every minute.")
+        else:
+            await ctx.send(f"🤠 {channel.mention} ain't a study hall no more.")
+
+    @commands.command(help="(Admin) Rebuild everyone's study points from the point ledger.")
+    @commands.has_permissions(administrator=True)
+    async def rebuildpoints(self, ctx, mode: str = ""):
+        """
+        Rebuild the study points table by replaying the append-only point ledger.
+
+        By default only events since the last compaction checkpoint are replayed,
+        which is fast. Passing `full` replays the whole ledger from the start
+        (pruned events from their archived totals), in batches, for when the
+        checkpoint itself is suspect.
+
+        Args:
+            ctx (commands.Context): The invocation context.
+            mode (str, optional): "full" to replay the entire ledger.
+
+        Returns:
+            None: Feedback is sent directly to the Discord channel.
+
+        Note:
+            This command requires administrator permissions to use.
+        """
+        full = mode.lower() == "full"
+        await ctx.send("🤠 Rebuildin' the points ledger, hold tight...")
+        try:
+            corrected = await self.db.rebuild_points(full=full)
+            await ctx.send(f"🤠 Points rebuilt from the ledger! {corrected} user total(s) needed fixin'.")
+        except sqlite3.Error as e:
+            logger.error(f"Database error while rebuilding points: {e}")
+            await ctx.send("Sorry, there was an error rebuilding the points. Try again later.")
+
+    @commands.command(help="(Admin) Import quiz questions from a JSON or CSV file.")
+    @commands.has_permissions(administrator=True)
+    async def importquestions(self, ctx, filename: str):
+        """
+        Bulk-import a question set into the quiz question bank.
+
+        Only files inside the QUESTION_IMPORT_DIR directory on the bot's host can be
+        imported. Every question is validated; duplicates and malformed rows are skipped.
+
+        Args:
+            ctx (commands.Context): The invocation context.
+            filename (str): Name of a `.json` or `.csv` file in the import directory.
+
+        Returns:
+            None: Feedback is sent directly to the Discord channel.
+
+        Note:
+            This command requires administrator permissions to use.
+        """
+        # Never read files outside the import directory
+        import_dir = os.path.realpath(QUESTION_IMPORT_DIR)
+        path = os.path.realpath(os.path.join(import_dir, filename))
+        if os.path.dirname(path) != import_dir or not os.path.isfile(path):
+            await ctx.send(f"🤠 Can't find `{filename}` in the `{QUESTION_IMPORT_DIR}` folder, partner!")
+            return
+
+        try:
+            # File parsing is blocking I/O, so keep it off the event loop
+            entries = await asyncio.to_thread(load_question_file, path)
+        except (OSError, ValueError) as e:
+            logger.error(f"Error reading question file {path}: {e}")
+            await ctx.send(f"🤠 Couldn't read that file, partner: {e}")
+            return
+
+        try:
+            question_ids = await self.question_bank.add_many(entries, 'import')
+        except sqlite3.Error as e:
+            logger.error(f"Database error while importing questions: {e}")
+            await ctx.send("Sorry, there was an error importing the questions. Try again later.")
+            return
+
+        skipped = len(entries) - len(question_ids)
+        await ctx.send(f"🤠 Rounded up {len(question_ids)} question(s) into the bank"
+                       f"{f', skipped {skipped} bad one(s)' if skipped else ''}!")
+
+    @commands.command(help="(Admin) Show answer cache and LLM scheduler statistics.")
+    @commands.has_permissions(administrator=True)
+    async def cachestats(self, ctx):
+        """
+        Show how well the `!ask` answer cache and the LLM request scheduler are doing.
+
+        Use this to tune ASK_CACHE_THRESHOLD, ASK_CACHE_TTL and ASK_CACHE_SIZE.
+
+        Args:
+            ctx (commands.Context): The invocation context.
+
+        Returns:
+            None: Feedback is sent directly to the Discord channel.
+
+        Note:
+            This command requires administrator permissions to use.
+        """
+        lines = []
+        ask = self.bot.get_cog("AskCommand")
+        if ask is not None:
+            cache = ask.answer_cache
+            lines.append(f"**Answer cache:** {len(cache)}/{cache.size} answers, "
+                         f"{cache.hits} hits ({cache.near_hits} reworded), {cache.misses} misses, "
+                         f"{cache.hit_rate:.0%} hit rate (threshold {cache.threshold:g})")
+
+        scheduler = llm.scheduler
+        lines.append(f"**LLM requests:** {scheduler.active} in flight, {scheduler.queued()} queued, "
+                     f"{scheduler.shed} shed, {llm.coalesced} coalesced")
+        await ctx.send("🤠 Here's how the trail's lookin':\n" + "\n".join(lines))
+
 
 # Setup function for discord.py 2.0+ (needs to be async)
 async def setup(bot):
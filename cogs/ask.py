@@ -5,24 +5,24 @@ This module provides a command to ask questions and receive responses in a space
 
 import discord
 from discord.ext import commands
-import openai
-import os
-import asyncio
 import logging
-from dotenv import load_dotenv
-import time
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Set up OpenAI API key from environment variable
-openai.api_key = os.getenv('OPENAI_API_KEY')
+import os
+from utils.answer_cache import AnswerCache
+from utils.cooldowns import cooldown
+from utils.llm_client import llm, LLMBusy
+from utils.streaming_reply import StreamingReply
 
 # Set up logging for error tracking
 logger = logging.getLogger(__name__)
 
-# Dictionary to track when each user last used the ask command (for rate limiting)
-user_last_asked = {}
+# Default seconds between questions per user (admins can override it per guild with !setcooldown)
+ASK_COOLDOWN = 10
+
+# Stream answers into Discord as they are generated (set ASK_STREAM=0 to send them whole)
+ASK_STREAM = os.getenv('ASK_STREAM', '1') != '0'
+
+# Looser similarity accepted from the answer cache when the LLM scheduler sheds a question
+ASK_CACHE_BUSY_THRESHOLD = float(os.getenv('ASK_CACHE_BUSY_THRESHOLD', '0.5'))
 
 
 class AskCommand(commands.Cog):
@@ -35,6 +35,8 @@ class AskCommand(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
+        db (Database): The shared Database cog, used for cached guild settings.
+        answer_cache (AnswerCache): Recent answers, matched to reworded questions by similarity.
     """
 
     def __init__(self, bot):
@@ -45,8 +47,11 @@ class AskCommand(commands.Cog):
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
+        self.db = bot.get_cog("Database")
+        self.answer_cache = AnswerCache()
 
     @commands.command(help="Ask a question and get a space cowboy-style answer.")
+    @cooldown(ASK_COOLDOWN, "🤠 Slow down, partner! You can ask again in a few seconds.")
     async def ask(self, ctx, *, question: str):
         """
         Process a user question and generate a space cowboy-style response.
@@ -55,6 +60,13 @@ class AskCommand(commands.Cog):
         instructions to respond in a space cowboy style, and returns the
         generated response to the Discord channel.
 
+        Questions that match a recently answered one (even when reworded) are
+        answered from the answer cache without calling the API.
+
+        In streaming mode the answer appears as soon as its first words are
+        generated and is edited in place as more arrives, continuing in a new
+        message whenever Discord's 2000-character limit is reached.
+
         Args:
             ctx (commands.Context): The invocation context.
             question (str): The question asked by the user (captured as a string
@@ -64,46 +76,60 @@ class AskCommand(commands.Cog):
             None: Responses are sent directly to the Discord channel.
 
         Rate Limits:
-            Users can only use this command once every 10 seconds to prevent
-            API abuse and excessive token usage.
+            Users can only use this command once every 10 seconds (configurable
+            per guild) to prevent API abuse and excessive token usage.
         """
         # Handle empty or invalid questions
         if not question.strip():
             await ctx.send("🤠 Ain't no question here, partner. Please ask me somethin'!")
             return
 
-        # Rate limiting to avoid too many requests
-        user_id = ctx.author.id
-        if user_id in user_last_asked and (
-                time.time() - user_last_asked[user_id]) < 10:  # 10 seconds cooldown
-            await ctx.send("🤠 Slow down, partner! You can ask again in a few seconds.")
-            return
-
-        # Update the last asked time for this user
-        user_last_asked[user_id] = time.time()
-
         # Construct the prompt for OpenAI
         prompt = f"Answer the following question in the style of a space cowboy: '{question}'"
 
+        messages = [{"role": "system",
+                     "content": "You are a space cowboy who gives friendly, adventurous responses."},
+                    {"role": "user", "content": question}]
+
+        # Same or near-duplicate question answered recently: skip the API entirely
+        answer = self.answer_cache.lookup(question)
+        if answer is not None:
+            await StreamingReply(ctx).send(answer)
+            return
+
         try:
-            # Use run_in_executor to run the synchronous OpenAI API call in a separate thread
-            # This prevents blocking the bot's event loop during the API call
-            response = await self.bot.loop.run_in_executor(
-                None,
-                lambda: openai.ChatCompletion.create(
-                    model="gpt-3.5-turbo",
-                    messages=[{"role": "system",
-                               "content": "You are a space cowboy who gives friendly, adventurous responses."},
-                              {"role": "user", "content": question}]
-                )
-            )
-
-            # Extract the generated text from the response
-            answer = response['choices'][0]['message']['content'].strip()
+            if ASK_STREAM:
+                # Show the answer while it's being generated, editing in batched chunks
+                reply = StreamingReply(ctx)
+                parts = []
+                try:
+                    async for text in llm.stream(messages):
+                        parts.append(text)
+                        await reply.feed(text)
+                finally:
+                    await reply.finish()
+                if not reply.messages:
+                    await ctx.send("🤠 Reckon I'm plumb out of words on that one, partner.")
+                    return
+                self.answer_cache.store(question, "".join(parts).strip())
+                return
+
+            # The shared async client awaits the API over a pooled connection,
+            # so the bot's event loop keeps running during the call
+            answer = await llm.chat(messages)
+            self.answer_cache.store(question, answer)
 
             # Send the response back to Discord
             await ctx.send(f"{answer}")
 
+        except LLMBusy:
+            # Shed by the LLM scheduler: a looser cached match beats making the user wait
+            answer = self.answer_cache.lookup(question, threshold=ASK_CACHE_BUSY_THRESHOLD)
+            if answer is not None:
+                await StreamingReply(ctx).send(answer)
+                return
+            await ctx.send("🤠 The space lanes are jammed right now, partner. Try again in a minute.")
+
         except Exception as e:
             # Log the error for debugging purposes
             logger.error(f"Error while fetching response from OpenAI: {e}")
@@ -9,6 +9,7 @@ from discord.ext import commands
 import os
 from dotenv import load_dotenv
 import logging
+from utils.llm_client import llm
 
 # Load environment variables from .env file
 # This allows sensitive data like tokens to be stored outside the code
@@ -48,6 +49,17 @@ class BotSetup(commands.Cog):
         """
         self.bot = bot
 
+    async def cog_unload(self):
+        """
+        Release shared resources when the bot shuts down.
+
+        Closes the pooled HTTP session used by the shared LLM client.
+
+        Returns:
+            None
+        """
+        await llm.close()
+
 
 # Setup function to add the cog to the bot
 async def setup(bot):
@@ -1,14 +1,30 @@
 """
 Discord bot extension for daily study tips.
 This module provides functionality to send educational tips to users.
+
+Tips are served from a persistent pool of pre-generated cowboy tips in SQLite
+(see `utils/tip_pool.py`), so `!tip` answers instantly and never waits on the
+API. A background task refills the pool in batches whenever it runs low, and
+another writes which tips were served in batches, so a reply never waits on a commit.
 """
 
-from discord.ext import commands
+from discord.ext import commands, tasks
+import asyncio
 import logging
+import os
+import random
+import sqlite3
+from utils.tip_pool import TipPool, STARTER_TIPS
 
 # Setup logger for error handling and tracking
 logger = logging.getLogger(__name__)
 
+# Seconds between checks whether the tip pool needs a refill
+TIP_REFILL_INTERVAL = float(os.getenv('TIP_REFILL_INTERVAL', '600'))
+
+# Seconds between batched writes of which tips were served
+TIP_SERVED_FLUSH_INTERVAL = float(os.getenv('TIP_SERVED_FLUSH_INTERVAL', '5'))
+
 
 class DailyTip(commands.Cog):
     """
@@ -20,6 +36,8 @@ class DailyTip(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
+        db (Database): The shared Database cog that stores the tip pool.
+        tip_pool (TipPool): Pre-generated tips, served least recently used first.
     """
 
     def __init__(self, bot):
@@ -30,15 +48,76 @@ class DailyTip(commands.Cog):
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
+        self.db = bot.get_cog("Database")
+        self.tip_pool = TipPool(self.db)
+        self._refill_lock = asyncio.Lock()
+        self._refill_task = None
+
+    async def cog_load(self):
+        """
+        Seed the tip pool if it's empty and start the background refill and flush tasks.
+        """
+        try:
+            await self.tip_pool.seed()
+        except sqlite3.Error as e:
+            logger.error(f"Database error while seeding the tip pool: {e}")
+        self.refill_loop.start()
+        self.flush_served_loop.start()
+
+    async def cog_unload(self):
+        """
+        Stop refilling the tip pool and write the tips served since the last flush.
+        """
+        self.refill_loop.cancel()
+        self.flush_served_loop.cancel()
+        if self._refill_task is not None:
+            self._refill_task.cancel()
+        await self.flush_served()
+
+    async def flush_served(self):
+        """
+        Write which tips were served since the last flush.
+        """
+        try:
+            await self.tip_pool.flush_served()
+        except sqlite3.Error as e:
+            logger.error(f"Database error while recording served tips: {e}")
+
+    async def refill(self):
+        """
+        Refill the tip pool if it's low. Only one refill runs at a time.
+        """
+        if self._refill_lock.locked():
+            return
+        async with self._refill_lock:
+            try:
+                if await self.tip_pool.needs_refill():
+                    added = await self.tip_pool.refill()
+                    logger.info(f"Refilled the tip pool with {added} new tip(s).")
+            except sqlite3.Error as e:
+                logger.error(f"Database error while refilling the tip pool: {e}")
+
+    @tasks.loop(seconds=TIP_REFILL_INTERVAL)
+    async def refill_loop(self):
+        """
+        Periodically top up the tip pool in the background.
+        """
+        await self.refill()
+
+    @tasks.loop(seconds=TIP_SERVED_FLUSH_INTERVAL)
+    async def flush_served_loop(self):
+        """
+        Periodically write which tips were served, in one batch.
+        """
+        await self.flush_served()
 
     @commands.command(help="This command sends a daily tip to the user.")
     async def tip(self, ctx):
         """
         Send a study tip to the user.
 
-        This command provides the user with a helpful study tip when requested.
-        Currently, it sends a placeholder message but could be expanded to draw
-        from a database of tips or generate contextual tips.
+        The tip comes from the local tip pool, so the reply is instant. If the
+        pool is running low, a refill is started in the background afterwards.
 
         Args:
             ctx (commands.Context): The invocation context containing information
@@ -46,14 +125,19 @@ class DailyTip(commands.Cog):
 
         Returns:
             None: The tip is sent directly to the Discord channel.
-
-        Note:
-            Future enhancements could include:
-            - Random selection from a collection of tips
-            - Subject-specific tips based on arguments
-            - Tips tailored to user study history
         """
-        await ctx.send("Here's your daily tip, partner!")
+        try:
+            tip = await self.tip_pool.next_tip()
+        except sqlite3.Error as e:
+            logger.error(f"Database error while serving a tip: {e}")
+            tip = None
+
+        # Never leave a partner empty-handed, even if the pool is unavailable
+        await ctx.send(f"🤠 {tip or random.choice(STARTER_TIPS)}")
+
+        # Top the pool back up without making anyone wait for it
+        if not self._refill_lock.locked() and (self._refill_task is None or self._refill_task.done()):
+            self._refill_task = asyncio.create_task(self.refill())
 
 
 # Setup function to add the cog to the bot
@@ -69,4 +153,4 @@ async def setup(bot):
     Returns:
         None
     """
-    await bot.add_cog(DailyTip(bot))
\ No newline at end of file
+    await bot.add_cog(DailyTip(bot))
@@ -2,15 +2,130 @@
 Discord bot database extension.
 This module provides database functionality for the bot, handling connections,
 queries, and database schema management.
+
+The Database cog is the single owner of the SQLite connection. All queries are
+run on a dedicated worker thread and exposed as awaitables, so a slow query or
+commit never blocks the bot's event loop (and with it gateway heartbeats).
+
+The database runs in WAL mode. Writes go through one writer connection while
+read-only queries are served by a small pool of reader connections, so reads
+never queue behind a commit.
+
+Study point changes are not committed one by one. They are merged into a
+write-behind `PointBuffer` and flushed in a single transaction on a short
+interval, or sooner once enough changes are pending.
+
+Every change is also appended to the `point_events` ledger in that same
+transaction, so `study_points` is only a snapshot of the ledger. A periodic
+compaction job folds the ledger into the `point_snapshots` checkpoint, which
+lets `rebuild_points` restore `study_points` by replaying only recent events.
+Compacted events older than `LEDGER_RETENTION_DAYS` are pruned; their totals
+are kept in `point_archive`, so even a full replay starts from them.
+
+Awards are also rolled up into hourly and daily per-user buckets during the
+flush, so daily/weekly/monthly leaderboards only read a bounded number of
+buckets instead of scanning the ledger.
+
+The in-memory leaderboard and rank index hold live totals: every buffered
+change is applied to them as soon as it is made, so leaderboard and rank reads
+never have to flush first.
+
+Study session starts and stops are buffered the same way and written to the
+`study_sessions` table by the same flush, so a session's end and its point
+award are committed together. Each closed session is also folded into per-user
+aggregates (`study_stats`, `study_weekday_stats`) by that flush, so study
+statistics are read from a few rows instead of the whole history.
 """
 
+import os
 import sqlite3
+import asyncio
+import functools
 import logging
-from discord.ext import commands
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from discord.ext import commands, tasks
+from utils.point_buffer import PointBuffer
+from utils.top_k import TopK
+from utils.rank_index import RankIndex
+from utils.guild_settings import GuildSettings, GLOBAL_GUILD
 
 # Setup logger for error handling and database operations tracking
 logger = logging.getLogger(__name__)
 
+# Path of the SQLite database file shared by the whole bot
+DATABASE_PATH = 'study_points.db'
+
+# Number of read-only connections (and threads) serving read queries
+DB_READER_POOL_SIZE = int(os.getenv('DB_READER_POOL_SIZE', '4'))
+
+# PRAGMA synchronous level for the writer (OFF, NORMAL, FULL or EXTRA); NORMAL is safe in WAL mode
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL').upper()
+
+# PRAGMA cache_size per connection; negative values are KiB (default 8 MiB)
+DB_CACHE_SIZE = int(os.getenv('DB_CACHE_SIZE', '-8000'))
+
+# PRAGMA mmap_size per connection in bytes (default 64 MiB, 0 disables memory mapping)
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(64 * 1024 * 1024)))
+
+# Seconds between write-behind flushes of buffered point changes
+POINT_FLUSH_INTERVAL = float(os.getenv('POINT_FLUSH_INTERVAL', '2'))
+
+# Number of buffered point changes that triggers an early flush
+POINT_FLUSH_THRESHOLD = int(os.getenv('POINT_FLUSH_THRESHOLD', '100'))
+
+# Number of users shown on the leaderboard, and how many extra are tracked in memory
+LEADERBOARD_SIZE = 10
+LEADERBOARD_SLACK = int(os.getenv('LEADERBOARD_SLACK', '40'))
+
+# Seconds between ledger compactions, and how many events are folded per transaction
+LEDGER_COMPACT_INTERVAL = float(os.getenv('LEDGER_COMPACT_INTERVAL', '600'))
+LEDGER_REPLAY_BATCH = int(os.getenv('LEDGER_REPLAY_BATCH', '5000'))
+
+# Days compacted ledger events are kept before they are pruned (0 keeps them forever)
+LEDGER_RETENTION_DAYS = int(os.getenv('LEDGER_RETENTION_DAYS', '90'))
+
+# Ledger sources that count as earning points for the time-windowed leaderboards
+ROLLUP_SOURCES = ('addpoints', 'study_timer', 'voice_study', 'quiz')
+
+# Window name -> (rollup table, bucket width in seconds, number of buckets in the window)
+ROLLUP_WINDOWS = {
+    'daily': ('point_rollups_hourly', 3600, 24),
+    'weekly': ('point_rollups_daily', 86400, 7),
+    'monthly': ('point_rollups_daily', 86400, 30),
+}
+
+# Number of buckets kept per rollup table before pruning (a little over the longest window using it)
+ROLLUP_RETENTION = {
+    'point_rollups_hourly': int(os.getenv('ROLLUP_HOURLY_RETENTION', '48')),
+    'point_rollups_daily': int(os.getenv('ROLLUP_DAILY_RETENTION', '32')),
+}
+
+# Upsert used to apply a batch of buffered point deltas
+POINT_UPSERT_QUERY = '''INSERT INTO study_points (user_id, points)
+                        VALUES (?, ?)
+                        ON CONFLICT(user_id)
+                        DO UPDATE SET points = points + excluded.points'''
+
+# Statements used to persist buffered study session starts and stops
+SESSION_START_QUERY = '''INSERT OR IGNORE INTO study_sessions (user_id, channel_id, source, started_at)
+                         VALUES (?, ?, ?, ?)'''
+SESSION_END_QUERY = '''UPDATE study_sessions SET ended_at = ?, points = ?
+                       WHERE user_id = ? AND started_at = ? AND ended_at IS NULL'''
+
+# Upsert used to fold a batch of ledger events into the compaction checkpoint
+SNAPSHOT_UPSERT_QUERY = '''INSERT INTO point_snapshots (user_id, points)
+                           VALUES (?, ?)
+                           ON CONFLICT(user_id)
+                           DO UPDATE SET points = points + excluded.points'''
+
+# Upsert used to fold pruned ledger events into the archive
+ARCHIVE_UPSERT_QUERY = '''INSERT INTO point_archive (user_id, points)
+                          VALUES (?, ?)
+                          ON CONFLICT(user_id)
+                          DO UPDATE SET points = points + excluded.points'''
+
 
 class Database(commands.Cog):
     """
@@ -20,21 +135,143 @@ class Database(commands.Cog):
     executing queries, and ensures proper database schema creation. It centralizes
     all database operations for the bot to maintain consistency and proper error handling.
 
+    Every other cog should reach the database through this cog (via
+    ``bot.get_cog("Database")``) rather than opening its own connection.
+
     Attributes:
         bot (commands.Bot): The Discord bot instance.
-        conn (sqlite3.Connection): The SQLite database connection.
+        executor (ThreadPoolExecutor): Single worker thread that owns the writer connection.
+        reader_executor (ThreadPoolExecutor): Threads that serve read-only queries.
+        conn (sqlite3.Connection): The SQLite writer connection.
         cursor (sqlite3.Cursor): The database cursor for executing queries.
+        point_buffer (PointBuffer): Pending point deltas that have not been flushed yet.
+        top_points (TopK): In-memory leaderboard kept in sync with every flushed point change.
+        rank_index (RankIndex): Order-statistic index of every user's points, kept in sync the same way.
+        settings (GuildSettings): Per-guild settings, cached in memory and written through.
     """
 
     def __init__(self, bot):
         """
-        Initialize the Database cog and establish a database connection.
+        Initialize the Database cog.
+
+        The connection itself is opened in `cog_load`, on the worker thread that
+        will use it for the rest of its life.
 
         Args:
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
-        self.conn, self.cursor = self.initialize_database()
+        self.executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="sqlite-worker")
+        self.reader_executor = ThreadPoolExecutor(max_workers=DB_READER_POOL_SIZE,
+                                                  thread_name_prefix="sqlite-reader")
+        self.conn = None
+        self.cursor = None
+        self._reader_local = threading.local()  # Each reader thread keeps its own connection
+        self._reader_conns = []
+        self._reader_conns_lock = threading.Lock()
+        self.point_buffer = PointBuffer()
+        self.session_starts = []     # Buffered SESSION_START_QUERY parameters
+        self.session_ends = []       # Buffered SESSION_END_QUERY parameters
+        self.top_points = TopK(k=LEADERBOARD_SIZE, slack=LEADERBOARD_SLACK)
+        self.rank_index = RankIndex()
+        self.settings = GuildSettings(self)
+        self._in_flight = {}         # Batch currently being written by a flush
+        self._flush_epoch = 0        # Incremented every time a flush starts
+        self._flushing = None        # Future of the running flush, if any
+        self.points_version = 0      # Incremented every time a live point total changes
+        self._spend_lock = asyncio.Lock()
+
+    async def cog_load(self):
+        """
+        Open the database connection on the worker thread when the cog is loaded
+        and start the periodic point flush.
+
+        Returns:
+            None
+        """
+        self.conn, self.cursor = await self.run(self.initialize_database)
+        await self.settings.load()
+        if self.bot.is_ready():
+            await self.claim_global_channels()
+        await self.seed_top_points()
+        await self.seed_rank_index()
+        self.flush_loop.start()
+        self.compact_loop.start()
+        self.prune_loop.start()
+
+    async def claim_global_channels(self):
+        """
+        Move legacy channel settings from guild 0 to the guild that owns each channel.
+        """
+        try:
+            moved = await self.settings.claim_global_channels(self.bot.get_channel)
+            if moved:
+                logger.info(f"Moved {moved} legacy channel setting(s) to their guild.")
+        except sqlite3.Error as e:
+            logger.error(f"Database error while migrating channel settings: {e}")
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        Migrate legacy channel settings once the bot can see every channel.
+        """
+        await self.claim_global_channels()
+
+    async def run(self, func, *args):
+        """
+        Run a blocking function on the database worker thread.
+
+        Args:
+            func (callable): The function to run. It may use `self.conn` freely.
+            *args: Positional arguments passed to the function.
+
+        Returns:
+            Any: Whatever the function returns.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.executor, functools.partial(func, *args))
+
+    async def run_read(self, func, *args):
+        """
+        Run a blocking read-only function on the reader pool.
+
+        Args:
+            func (callable): The function to run. It must only read from the database.
+            *args: Positional arguments passed to the function.
+
+        Returns:
+            Any: Whatever the function returns.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self.reader_executor, functools.partial(func, *args))
+
+    @staticmethod
+    def _apply_pragmas(conn):
+        """
+        Apply the configured per-connection performance pragmas.
+
+        Args:
+            conn (sqlite3.Connection): The connection to configure.
+        """
+        conn.execute(f"PRAGMA cache_size = {DB_CACHE_SIZE}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+
+    def _reader_connection(self):
+        """
+        Return the calling reader thread's read-only connection, opening it on first use.
+
+        Returns:
+            sqlite3.Connection: A read-only connection owned by the current thread.
+        """
+        conn = getattr(self._reader_local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(f"file:{DATABASE_PATH}?mode=ro", uri=True, check_same_thread=False)
+            conn.row_factory = sqlite3.Row
+            self._apply_pragmas(conn)
+            self._reader_local.conn = conn
+            with self._reader_conns_lock:
+                self._reader_conns.append(conn)
+        return conn
 
     def initialize_database(self):
         """
@@ -48,11 +285,18 @@ class Database(commands.Cog):
         """
         try:
             # Create or connect to the SQLite database file
-            conn = sqlite3.connect('study_points.db')
+            conn = sqlite3.connect(DATABASE_PATH)
 
             # Configure row factory to return rows as dictionaries for easier access
             conn.row_factory = sqlite3.Row
 
+            # Switch to write-ahead logging so readers don't block on the writer
+            if DB_SYNCHRONOUS not in ('OFF', 'NORMAL', 'FULL', 'EXTRA'):
+                raise ValueError(f"Invalid DB_SYNCHRONOUS value: {DB_SYNCHRONOUS}")
+            conn.execute("PRAGMA journal_mode = WAL")
+            conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+            self._apply_pragmas(conn)
+
             # Create a cursor for executing SQL commands
             c = conn.cursor()
 
@@ -62,12 +306,165 @@ class Database(commands.Cog):
                              points INTEGER
                          )''')
 
-            # Create the settings table if it doesn't exist
+            # Older databases may hold NULL totals; every reader and upsert assumes integers
+            c.execute('UPDATE study_points SET points = 0 WHERE points IS NULL')
+
+            # Covering index in leaderboard order, used to seed the top-K and for keyset pagination
+            c.execute('DROP INDEX IF EXISTS idx_study_points_points')
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_study_points_rank
+                         ON study_points (points DESC, user_id DESC)''')
+
+            # Append-only ledger of every point change; study_points is a snapshot of it
+            c.execute('''CREATE TABLE IF NOT EXISTS point_events (
+                             id INTEGER PRIMARY KEY AUTOINCREMENT,
+                             user_id INTEGER NOT NULL,
+                             delta INTEGER NOT NULL,
+                             source TEXT NOT NULL,
+                             created_at INTEGER NOT NULL
+                         )''')
+
+            # Used to sum a user's awards from one source over a time range (see _close_stale_sessions)
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_point_events_user_source
+                         ON point_events (user_id, source, created_at)''')
+
+            # Per-user totals of every pruned ledger event
+            c.execute('''CREATE TABLE IF NOT EXISTS point_archive (
+                             user_id INTEGER PRIMARY KEY,
+                             points INTEGER NOT NULL
+                         )''')
+
+            # Per-user totals of every event up to ledger_state.compacted_through
+            c.execute('''CREATE TABLE IF NOT EXISTS point_snapshots (
+                             user_id INTEGER PRIMARY KEY,
+                             points INTEGER NOT NULL
+                         )''')
+            c.execute('''CREATE TABLE IF NOT EXISTS ledger_state (
+                             id INTEGER PRIMARY KEY CHECK (id = 1),
+                             compacted_through INTEGER NOT NULL
+                         )''')
+
+            # The first time the ledger exists, record existing balances as opening events
+            c.execute('SELECT compacted_through FROM ledger_state WHERE id = 1')
+            if c.fetchone() is None:
+                c.execute('''INSERT INTO point_events (user_id, delta, source, created_at)
+                             SELECT user_id, COALESCE(points, 0), 'migration', ? FROM study_points''',
+                          (int(time.time()),))
+                c.execute('INSERT INTO ledger_state (id, compacted_through) VALUES (1, 0)')
+
+            # Per-user points earned per hour / per day, for the time-windowed leaderboards
+            for table in ROLLUP_RETENTION:
+                c.execute(f'''CREATE TABLE IF NOT EXISTS {table} (
+                                  bucket INTEGER NOT NULL,
+                                  user_id INTEGER NOT NULL,
+                                  points INTEGER NOT NULL,
+                                  PRIMARY KEY (bucket, user_id)
+                              )''')
+
+            # Create the (legacy, global) settings table if it doesn't exist
             c.execute('''CREATE TABLE IF NOT EXISTS settings (
                              key TEXT PRIMARY KEY,
                              value TEXT
                          )''')
 
+            # Create the per-guild settings table; legacy global settings become guild 0 defaults
+            # (channel settings are moved to their own guild in cog_load, see GuildSettings)
+            c.execute('''CREATE TABLE IF NOT EXISTS guild_settings (
+                             guild_id INTEGER NOT NULL,
+                             key TEXT NOT NULL,
+                             value TEXT,
+                             PRIMARY KEY (guild_id, key)
+                         )''')
+            c.execute('''INSERT OR IGNORE INTO guild_settings (guild_id, key, value)
+                         SELECT ?, key, value FROM settings''', (GLOBAL_GUILD,))
+            c.execute('DELETE FROM settings')
+
+            # Generated quizzes, several variants per normalized topic (see utils/quiz_cache.py)
+            c.execute('''CREATE TABLE IF NOT EXISTS quiz_cache (
+                             id INTEGER PRIMARY KEY AUTOINCREMENT,
+                             topic TEXT NOT NULL,
+                             questions TEXT NOT NULL,
+                             created_at INTEGER NOT NULL
+                         )''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_quiz_cache_topic ON quiz_cache (topic, created_at)')
+
+            # Question bank of every validated quiz question, with a full-text index over topic and text
+            c.execute('''CREATE TABLE IF NOT EXISTS quiz_questions (
+                             id INTEGER PRIMARY KEY AUTOINCREMENT,
+                             topic TEXT NOT NULL,
+                             question TEXT NOT NULL COLLATE NOCASE UNIQUE,
+                             choices TEXT NOT NULL,
+                             answer TEXT NOT NULL,
+                             source TEXT NOT NULL,
+                             created_at INTEGER NOT NULL
+                         )''')
+            c.execute('''CREATE VIRTUAL TABLE IF NOT EXISTS quiz_questions_fts USING fts5(
+                             topic, question, content='quiz_questions', content_rowid='id'
+                         )''')
+            c.execute('''CREATE TRIGGER IF NOT EXISTS quiz_questions_ai AFTER INSERT ON quiz_questions BEGIN
+                             INSERT INTO quiz_questions_fts (rowid, topic, question)
+                             VALUES (new.id, new.topic, new.question);
+                         END''')
+            c.execute('''CREATE TRIGGER IF NOT EXISTS quiz_questions_ad AFTER DELETE ON quiz_questions BEGIN
+                             INSERT INTO quiz_questions_fts (quiz_questions_fts, rowid, topic, question)
+                             VALUES ('delete', old.id, old.topic, old.question);
+                         END''')
+
+            # Study sessions; open sessions (ended_at IS NULL) are reloaded at startup
+            c.execute('''CREATE TABLE IF NOT EXISTS study_sessions (
+                             id INTEGER PRIMARY KEY AUTOINCREMENT,
+                             user_id INTEGER NOT NULL,
+                             channel_id INTEGER,
+                             source TEXT NOT NULL,
+                             started_at REAL NOT NULL,
+                             ended_at REAL,
+                             points INTEGER
+                         )''')
+            c.execute('''CREATE UNIQUE INDEX IF NOT EXISTS idx_study_sessions_user
+                         ON study_sessions (user_id, started_at)''')
+            c.execute('''CREATE INDEX IF NOT EXISTS idx_study_sessions_open
+                         ON study_sessions (user_id) WHERE ended_at IS NULL''')
+
+            # Per-user study aggregates, updated as each session closes; last_day is a UTC day number
+            c.execute('''CREATE TABLE IF NOT EXISTS study_stats (
+                             user_id INTEGER PRIMARY KEY,
+                             total_seconds REAL NOT NULL,
+                             sessions INTEGER NOT NULL,
+                             current_streak INTEGER NOT NULL,
+                             longest_streak INTEGER NOT NULL,
+                             last_day INTEGER
+                         )''')
+            c.execute('''CREATE TABLE IF NOT EXISTS study_weekday_stats (
+                             user_id INTEGER NOT NULL,
+                             weekday INTEGER NOT NULL,
+                             seconds REAL NOT NULL,
+                             sessions INTEGER NOT NULL,
+                             PRIMARY KEY (user_id, weekday)
+                         ) WITHOUT ROWID''')
+
+            # The first time the aggregates exist, build them from the session history
+            c.execute('SELECT 1 FROM study_stats LIMIT 1')
+            if c.fetchone() is None:
+                c.execute('SELECT user_id, started_at, ended_at FROM study_sessions WHERE ended_at IS NOT NULL')
+                self._apply_session_stats(c, [tuple(row) for row in c.fetchall()])
+
+            # Pool of pre-generated study tips served by !tip (see utils/tip_pool.py)
+            c.execute('''CREATE TABLE IF NOT EXISTS tips (
+                             id INTEGER PRIMARY KEY AUTOINCREMENT,
+                             text TEXT NOT NULL COLLATE NOCASE UNIQUE,
+                             source TEXT NOT NULL,
+                             created_at INTEGER NOT NULL,
+                             served_at REAL,
+                             served_count INTEGER NOT NULL DEFAULT 0
+                         )''')
+            c.execute('CREATE INDEX IF NOT EXISTS idx_tips_served ON tips (served_at, id)')
+
+            # Questions each user has already been served, so quizzes from the bank don't repeat
+            c.execute('''CREATE TABLE IF NOT EXISTS quiz_question_seen (
+                             user_id INTEGER NOT NULL,
+                             question_id INTEGER NOT NULL,
+                             PRIMARY KEY (user_id, question_id)
+                         ) WITHOUT ROWID''')
+
             # Commit the changes to the database
             conn.commit()
 
@@ -80,23 +477,12 @@ class Database(commands.Cog):
             logger.error(f"Error connecting to SQLite database: {e}")
             raise
 
-    def execute_query(self, query, params=()):
+    def _execute(self, query, params):
         """
-        Execute an SQL query with error handling and automatic commit.
-
-        This method executes the given SQL query with the provided parameters
-        and commits the changes to the database. If an error occurs, it rolls
-        back the transaction and logs the error.
-
-        Args:
-            query (str): The SQL query to execute.
-            params (tuple, optional): Parameters to bind to the query. Defaults to empty tuple.
+        Execute and commit a single query. Runs on the worker thread.
 
-        Returns:
-            None
-
-        Note:
-            This method automatically commits changes on success and rolls back on failure.
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
         """
         try:
             # Execute the query with the provided parameters
@@ -104,56 +490,1157 @@ class Database(commands.Cog):
 
             # Commit the changes to the database
             self.conn.commit()
+            return self.cursor.lastrowid
         except sqlite3.Error as e:
             # Log the error
             logger.error(f"Database query error: {e}")
 
             # Roll back any changes to avoid partial updates
             self.conn.rollback()
+            raise
 
-    def fetch_query(self, query, params=()):
+    def _execute_many(self, query, seq_of_params):
         """
-        Execute a query and fetch all results with error handling.
+        Execute a query for every parameter tuple in one transaction. Runs on the worker thread.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            self.cursor.executemany(query, seq_of_params)
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Database batch query error: {e}")
+            self.conn.rollback()
+            raise
+
+    def _execute_returning(self, query, seq_of_params):
+        """
+        Execute a RETURNING query for every parameter tuple in one transaction. Runs on the worker thread.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            rows = [self.cursor.execute(query, params).fetchone() for params in seq_of_params]
+            self.conn.commit()
+            return rows
+        except sqlite3.Error as e:
+            logger.error(f"Database batch query error: {e}")
+            self.conn.rollback()
+            raise
+
+    def _fetch(self, query, params):
+        """
+        Execute a query and return all rows. Runs on a reader thread.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        try:
+            # Execute the query with the provided parameters on this thread's reader
+            cursor = self._reader_connection().execute(query, params)
+
+            # Return all matching rows
+            return cursor.fetchall()
+        except sqlite3.Error as e:
+            # Log the error and re-raise it to be handled by the caller
+            logger.error(f"Error fetching data: {e}")
+            raise
+
+    def _apply_point_batch(self, batch, events, session_starts=(), session_ends=()):
+        """
+        Append a batch of events to the ledger, apply their deltas to the snapshot and
+        read back the new totals, all in one transaction. Runs on the worker thread.
+
+        Buffered study session starts and stops are written in the same transaction;
+        starts go first, so a session that started and stopped within one batch is closed.
+
+        Args:
+            batch (dict): Maps user_id to the delta to apply.
+            events (list): `(user_id, delta, source, created_at)` tuples to append to the ledger.
+            session_starts (list, optional): SESSION_START_QUERY parameter tuples.
+            session_ends (list, optional): SESSION_END_QUERY parameter tuples.
+
+        Returns:
+            list: `(user_id, points)` tuples with each user's new total.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            self.cursor.executemany('''INSERT INTO point_events (user_id, delta, source, created_at)
+                                       VALUES (?, ?, ?, ?)''', events)
+            self.cursor.executemany(POINT_UPSERT_QUERY, batch.items())
+            self._apply_rollups(events)
+            self.cursor.executemany(SESSION_START_QUERY, session_starts)
+
+            # Only sessions that were actually still open count towards the aggregates
+            closed = []
+            for ended_at, points, user_id, started_at in session_ends:
+                self.cursor.execute(SESSION_END_QUERY, (ended_at, points, user_id, started_at))
+                if self.cursor.rowcount:
+                    closed.append((user_id, started_at, ended_at))
+            self._apply_session_stats(self.cursor, closed)
+
+            # Read the new totals back in chunks that stay below SQLite's bound-parameter limit
+            user_ids = list(batch)
+            totals = []
+            for start in range(0, len(user_ids), 500):
+                chunk = user_ids[start:start + 500]
+                placeholders = ', '.join('?' * len(chunk))
+                self.cursor.execute(
+                    f'SELECT user_id, points FROM study_points WHERE user_id IN ({placeholders})', chunk)
+                totals.extend(tuple(row) for row in self.cursor.fetchall())
+
+            self.conn.commit()
+            return totals
+        except sqlite3.Error as e:
+            logger.error(f"Database batch query error: {e}")
+            self.conn.rollback()
+            raise
+
+    def _apply_rollups(self, events):
+        """
+        Add earned points from a batch of ledger events to the hourly and daily rollup buckets.
+        Runs on the worker thread, inside the flush transaction.
+
+        Args:
+            events (list): `(user_id, delta, source, created_at)` tuples being flushed.
+        """
+        for table, width in (('point_rollups_hourly', 3600), ('point_rollups_daily', 86400)):
+            buckets = {}
+            for user_id, delta, source, created_at in events:
+                if delta > 0 and source in ROLLUP_SOURCES:
+                    key = (created_at // width, user_id)
+                    buckets[key] = buckets.get(key, 0) + delta
+
+            self.cursor.executemany(f'''INSERT INTO {table} (bucket, user_id, points)
+                                        VALUES (?, ?, ?)
+                                        ON CONFLICT(bucket, user_id)
+                                        DO UPDATE SET points = points + excluded.points''',
+                                    [(bucket, user_id, points) for (bucket, user_id), points in buckets.items()])
+
+    @staticmethod
+    def _apply_session_stats(cursor, sessions):
+        """
+        Fold closed study sessions into the per-user aggregates. Runs on the worker thread,
+        inside the flush transaction (or at startup, to build the aggregates from the history).
+
+        A streak counts consecutive UTC days with a session, by the day each session started.
+        A session that started on an earlier day than the user's last counted one still adds
+        its time, but doesn't change the streak.
+
+        Args:
+            cursor (sqlite3.Cursor): A cursor on the writer connection.
+            sessions (list): `(user_id, started_at, ended_at)` tuples of sessions that just closed.
+        """
+        if not sessions:
+            return
+
+        stats = {}
+        user_ids = list({user_id for user_id, _, _ in sessions})
+        for start in range(0, len(user_ids), 500):
+            chunk = user_ids[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            cursor.execute(f'''SELECT user_id, total_seconds, sessions, current_streak, longest_streak, last_day
+                               FROM study_stats WHERE user_id IN ({placeholders})''', chunk)
+            stats.update((row[0], list(row[1:])) for row in cursor.fetchall())
+
+        weekdays = {}
+        for user_id, started_at, ended_at in sorted(sessions, key=lambda session: session[1]):
+            seconds = max(0.0, ended_at - started_at)
+            day = int(started_at // 86400)
+            entry = stats.setdefault(user_id, [0.0, 0, 0, 0, None])
+            entry[0] += seconds
+            entry[1] += 1
+            if entry[4] is None or day > entry[4]:
+                entry[2] = entry[2] + 1 if entry[4] == day - 1 else 1
+                entry[3] = max(entry[3], entry[2])
+                entry[4] = day
+
+            weekday = weekdays.setdefault((user_id, time.gmtime(started_at).tm_wday), [0.0, 0])
+            weekday[0] += seconds
+            weekday[1] += 1
+
+        cursor.executemany('''REPLACE INTO study_stats
+                              (user_id, total_seconds, sessions, current_streak, longest_streak, last_day)
+                              VALUES (?, ?, ?, ?, ?, ?)''',
+                           [(user_id, *entry) for user_id, entry in stats.items()])
+        cursor.executemany('''INSERT INTO study_weekday_stats (user_id, weekday, seconds, sessions)
+                              VALUES (?, ?, ?, ?)
+                              ON CONFLICT(user_id, weekday) DO UPDATE SET
+                                  seconds = seconds + excluded.seconds,
+                                  sessions = sessions + excluded.sessions''',
+                           [(user_id, weekday, seconds, count)
+                            for (user_id, weekday), (seconds, count) in weekdays.items()])
+
+    async def execute_query(self, query, params=()):
+        """
+        Execute an SQL query with error handling and automatic commit.
 
         This method executes the given SQL query with the provided parameters
-        and returns all matching rows. If an error occurs, it logs the error
-        and returns an empty list.
+        on the worker thread and commits the changes to the database. If an error
+        occurs, it rolls back the transaction, logs the error and re-raises it.
 
         Args:
             query (str): The SQL query to execute.
             params (tuple, optional): Parameters to bind to the query. Defaults to empty tuple.
 
         Returns:
-            list: A list of sqlite3.Row objects (dictionary-like) containing the query results,
-                  or an empty list if an error occurs.
+            int or None: The rowid of the inserted row, for INSERT queries.
+
+        Raises:
+            sqlite3.Error: If the query fails.
         """
-        try:
-            # Execute the query with the provided parameters
-            self.cursor.execute(query, params)
+        return await self.run(self._execute, query, params)
 
-            # Return all matching rows
-            return self.cursor.fetchall()
-        except sqlite3.Error as e:
-            # Log the error and return an empty list
-            logger.error(f"Error fetching data: {e}")
-            return []
+    async def execute_many(self, query, seq_of_params):
+        """
+        Execute an SQL query once per parameter tuple inside a single transaction.
+
+        Args:
+            query (str): The SQL query to execute.
+            seq_of_params (iterable): Parameter tuples to bind to the query.
+
+        Returns:
+            None
 
-    def cog_unload(self):
+        Raises:
+            sqlite3.Error: If the batch fails. No part of it is committed.
         """
-        Perform cleanup when the cog is unloaded.
+        await self.run(self._execute_many, query, list(seq_of_params))
 
-        This method is called automatically by discord.py when the cog is unloaded.
-        It ensures that any pending database changes are committed and the connection
-        is properly closed to prevent resource leaks.
+    async def execute_returning(self, query, seq_of_params):
+        """
+        Execute a query with a RETURNING clause once per parameter tuple inside a single transaction.
+
+        Args:
+            query (str): The SQL query to execute, e.g. an upsert ending in `RETURNING id`.
+            seq_of_params (iterable): Parameter tuples to bind to the query.
+
+        Returns:
+            list: The first returned row (or None) for each parameter tuple, in order.
+
+        Raises:
+            sqlite3.Error: If the batch fails. No part of it is committed.
+        """
+        return await self.run(self._execute_returning, query, list(seq_of_params))
+
+    async def fetch_query(self, query, params=()):
+        """
+        Execute a query and fetch all results with error handling.
+
+        The query runs on the reader pool, so it must not modify the database.
+        Readers see every committed write but never wait for a commit to finish.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple, optional): Parameters to bind to the query. Defaults to empty tuple.
+
+        Returns:
+            list: A list of sqlite3.Row objects (dictionary-like) containing the query results.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        return await self.run_read(self._fetch, query, params)
+
+    async def fetch_one(self, query, params=()):
+        """
+        Execute a query and return only the first result row.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple, optional): Parameters to bind to the query. Defaults to empty tuple.
+
+        Returns:
+            sqlite3.Row or None: The first matching row, or None if nothing matched.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        rows = await self.fetch_query(query, params)
+        return rows[0] if rows else None
+
+    async def add_points(self, user_id, delta, source):
+        """
+        Buffer a change to a user's study points.
+
+        The change is merged with any other pending change for the same user and
+        written, together with its ledger event, by the next flush. This is the
+        write path every cog should use to award or deduct points.
+
+        Args:
+            user_id (int): The user whose points change.
+            delta (int): The number of points to add (negative to deduct).
+            source (str): Which feature made the change, recorded in the ledger (e.g. 'quiz').
+
+        Returns:
+            None
+        """
+        # Nothing earned (e.g. a 0/3 quiz): no ledger event, no flush pressure
+        if not delta:
+            return
+        self.point_buffer.add(user_id, delta, source)
+        self._track_live(user_id, delta)
+
+        # Flush early when a burst of awards piles up
+        if self.buffered_writes >= POINT_FLUSH_THRESHOLD:
+            self.schedule_flush()
+
+    async def add_points_many(self, deltas, source):
+        """
+        Buffer changes to many users' study points at once, e.g. a periodic award to everyone in a channel.
+
+        The changes are buffered together, so the next flush writes all of them in one transaction.
+
+        Args:
+            deltas (dict): Maps user_id to the number of points to add (negative to deduct).
+            source (str): Which feature made the changes, recorded in the ledger (e.g. 'voice_study').
 
         Returns:
             None
         """
-        # Commit any pending changes
-        self.conn.commit()
+        for user_id, delta in deltas.items():
+            if delta:
+                self.point_buffer.add(user_id, delta, source)
+                self._track_live(user_id, delta)
+
+        if self.buffered_writes >= POINT_FLUSH_THRESHOLD:
+            self.schedule_flush()
+
+    async def get_points(self, user_id):
+        """
+        Return a user's current study points, including changes that are still buffered.
+
+        Args:
+            user_id (int): The user to look up.
+
+        Returns:
+            int or None: The user's points, or None if they have never earned any.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        while True:
+            # Wait for a flush carrying this user's delta to land, so it is counted exactly once
+            if self._flushing is not None and user_id in self._in_flight:
+                await asyncio.shield(self._flushing)
+                continue
 
-        # Close the database connection
-        self.conn.close()
+            epoch = self._flush_epoch
+            row = await self.fetch_one('SELECT points FROM study_points WHERE user_id = ?', (user_id,))
+
+            # A flush started while we were reading; the row may or may not include it, so read again
+            if epoch != self._flush_epoch:
+                continue
+
+            pending = self.point_buffer.get(user_id)
+            if row is None and user_id not in self.point_buffer.pending:
+                return None
+            return (row[0] if row else 0) + pending
+
+    async def record_session_start(self, user_id, started_at, channel_id=None, source='command'):
+        """
+        Buffer the start of a study session; it is written by the next flush.
+
+        Args:
+            user_id (int): The studying user.
+            started_at (float): Unix time the session started; with user_id, it identifies the session.
+            channel_id (int, optional): Where the session was started.
+            source (str, optional): How the session was started (e.g. 'command').
+
+        Returns:
+            None
+        """
+        self.session_starts.append((user_id, channel_id, source, started_at))
+
+    async def record_session_end(self, user_id, started_at, ended_at, points):
+        """
+        Buffer the end of a study session; it is written by the next flush.
+
+        Args:
+            user_id (int): The studying user.
+            started_at (float): Unix time the session started.
+            ended_at (float): Unix time the session ended.
+            points (int): Points awarded for the session.
+
+        Returns:
+            None
+        """
+        self.session_ends.append((ended_at, points, user_id, started_at))
+
+    def _close_stale_sessions(self, source, ledger_source):
+        """
+        Close open sessions of one kind that can't be resumed, e.g. voice stays cut off by a crash.
+        Runs on the worker thread.
+
+        Each one ends at its last award in the ledger (or when it started, if it earned nothing)
+        and keeps the points it was awarded, and is folded into the study aggregates. Only
+        awards up to the session's last-seen time are summed: the start of the user's next
+        session of the same kind, or now.
+
+        Args:
+            source (str): The session source to close (e.g. 'voice').
+            ledger_source (str): The ledger source its awards were recorded under (e.g. 'voice_study').
+
+        Returns:
+            int: Number of sessions closed.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            # One bounded range of idx_point_events_user_source per stale session
+            self.cursor.execute('''WITH stale AS (
+                                       SELECT s.id, s.user_id, s.started_at,
+                                              COALESCE((SELECT MIN(n.started_at) FROM study_sessions n
+                                                        WHERE n.user_id = s.user_id AND n.source = s.source
+                                                        AND n.started_at > s.started_at), ?) AS last_seen
+                                       FROM study_sessions s
+                                       WHERE s.ended_at IS NULL AND s.source = ?
+                                   )
+                                   SELECT st.user_id, st.started_at, MAX(e.created_at), COALESCE(SUM(e.delta), 0)
+                                   FROM stale st
+                                   LEFT JOIN point_events e
+                                       ON e.user_id = st.user_id AND e.source = ?
+                                       AND e.created_at >= CAST(st.started_at AS INTEGER)
+                                       AND e.created_at < st.last_seen
+                                   GROUP BY st.id''', (time.time(), source, ledger_source))
+            ends = [(max(last or started_at, started_at), points, user_id, started_at)
+                    for user_id, started_at, last, points in self.cursor.fetchall()]
+
+            self.cursor.executemany(SESSION_END_QUERY, ends)
+            self._apply_session_stats(self.cursor, [(user_id, started_at, ended_at)
+                                                    for ended_at, _, user_id, started_at in ends])
+            self.conn.commit()
+            return len(ends)
+        except sqlite3.Error as e:
+            logger.error(f"Error closing stale study sessions: {e}")
+            self.conn.rollback()
+            raise
+
+    async def close_stale_sessions(self, source, ledger_source):
+        """
+        Close every open session of one kind that can't be resumed. See `_close_stale_sessions`.
+
+        Args:
+            source (str): The session source to close (e.g. 'voice').
+            ledger_source (str): The ledger source its awards were recorded under.
+
+        Returns:
+            int: Number of sessions closed.
+
+        Raises:
+            sqlite3.Error: If the update fails.
+        """
+        await self.flush_points()
+        return await self.run(self._close_stale_sessions, source, ledger_source)
+
+    async def get_open_sessions(self):
+        """
+        Return every study session that hasn't ended, in one query. Used at startup.
+
+        Returns:
+            list: `(user_id, channel_id, source, started_at)` tuples.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        rows = await self.fetch_query(
+            'SELECT user_id, channel_id, source, started_at FROM study_sessions WHERE ended_at IS NULL')
+        return [tuple(row) for row in rows]
+
+    async def get_study_stats(self, user_id):
+        """
+        Return a user's study statistics from the precomputed aggregates.
+
+        A running flush is waited for, and session ends still in the buffer for this
+        user are flushed first, so a session that just stopped is included.
+
+        Args:
+            user_id (int): The user to look up.
+
+        Returns:
+            dict or None: `total_seconds`, `sessions`, `current_streak`, `longest_streak`, and
+                          `weekdays` mapping weekday (0 = Monday) to `(seconds, sessions)`;
+                          None if the user has never finished a session.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        # A running flush may already have taken this user's session end from the buffer
+        if self._flushing is not None:
+            await asyncio.shield(self._flushing)
+        if any(end[2] == user_id for end in self.session_ends):
+            await self.flush_points()
+
+        row = await self.fetch_one('''SELECT total_seconds, sessions, current_streak, longest_streak, last_day
+                                      FROM study_stats WHERE user_id = ?''', (user_id,))
+        if row is None:
+            return None
+        weekdays = await self.fetch_query(
+            'SELECT weekday, seconds, sessions FROM study_weekday_stats WHERE user_id = ?', (user_id,))
+
+        # The streak is only current if the last session day was today or yesterday
+        today = int(time.time() // 86400)
+        return {
+            'total_seconds': row[0],
+            'sessions': row[1],
+            'current_streak': row[2] if row[4] is not None and row[4] >= today - 1 else 0,
+            'longest_streak': row[3],
+            'weekdays': {weekday: (seconds, count) for weekday, seconds, count in weekdays},
+        }
+
+    async def spend_points(self, user_id, amount, source):
+        """
+        Deduct points from a user if they can afford it.
+
+        The balance check and the deduction happen under one lock, so two
+        concurrent purchases can't both spend the same points.
+
+        Args:
+            user_id (int): The user who is spending points.
+            amount (int): The number of points to deduct.
+            source (str): Which feature spent the points, recorded in the ledger (e.g. 'shop').
+
+        Returns:
+            bool: True if the points were deducted, False if the balance was too low.
+        """
+        async with self._spend_lock:
+            balance = await self.get_points(user_id) or 0
+            if balance < amount:
+                return False
+            await self.add_points(user_id, -amount, source)
+            return True
+
+    def _track_live(self, user_id, delta):
+        """
+        Apply a just-buffered change to the live totals of the in-memory leaderboard and rank index.
+        """
+        points = self.rank_index.points.get(user_id, 0) + delta
+        self.rank_index.update(user_id, points)
+        self.top_points.update(user_id, points)
+        self.points_version += 1
+
+    @property
+    def buffered_writes(self):
+        """
+        Return the number of buffered writes waiting for a flush: point changes and study session starts and stops.
+        """
+        return self.point_buffer.operations + len(self.session_starts) + len(self.session_ends)
+
+    def schedule_flush(self):
+        """
+        Start a background flush of buffered point changes unless one is already running.
+
+        Returns:
+            asyncio.Future: The running flush.
+        """
+        if self._flushing is None:
+            self._flushing = asyncio.ensure_future(self._flush_points())
+            self._flushing.add_done_callback(self._flush_done)
+        return self._flushing
+
+    def _flush_done(self, future):
+        """
+        Clear the running flush and start another one if changes piled up meanwhile.
+        """
+        self._flushing = None
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error flushing study points: {future.exception()}")
+        elif self.buffered_writes >= POINT_FLUSH_THRESHOLD:
+            self.schedule_flush()
+
+    async def _flush_points(self):
+        """
+        Write every buffered point change in one transaction.
+
+        If the write fails for any reason (a database error, or e.g. the worker
+        already being shut down), the batch is merged back into the buffer so it is
+        retried by the next flush instead of being lost.
+        """
+        batch, events = self.point_buffer.drain()
+        starts, self.session_starts = self.session_starts, []
+        ends, self.session_ends = self.session_ends, []
+        if not events and not starts and not ends:
+            return
+
+        self._in_flight = batch
+        self._flush_epoch += 1
+        try:
+            totals = await self.run(self._apply_point_batch, batch, events, starts, ends)
+        except Exception:
+            self.point_buffer.restore(batch, events)
+            self.session_starts = starts + self.session_starts
+            self.session_ends = ends + self.session_ends
+            raise
+        finally:
+            self._in_flight = {}
+
+        # Re-sync the live totals with what was just committed, plus anything buffered since
+        for user_id, points in totals:
+            points += self.point_buffer.get(user_id)
+            self.top_points.update(user_id, points)
+            self.rank_index.update(user_id, points)
+        self.points_version += 1
+
+    async def _fetch_consistent(self, query, params=()):
+        """
+        Run a read query whose result must not race with a point flush.
+
+        Used to seed in-memory structures from `study_points`: if a flush lands
+        while the query runs, the snapshot may predate totals that were already
+        applied in memory, so the query is simply run again.
+
+        Args:
+            query (str): The SQL query to execute.
+            params (tuple, optional): Parameters to bind to the query. Defaults to empty tuple.
+
+        Returns:
+            list: `(column, ...)` tuples for every result row.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        while True:
+            # Let a running flush land first so its totals aren't overwritten by an older snapshot
+            if self._flushing is not None:
+                await asyncio.shield(self._flushing)
+                continue
+
+            epoch = self._flush_epoch
+            rows = await self.fetch_query(query, params)
+            if epoch == self._flush_epoch:
+                return [tuple(row) for row in rows]
+
+    async def seed_top_points(self):
+        """
+        (Re)load the in-memory leaderboard from the `study_points` table.
+
+        This runs once at startup, and again only if so many leaders lost points
+        that the tracked set can no longer tell who is in the top.
+
+        Returns:
+            None
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        rows = await self._fetch_consistent(
+            'SELECT user_id, points FROM study_points ORDER BY points DESC, user_id DESC LIMIT ?',
+            (self.top_points.capacity,))
+        self.top_points.seed(rows)
+
+        # The table only has committed totals; the rank index has the live ones
+        for user_id in self.point_buffer.pending:
+            self.top_points.update(user_id, self.rank_index.points.get(user_id, 0))
+
+    async def seed_rank_index(self):
+        """
+        (Re)load the in-memory rank index from the `study_points` table, plus buffered changes.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        self.rank_index.seed(await self._fetch_consistent('SELECT user_id, points FROM study_points'))
+        for user_id, delta in self.point_buffer.pending.items():
+            self.rank_index.update(user_id, self.rank_index.points.get(user_id, 0) + delta)
+
+    async def get_top_points(self, n=LEADERBOARD_SIZE):
+        """
+        Return the users with the most study points, without querying SQLite.
+
+        The in-memory leaderboard already includes buffered point changes.
+
+        Args:
+            n (int, optional): Number of users to return. Defaults to the leaderboard size.
+
+        Returns:
+            list: `(user_id, points)` tuples ordered by points descending.
+
+        Raises:
+            sqlite3.Error: If a needed reseed fails.
+        """
+        top = self.top_points.top(n)
+        if top is None:
+            await self.seed_top_points()
+            top = self.top_points.top(n)
+        return top
+
+    async def flush_points(self):
+        """
+        Flush all buffered point changes and wait until they are committed.
+
+        Returns:
+            None
+        """
+        # A flush may already be running, and more changes may arrive while it does
+        while self._flushing is not None or self.buffered_writes:
+            await asyncio.shield(self.schedule_flush())
+
+    @tasks.loop(seconds=POINT_FLUSH_INTERVAL)
+    async def flush_loop(self):
+        """
+        Periodically flush buffered point changes to the database.
+        """
+        if self.buffered_writes:
+            self.schedule_flush()
+
+    def _compact_batch(self, batch_size):
+        """
+        Fold the next batch of ledger events into the `point_snapshots` checkpoint.
+        Runs on the worker thread.
+
+        Args:
+            batch_size (int): Maximum number of events to fold.
+
+        Returns:
+            int: Number of events folded; 0 once the checkpoint has caught up.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            self.cursor.execute('SELECT compacted_through FROM ledger_state WHERE id = 1')
+            through = self.cursor.fetchone()[0]
+            self.cursor.execute('''SELECT id, user_id, delta FROM point_events
+                                   WHERE id > ? ORDER BY id LIMIT ?''', (through, batch_size))
+            events = self.cursor.fetchall()
+            if not events:
+                return 0
+
+            totals = {}
+            for _, user_id, delta in events:
+                totals[user_id] = totals.get(user_id, 0) + delta
+
+            self.cursor.executemany(SNAPSHOT_UPSERT_QUERY, totals.items())
+            self.cursor.execute('UPDATE ledger_state SET compacted_through = ? WHERE id = 1',
+                                (events[-1][0],))
+            self.conn.commit()
+            return len(events)
+        except sqlite3.Error as e:
+            logger.error(f"Error compacting point ledger: {e}")
+            self.conn.rollback()
+            raise
+
+    def _reset_snapshots(self):
+        """
+        Drop the compaction checkpoint so the whole ledger is replayed. Runs on the worker thread.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            self.cursor.execute('DELETE FROM point_snapshots')
+            self.cursor.execute('''INSERT INTO point_snapshots (user_id, points)
+                                   SELECT user_id, points FROM point_archive''')
+
+            # Pruned events only survive in the archive, so the replay starts right after them
+            self.cursor.execute('''UPDATE ledger_state SET compacted_through = COALESCE(
+                                       (SELECT MIN(id) - 1 FROM point_events),
+                                       (SELECT seq FROM sqlite_sequence WHERE name = 'point_events'),
+                                       0)
+                                   WHERE id = 1''')
+            self.conn.commit()
+        except sqlite3.Error as e:
+            logger.error(f"Error resetting point snapshots: {e}")
+            self.conn.rollback()
+            raise
+
+    def _restore_from_snapshots(self):
+        """
+        Fold the last ledger events into the checkpoint and replace `study_points` with it.
+        Runs on the worker thread, so no flush can slip in between the two steps.
+
+        Returns:
+            int: Number of users whose stored total was wrong (or missing) and got corrected.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        while self._compact_batch(LEDGER_REPLAY_BATCH):
+            pass
+
+        try:
+            self.cursor.execute('''SELECT
+                                       (SELECT COUNT(*) FROM (SELECT user_id, points FROM point_snapshots
+                                                              EXCEPT SELECT user_id, points FROM study_points))
+                                     + (SELECT COUNT(*) FROM (SELECT user_id FROM study_points
+                                                              EXCEPT SELECT user_id FROM point_snapshots))''')
+            corrected = self.cursor.fetchone()[0]
+
+            self.cursor.execute('DELETE FROM study_points')
+            self.cursor.execute('''INSERT INTO study_points (user_id, points)
+                                   SELECT user_id, points FROM point_snapshots''')
+            self.conn.commit()
+            return corrected
+        except sqlite3.Error as e:
+            logger.error(f"Error restoring study points from the ledger: {e}")
+            self.conn.rollback()
+            raise
+
+    async def compact_ledger(self):
+        """
+        Fold every not yet compacted ledger event into the `point_snapshots` checkpoint.
+
+        Events are folded in batches of `LEDGER_REPLAY_BATCH`, each in its own short
+        transaction, so point flushes keep flowing while a large backlog is compacted.
+
+        Returns:
+            int: Number of events folded.
+
+        Raises:
+            sqlite3.Error: If a batch fails. Earlier batches stay committed.
+        """
+        folded = 0
+        while True:
+            count = await self.run(self._compact_batch, LEDGER_REPLAY_BATCH)
+            if not count:
+                return folded
+            folded += count
+
+    async def rebuild_points(self, full=False):
+        """
+        Rebuild the `study_points` snapshot by replaying the point ledger.
+
+        By default only events after the last compaction checkpoint are replayed.
+        With `full`, the checkpoint is discarded and the entire ledger is replayed
+        in batches, on top of the archived totals of pruned events. The in-memory leaderboard and rank index are reseeded afterwards.
+
+        Args:
+            full (bool, optional): Replay the ledger from the very first event. Defaults to False.
+
+        Returns:
+            int: Number of users whose total was corrected.
+
+        Raises:
+            sqlite3.Error: If the rebuild fails. `study_points` is left untouched in that case.
+        """
+        await self.flush_points()
+        if full:
+            await self.run(self._reset_snapshots)
+        await self.compact_ledger()
+        corrected = await self.run(self._restore_from_snapshots)
+
+        await self.seed_rank_index()
+        await self.seed_top_points()
+        self.points_version += 1
+        return corrected
+
+    async def get_window_top(self, window, limit=LEADERBOARD_SIZE):
+        """
+        Return the users who earned the most points in a recent time window.
+
+        Only the rollup buckets inside the window are read (24 hourly buckets for
+        `daily`, 7 or 30 daily buckets for `weekly` and `monthly`). Awards that are
+        still buffered are added in memory instead of flushing them first. Like
+        `get_points`, the read waits for a running flush and is retried if another
+        one starts meanwhile, so a batch is never counted both in the rollups and
+        as buffered.
+
+        Args:
+            window (str): One of the keys of `ROLLUP_WINDOWS`.
+            limit (int, optional): Number of users to return. Defaults to the leaderboard size.
+
+        Returns:
+            list: `(user_id, points)` tuples ordered by points and user_id descending.
+
+        Raises:
+            KeyError: If the window name is unknown.
+            sqlite3.Error: If the query fails.
+        """
+        table, width, count = ROLLUP_WINDOWS[window]
+        first_bucket = int(time.time()) // width - count + 1
+
+        while True:
+            # Let a running flush land first, so its events are either all buffered or all committed
+            if self._flushing is not None:
+                await asyncio.shield(self._flushing)
+                continue
+
+            epoch = self._flush_epoch
+            top = await self._read_window_top(table, width, first_bucket, limit)
+
+            # A flush started while we were reading; its batch may have been counted twice
+            if epoch == self._flush_epoch:
+                return top
+
+    async def _read_window_top(self, table, width, first_bucket, limit):
+        """
+        Read a window's top earners from the rollups and add the buffered earnings.
+        See `get_window_top`, which makes sure no flush lands in between.
+        """
+        # Earnings that aren't in the rollup tables yet
+        buffered = {}
+        for user_id, delta, source, created_at in self.point_buffer.events:
+            if delta > 0 and source in ROLLUP_SOURCES and created_at // width >= first_bucket:
+                buffered[user_id] = buffered.get(user_id, 0) + delta
+
+        rows = await self.fetch_query(
+            f'''SELECT user_id, SUM(points) AS total FROM {table}
+                WHERE bucket >= ?
+                GROUP BY user_id
+                ORDER BY total DESC, user_id DESC LIMIT ?''',
+            (first_bucket, limit))
+        totals = {user_id: total for user_id, total in rows}
+        if not buffered:
+            return list(totals.items())
+
+        # Buffered earnings only raise totals, so only their users can climb into the top
+        missing = [user_id for user_id in buffered if user_id not in totals]
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            placeholders = ', '.join('?' * len(chunk))
+            totals.update(tuple(row) for row in await self.fetch_query(
+                f'''SELECT user_id, SUM(points) FROM {table}
+                    WHERE bucket >= ? AND user_id IN ({placeholders})
+                    GROUP BY user_id''', (first_bucket, *chunk)))
+        for user_id, delta in buffered.items():
+            totals[user_id] = totals.get(user_id, 0) + delta
+        return sorted(totals.items(), key=lambda item: (item[1], item[0]), reverse=True)[:limit]
+
+    def _prune_rollups(self):
+        """
+        Delete rollup buckets that have aged out of every window. Runs on the worker thread.
+
+        Returns:
+            int: Number of rows deleted.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            now = int(time.time())
+            deleted = 0
+            for table, width in (('point_rollups_hourly', 3600), ('point_rollups_daily', 86400)):
+                self.cursor.execute(f'DELETE FROM {table} WHERE bucket < ?',
+                                    (now // width - ROLLUP_RETENTION[table] + 1,))
+                deleted += self.cursor.rowcount
+            self.conn.commit()
+            return deleted
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning point rollups: {e}")
+            self.conn.rollback()
+            raise
+
+    def _prune_ledger(self, batch_size):
+        """
+        Move the next batch of old, compacted ledger events into `point_archive`.
+        Runs on the worker thread.
+
+        Only an unbroken run of the oldest events is pruned, so the kept ledger is
+        always every event after some id (see `_reset_snapshots`). Events an open
+        study session may still need are kept.
+
+        Args:
+            batch_size (int): Maximum number of events to prune.
+
+        Returns:
+            int: Number of events pruned; 0 once nothing old enough is left.
+
+        Raises:
+            sqlite3.Error: Re-raised after rolling back the transaction.
+        """
+        try:
+            cutoff = int(time.time()) - LEDGER_RETENTION_DAYS * 86400
+            self.cursor.execute('SELECT MIN(started_at) FROM study_sessions WHERE ended_at IS NULL')
+            oldest_open = self.cursor.fetchone()[0]
+            if oldest_open is not None:
+                cutoff = min(cutoff, int(oldest_open))
+
+            self.cursor.execute('''SELECT id, user_id, delta, created_at FROM point_events
+                                   WHERE id <= (SELECT compacted_through FROM ledger_state WHERE id = 1)
+                                   ORDER BY id LIMIT ?''', (batch_size,))
+            events = []
+            for event in self.cursor.fetchall():
+                if event[3] >= cutoff:
+                    break
+                events.append(event)
+            if not events:
+                return 0
+
+            totals = {}
+            for _, user_id, delta, _ in events:
+                totals[user_id] = totals.get(user_id, 0) + delta
+
+            self.cursor.executemany(ARCHIVE_UPSERT_QUERY, totals.items())
+            self.cursor.execute('DELETE FROM point_events WHERE id <= ?', (events[-1][0],))
+            self.conn.commit()
+            return len(events)
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning point ledger: {e}")
+            self.conn.rollback()
+            raise
+
+    async def prune_ledger(self):
+        """
+        Prune every compacted ledger event older than `LEDGER_RETENTION_DAYS`, in batches.
+
+        Returns:
+            int: Number of events pruned.
+
+        Raises:
+            sqlite3.Error: If a batch fails. Earlier batches stay committed.
+        """
+        if LEDGER_RETENTION_DAYS <= 0:
+            return 0
+
+        pruned = 0
+        while True:
+            count = await self.run(self._prune_ledger, LEDGER_REPLAY_BATCH)
+            if not count:
+                return pruned
+            pruned += count
+
+    @tasks.loop(hours=1)
+    async def prune_loop(self):
+        """
+        Periodically prune expired rollup buckets and old ledger events so those tables stay small.
+        """
+        try:
+            await self.run(self._prune_rollups)
+            await self.prune_ledger()
+        except sqlite3.Error as e:
+            logger.error(f"Error pruning point rollups and ledger: {e}")
+
+    @tasks.loop(seconds=LEDGER_COMPACT_INTERVAL)
+    async def compact_loop(self):
+        """
+        Periodically fold new ledger events into the compaction checkpoint.
+        """
+        try:
+            await self.compact_ledger()
+        except sqlite3.Error as e:
+            logger.error(f"Error compacting point ledger: {e}")
+
+    async def get_leaderboard_page(self, after=None, limit=LEADERBOARD_SIZE):
+        """
+        Return one page of the leaderboard using keyset pagination.
+
+        Pages are ordered by `(points, user_id)` descending. Instead of an OFFSET,
+        each page starts right after the last row of the previous one, so every
+        page is a single range scan of the covering index and costs the same as
+        the first. Every page shows live totals, including buffered changes: the
+        first page is served from the in-memory top-K, and later pages overlay the
+        buffered users' live totals on the committed rows, so a user whose points are
+        still buffered appears on exactly one page.
+
+        Args:
+            after (tuple, optional): `(points, user_id)` of the last row on the previous
+                page, or None for the first page.
+            limit (int, optional): Number of rows to return. Defaults to the leaderboard size.
+
+        Returns:
+            list: `(user_id, points)` tuples ordered by points and user_id descending.
+
+        Raises:
+            sqlite3.Error: If the query fails.
+        """
+        if after is None and limit <= self.top_points.capacity:
+            return await self.get_top_points(limit)
+
+        while True:
+            # Committed rows of buffered users are replaced below, so read enough extra to fill the page
+            pending_users = len(self.point_buffer.pending)
+            if after is None:
+                rows = await self._fetch_consistent(
+                    'SELECT user_id, points FROM study_points ORDER BY points DESC, user_id DESC LIMIT ?',
+                    (limit + pending_users,))
+            else:
+                rows = await self._fetch_consistent(
+                    '''SELECT user_id, points FROM study_points
+                       WHERE (points, user_id) < (?, ?)
+                       ORDER BY points DESC, user_id DESC LIMIT ?''',
+                    (after[0], after[1], limit + pending_users))
+
+            # More users were buffered while reading; the extra rows may not be enough
+            pending = self.point_buffer.pending
+            if len(pending) <= pending_users:
+                break
+
+        rows = [row for row in rows if row[0] not in pending]
+        for user_id in pending:
+            points = self.rank_index.points.get(user_id, 0)
+            if after is None or (points, user_id) < tuple(after):
+                rows.append((user_id, points))
+        rows.sort(key=lambda row: (row[1], row[0]), reverse=True)
+        return rows[:limit]
+
+    async def get_rank(self, user_id):
+        """
+        Return a user's rank, percentile and nearest rivals, without querying SQLite.
+
+        The rank index already includes buffered point changes.
+
+        Args:
+            user_id (int): The user to rank.
+
+        Returns:
+            dict or None: A dict with `rank`, `total`, `points`, `percentile`, `above`
+                and `below` keys (see `RankIndex`), or None if the user has no points.
+
+        """
+        ranked = self.rank_index.rank(user_id)
+        if ranked is None:
+            return None
+
+        rank, total = ranked
+        above, below = self.rank_index.neighbours(user_id)
+        return {
+            'rank': rank,
+            'total': total,
+            'points': self.rank_index.points[user_id],
+            'percentile': self.rank_index.percentile(user_id),
+            'above': above,
+            'below': below,
+        }
+
+    def _close(self):
+        """
+        Commit pending changes and close the connection. Runs on the worker thread.
+        """
+        if self.conn is not None:
+            # Commit any pending changes
+            self.conn.commit()
+
+            # Close the database connection
+            self.conn.close()
+            self.conn = None
+
+    def _close_readers(self):
+        """
+        Close every reader connection. Must only run once the reader pool has stopped.
+        """
+        with self._reader_conns_lock:
+            for conn in self._reader_conns:
+                conn.close()
+            self._reader_conns.clear()
+
+    async def cog_unload(self):
+        """
+        Perform cleanup when the cog is unloaded.
+
+        This method is called automatically by discord.py when the cog is unloaded.
+        It ensures that buffered point changes are flushed, any pending database
+        changes are committed, the connection is properly closed and the worker
+        thread is stopped to prevent resource leaks.
+
+        Returns:
+            None
+        """
+        self.flush_loop.cancel()
+        self.compact_loop.cancel()
+        self.prune_loop.cancel()
+        try:
+            await self.flush_points()
+        except sqlite3.Error as e:
+            logger.error(f"Error flushing study points on shutdown: {e}")
+        self.reader_executor.shutdown(wait=True)
+        self._close_readers()
+        await self.run(self._close)
+        self.executor.shutdown(wait=True)
 
 
 # Setup function to add the cog to the bot
@@ -169,4 +1656,4 @@ async def setup(bot):
     Returns:
         None
     """
-    await bot.add_cog(Database(bot))  # In discord.py 2.0+, this should be awaited
\ No newline at end of file
+    await bot.add_cog(Database(bot))  # In discord.py 2.0+, this should be awaited
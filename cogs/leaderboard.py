@@ -1,13 +1,125 @@
 """
 Discord bot leaderboard extension.
 This module provides a leaderboard system that retrieves and displays
-the top users based on study points stored in a SQLite database.
+the top users based on study points stored in the shared SQLite database.
 """
 
 import discord
 from discord.ext import commands
 import sqlite3
 import logging
+from utils.user_names import UserNameCache
+
+# Number of users shown per leaderboard page
+LEADERBOARD_PAGE_SIZE = 10
+
+# Maximum number of rendered pages kept before the cache is cleared
+PAGE_CACHE_SIZE = 100
+
+# Time-windowed leaderboards and how they are described
+WINDOW_LABELS = {
+    'daily': "last 24 hours",
+    'weekly': "last 7 days",
+    'monthly': "last 30 days",
+}
+
+
+class LeaderboardView(discord.ui.View):
+    """
+    Previous/next buttons for browsing the leaderboard.
+
+    The view remembers the keyset cursor each visited page started after, so
+    going back reuses a known cursor and going forward continues from the last
+    row of the current page.
+
+    Attributes:
+        cog (Leaderboard): The cog that renders pages.
+        author_id (int): The user who opened the leaderboard; only they can page it.
+        cursors (list): Cursor for each visited page; `cursors[i]` starts page i + 1.
+        page (int): The 1-based page currently shown.
+        message (discord.Message): The leaderboard message, used to disable buttons on timeout.
+    """
+
+    def __init__(self, cog, author_id, next_cursor, timeout=120):
+        """
+        Initialize the view on the first page.
+
+        Args:
+            cog (Leaderboard): The cog that renders pages.
+            author_id (int): The user who opened the leaderboard.
+            next_cursor (tuple): Cursor for the second page.
+            timeout (float, optional): Seconds of inactivity before the buttons stop working.
+        """
+        super().__init__(timeout=timeout)
+        self.cog = cog
+        self.author_id = author_id
+        self.cursors = [None, next_cursor]
+        self.page = 1
+        self.message = None
+        self.previous_page.disabled = True
+
+    async def interaction_check(self, interaction):
+        """
+        Only let the user who opened the leaderboard page through it.
+        """
+        if interaction.user.id != self.author_id:
+            await interaction.response.send_message(
+                "🤠 Run `!leaderboard` yourself to browse, partner!", ephemeral=True)
+            return False
+        return True
+
+    async def show_page(self, interaction, page):
+        """
+        Render a page and swap it into the leaderboard message.
+        """
+        try:
+            embed, last_key, has_next = await self.cog.render_page(page, self.cursors[page - 1])
+        except sqlite3.Error as e:
+            self.cog.logger.error(f"Database error while paging leaderboard: {e}")
+            await interaction.response.send_message(
+                "Sorry, there was an error retrieving the leaderboard. Try again later.", ephemeral=True)
+            return
+
+        if embed is None:
+            await interaction.response.send_message("🤠 That's the end of the trail, partner!", ephemeral=True)
+            return
+
+        self.page = page
+        del self.cursors[page + 1:]
+        if len(self.cursors) == page:
+            self.cursors.append(last_key)
+        else:
+            self.cursors[page] = last_key
+        self.previous_page.disabled = page == 1
+        self.next_page.disabled = not has_next
+        await interaction.response.edit_message(embed=embed, view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction, button):
+        """
+        Go back one page.
+        """
+        await self.show_page(interaction, max(self.page - 1, 1))
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction, button):
+        """
+        Go forward one page.
+        """
+        await self.show_page(interaction, self.page + 1)
+
+    async def on_timeout(self):
+        """
+        Disable the buttons once the view stops listening.
+        """
+        for child in self.children:
+            child.disabled = True
+        if self.message is not None:
+            try:
+                await self.message.edit(view=self)
+            except discord.HTTPException:
+                pass
+
 
 class Leaderboard(commands.Cog):
     """
@@ -19,46 +131,161 @@ class Leaderboard(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
-        conn (sqlite3.Connection): The SQLite database connection.
-        c (sqlite3.Cursor): The database cursor for executing queries.
+        db (Database): The shared Database cog used for all queries.
         logger (logging.Logger): Logger for error reporting.
+        user_names (UserNameCache): Cache of resolved user names shared by all invocations.
+        page_cache (dict): Rendered pages keyed by `(page, cursor)`, valid for `page_cache_version`.
+        page_cache_version (int): The Database cog's `points_version` the cached pages were built from.
     """
 
     def __init__(self, bot):
         """
-        Initialize the Leaderboard cog and establish a database connection.
+        Initialize the Leaderboard cog.
 
         Args:
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
-        self.conn = sqlite3.connect('study_points.db')
-        self.c = self.conn.cursor()
+        self.db = bot.get_cog("Database")
         self.logger = logging.getLogger(__name__)
+        self.user_names = UserNameCache(bot)
+        self.page_cache = {}
+        self.page_cache_version = -1
 
-    def cog_unload(self):
+    async def add_rows(self, embed, results, start=1):
         """
-        Perform cleanup when the cog is unloaded.
+        Add one field per leaderboard row to an embed, resolving all user names at once.
 
-        Ensures that pending changes to the database are saved and
-        the connection is properly closed to prevent resource leaks.
+        Args:
+            embed (discord.Embed): The embed to add fields to.
+            results (list): `(user_id, points)` rows in display order.
+            start (int, optional): Rank number of the first row. Defaults to 1.
 
         Returns:
             None
         """
-        self.conn.commit()
-        self.conn.close()
+        # Resolve all names at once: cached or gateway-known users are free,
+        # the rest are fetched concurrently
+        names = await self.user_names.resolve_many(user_id for user_id, _ in results)
+
+        # Add each user to the leaderboard embed
+        for i, (user_id, points) in enumerate(results, start=start):
+            if user_id not in names:
+                # The fetch failed for a reason other than the user not existing
+                label = "Error fetching user"
+            elif names[user_id] is None:
+                # If the user can't be found (e.g. left server), show as unknown
+                label = "Unknown User"
+            else:
+                label = names[user_id]
+
+            embed.add_field(
+                name=f"{i}. {label}",
+                value=f"{points} points",
+                inline=False
+            )
 
-    @commands.command(help="Show the leaderboard of top study point earners.")
-    async def leaderboard(self, ctx):
+    async def render_page(self, page, after=None):
         """
-        Display the top 10 users with the highest study points.
+        Build the embed for one leaderboard page, reusing a cached copy when possible.
 
-        Fetches and formats user ranking from the database, and sends
-        a styled embed message listing the top 10 users and their points.
+        Rendered pages are cached by page number and keyset cursor until the next
+        point change, so paging back and forth doesn't hit the database or the
+        Discord API again.
+
+        Args:
+            page (int): The 1-based page number, used for titles and rank numbers.
+            after (tuple, optional): `(points, user_id)` of the last row on the previous page.
+
+        Returns:
+            tuple: `(embed, last_key, has_next)`, where embed is None for an empty page and
+                   last_key is the cursor for the next page.
+
+        Raises:
+            sqlite3.Error: If the page can't be loaded.
+        """
+        version = self.db.points_version
+
+        # Any point change, buffered or committed, invalidates every rendered page
+        if self.page_cache_version != version or len(self.page_cache) > PAGE_CACHE_SIZE:
+            self.page_cache.clear()
+            self.page_cache_version = version
+
+        key = (page, after)
+        if key in self.page_cache:
+            return self.page_cache[key]
+
+        # Fetch one extra row to learn whether there is a next page
+        rows = await self.db.get_leaderboard_page(after, LEADERBOARD_PAGE_SIZE + 1)
+        has_next = len(rows) > LEADERBOARD_PAGE_SIZE
+        results = rows[:LEADERBOARD_PAGE_SIZE]
+        if not results:
+            return None, after, False
+
+        # Create the embed that will display the leaderboard
+        start = (page - 1) * LEADERBOARD_PAGE_SIZE + 1
+        embed = discord.Embed(
+            title="🏆 Study Leaderboard",
+            description=(f"Here are the top {LEADERBOARD_PAGE_SIZE} study point earners:" if page == 1
+                         else f"Study point earners #{start}–#{start + len(results) - 1}:"),
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text=f"Page {page} • Keep studying hard to climb the leaderboard!")
+        embed.set_thumbnail(url="https://example.com/leaderboard-icon.png")  # Replace with actual image if available
+        await self.add_rows(embed, results, start)
+
+        last_user_id, last_points = results[-1]
+        rendered = (embed, (last_points, last_user_id), has_next)
+
+        # Only cache pages rendered against the current data
+        if self.db.points_version == version:
+            self.page_cache[key] = rendered
+        return rendered
+
+    async def send_window(self, ctx, window):
+        """
+        Send the top earners of a recent time window (daily, weekly or monthly).
 
         Args:
             ctx (commands.Context): The context in which the command was called.
+            window (str): One of "daily", "weekly" or "monthly".
+
+        Returns:
+            None
+
+        Raises:
+            sqlite3.Error: If the rollups can't be read.
+        """
+        results = await self.db.get_window_top(window, LEADERBOARD_PAGE_SIZE)
+        if not results:
+            await ctx.send(f"No study points have been earned in the {WINDOW_LABELS[window]} yet!")
+            return
+
+        embed = discord.Embed(
+            title=f"🏆 {window.capitalize()} Study Leaderboard",
+            description=f"Top study point earners in the {WINDOW_LABELS[window]}:",
+            color=discord.Color.gold()
+        )
+        embed.set_footer(text="Keep studying hard to climb the leaderboard!")
+        embed.set_thumbnail(url="https://example.com/leaderboard-icon.png")  # Replace with actual image if available
+        await self.add_rows(embed, results)
+        await ctx.send(embed=embed)
+
+    @commands.command(help="Show the leaderboard of top study point earners (all-time, daily, weekly or monthly).")
+    async def leaderboard(self, ctx, period: str = ""):
+        """
+        Display the study point leaderboard, 10 users per page.
+
+        Without a period, sends a styled embed listing the all-time top 10 users
+        with buttons to browse further pages. Pages are fetched with keyset
+        pagination, so later pages are as cheap as the first.
+
+        With `daily`, `weekly` or `monthly`, shows who earned the most points in
+        that window, computed from pre-aggregated rollup buckets.
+
+        Args:
+            ctx (commands.Context): The context in which the command was called.
+            period (str, optional): "daily", "weekly" or "monthly". Defaults to all-time.
 
         Returns:
             None
@@ -67,58 +294,87 @@ class Leaderboard(commands.Cog):
             - Catches database errors and reports them to the logger.
             - Handles missing or unresolvable user IDs.
         """
+        period = period.lower()
+        if period and period not in WINDOW_LABELS:
+            await ctx.send("🤠 Pick `daily`, `weekly` or `monthly`, partner (or nothing for all-time).")
+            return
+
         try:
-            # Retrieve the top 10 users from the study_points table
-            self.c.execute('SELECT user_id, points FROM study_points ORDER BY points DESC LIMIT 10')
-            results = self.c.fetchall()
+            if period:
+                await self.send_window(ctx, period)
+                return
+
+            embed, last_key, has_next = await self.render_page(1)
 
             # If no results were found, notify the user
-            if not results:
+            if embed is None:
                 await ctx.send("No study points have been earned yet!")
                 return
 
-            # Create the embed that will display the leaderboard
-            embed = discord.Embed(
-                title="🏆 Study Leaderboard",
-                description="Here are the top 10 study point earners:",
-                color=discord.Color.gold()
-            )
-            embed.set_footer(text="Keep studying hard to climb the leaderboard!")
-            embed.set_thumbnail(url="https://example.com/leaderboard-icon.png")  # Replace with actual image if available
-
-            # Add each user to the leaderboard embed
-            for i, (user_id, points) in enumerate(results, start=1):
-                try:
-                    user = await self.bot.fetch_user(user_id)
-                    embed.add_field(
-                        name=f"{i}. {user.name}",
-                        value=f"{points} points",
-                        inline=False
-                    )
-                except discord.NotFound:
-                    # If the user can't be found (e.g. left server), show as unknown
-                    embed.add_field(
-                        name=f"{i}. Unknown User",
-                        value=f"{points} points",
-                        inline=False
-                    )
-                except Exception as e:
-                    # Log any unexpected user fetch errors
-                    self.logger.error(f"Error while fetching user data: {e}")
-                    embed.add_field(
-                        name=f"{i}. Error fetching user",
-                        value=f"{points} points",
-                        inline=False
-                    )
-
-            # Send the formatted leaderboard to the channel
-            await ctx.send(embed=embed)
+            # Send the formatted leaderboard to the channel, with paging buttons if there's more
+            if not has_next:
+                await ctx.send(embed=embed)
+                return
+
+            view = LeaderboardView(self, ctx.author.id, last_key)
+            view.message = await ctx.send(embed=embed, view=view)
 
         except sqlite3.Error as e:
             # Log and report any database access issues
             self.logger.error(f"Database error while fetching leaderboard: {e}")
             await ctx.send("Sorry, there was an error retrieving the leaderboard. Try again later.")
 
+    @commands.command(help="Show your (or another user's) rank on the study leaderboard.")
+    async def rank(self, ctx, user: commands.UserConverter = None):
+        """
+        Display a user's leaderboard rank, percentile and closest rivals.
+
+        The rank is answered from the Database cog's in-memory rank index, so it
+        costs O(log n) no matter how many users have points.
+
+        Args:
+            ctx (commands.Context): The context in which the command was called.
+            user (discord.User, optional): The user to rank. Defaults to the caller.
+
+        Returns:
+            None
+
+        Error Handling:
+            - Catches database errors and reports them to the logger.
+        """
+        user = user or ctx.author
+        try:
+            standing = await self.db.get_rank(user.id)
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error while fetching rank: {e}")
+            await ctx.send("Sorry, there was an error retrieving the rank. Try again later.")
+            return
+
+        if standing is None:
+            await ctx.send(f"🤠 {user.name} ain't earned any points yet, partner!")
+            return
+
+        embed = discord.Embed(
+            title=f"📈 Rank for {user.name}",
+            description=(f"**#{standing['rank']}** of {standing['total']} with {standing['points']} points\n"
+                         f"Ahead of {standing['percentile']:.1f}% of studiers"),
+            color=discord.Color.gold()
+        )
+
+        # Name the closest rivals on either side
+        rivals = [r for r in (standing['above'], standing['below']) if r is not None]
+        names = await self.user_names.resolve_many(user_id for user_id, _ in rivals)
+        for label, rival in (("Next up", standing['above']), ("Right behind", standing['below'])):
+            if rival is not None:
+                rival_id, rival_points = rival
+                embed.add_field(
+                    name=label,
+                    value=f"{names.get(rival_id) or 'Unknown User'} — {rival_points} points",
+                    inline=False
+                )
+
+        await ctx.send(embed=embed)
+
 # Setup function to load the cog
 async def setup(bot):
     """
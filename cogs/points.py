@@ -5,7 +5,6 @@ stored in a local SQLite database. Admins or authorized users can assign
 points to members, encouraging participation and engagement.
 """
 
-import sqlite3
 import logging
 from discord.ext import commands
 
@@ -19,45 +18,22 @@ class Points(commands.Cog):
 
     This cog handles assigning points to users and allowing users
     to check their current point totals. All point data is stored
-    and retrieved using a SQLite database.
+    and retrieved through the shared Database cog.
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
-        conn (sqlite3.Connection): The SQLite database connection.
-        cursor (sqlite3.Cursor): The database cursor for executing queries.
+        db (Database): The shared Database cog used for all queries.
     """
 
     def __init__(self, bot):
         """
-        Initialize the Points cog and establish a database connection.
+        Initialize the Points cog.
 
         Args:
             bot (commands.Bot): The Discord bot instance this cog is attached to.
         """
         self.bot = bot
-        self.conn = sqlite3.connect('study_points.db')
-        self.cursor = self.conn.cursor()
-
-    def execute_query(self, query, params):
-        """
-        Execute a database query with parameters and handle errors.
-
-        Commits the transaction after successful execution. Rolls back and logs
-        the error if an exception occurs.
-
-        Args:
-            query (str): The SQL query string to execute.
-            params (tuple): Parameters to bind to the SQL query.
-
-        Raises:
-            sqlite3.Error: Re-raises the exception after logging it.
-        """
-        try:
-            self.cursor.execute(query, params)
-            self.conn.commit()
-        except sqlite3.Error as e:
-            logger.error(f"Database error: {e}")
-            raise
+        self.db = bot.get_cog("Database")
 
     @commands.command(help="Add study points to a user.")
     async def addpoints(self, ctx, user: commands.UserConverter, points: int):
@@ -86,12 +62,8 @@ class Points(commands.Cog):
 
             user_id = user.id
 
-            # Insert or update the user's points
-            query = '''INSERT INTO study_points (user_id, points) 
-                       VALUES (?, ?) 
-                       ON CONFLICT(user_id) 
-                       DO UPDATE SET points = points + ?'''
-            self.execute_query(query, (user_id, points, points))
+            # Buffer the award; the Database cog writes it with the next batched flush
+            await self.db.add_points(user_id, points, 'addpoints')
 
             await ctx.send(f"🤠 Added {points} points to user {user.name} ({user_id}).")
 
@@ -120,15 +92,12 @@ class Points(commands.Cog):
         try:
             user_id = ctx.author.id
 
-            # Retrieve the points from the database
-            query = '''SELECT points FROM study_points WHERE user_id = ?'''
-            self.cursor.execute(query, (user_id,))
-            result = self.cursor.fetchone()
+            # Retrieve the points, including any award that hasn't been flushed yet
+            points = await self.db.get_points(user_id)
 
-            if result is None:
+            if points is None:
                 await ctx.send("🤠 Looks like you ain't got no points yet, partner!")
             else:
-                points = result[0]
                 await ctx.send(f"🤠 You currently have {points} points, partner!")
 
         except Exception as e:
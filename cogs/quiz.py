@@ -6,11 +6,20 @@ such as leaderboards or point tracking.
 """
 
 import discord
-from discord.ext import commands
+from discord.ext import commands, tasks
 import asyncio
+import os
 import sqlite3
 import logging
 from utils.generate_quiz import generate_quiz  # Custom quiz generation logic
+from utils.llm_client import BACKGROUND
+from utils.quiz_cache import QuizCache
+from utils.question_bank import QuestionBank
+from utils.warm_pool import WarmPool
+from utils.reply_router import replies, PromptCancelled
+
+# Seconds between warm pool refill attempts (each attempt generates at most one quiz)
+QUIZ_WARM_INTERVAL = float(os.getenv('QUIZ_WARM_INTERVAL', '30'))
 
 
 class Quiz(commands.Cog):
@@ -23,33 +32,113 @@ class Quiz(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
-        conn (sqlite3.Connection): The database connection for storing quiz scores.
-        c (sqlite3.Cursor): Cursor for executing database operations.
+        db (Database): The shared Database cog used for storing quiz scores.
         logger (logging.Logger): Logger for tracking errors and debug info.
         ongoing_quizzes (dict): Tracks users with active quizzes to prevent overlap.
+        quiz_cache (QuizCache): Generated quizzes per topic, so repeat topics skip the API.
+        question_bank (QuestionBank): Every stored question, searched by topic to build quizzes.
+        warm_pool (WarmPool): Ready-made quizzes for the most requested topics.
+        active_generations (int): Quiz generations users are currently waiting on.
     """
 
     def __init__(self, bot):
         """
-        Initialize the Quiz cog, open the database connection, and set up logging.
+        Initialize the Quiz cog and set up logging.
 
         Args:
             bot (commands.Bot): The bot instance this cog is attached to.
         """
         self.bot = bot
-        self.conn = sqlite3.connect('study_points.db')
-        self.c = self.conn.cursor()
+        self.db = bot.get_cog("Database")
         self.logger = logging.getLogger(__name__)
         self.ongoing_quizzes = {}  # Prevent users from taking multiple quizzes simultaneously
+        self.quiz_cache = QuizCache(self.db)
+        self.question_bank = QuestionBank(self.db)
+        self.warm_pool = WarmPool()
+        self.active_generations = 0
+
+    async def cog_load(self):
+        """
+        Start refilling the warm pool in the background.
+        """
+        self.refill_warm_pool.start()
+
+    async def cog_unload(self):
+        """
+        Stop the warm pool refill task and call off every quiz still waiting for an answer.
+        """
+        self.refill_warm_pool.cancel()
+        replies.cancel_all(owner=self)
+
+    @tasks.loop(seconds=QUIZ_WARM_INTERVAL)
+    async def refill_warm_pool(self):
+        """
+        Generate one quiz for the most popular topic that is short of ready-made quizzes.
+
+        Runs only while no user is waiting on a quiz generation, and only while the
+        warm pool's hourly API budget lasts. Refills run at background priority, so
+        the LLM scheduler always serves user commands first.
+        """
+        if self.active_generations:
+            return
+
+        topic = self.warm_pool.next_topic()
+        if topic is None:
+            return
+
+        quiz_questions = await generate_quiz(topic, priority=BACKGROUND)
+        if quiz_questions:
+            self.warm_pool.put(topic, quiz_questions)
 
-    def cog_unload(self):
+    async def get_quiz(self, topic, user_id):
         """
-        Clean up the cog by committing and closing the database connection.
+        Return quiz questions for a topic, calling the API only as a last resort.
 
-        Called automatically when the cog is unloaded.
+        Quizzes are built from unseen question bank matches first, then from the quiz
+        cache. Otherwise a ready-made quiz is taken from the warm pool, or a new one is
+        generated, and it is added to the bank and stored as another cached variant of
+        the topic. The bank goes first on purpose: unseen questions beat a replayed
+        quiz, so the cache only serves users who have used up a topic's bank matches.
+        Bank and cache errors are logged and treated as a miss, so a database problem
+        never stops a quiz.
+
+        Args:
+            topic (str): The topic on which to generate the quiz.
+            user_id (int): The user taking the quiz.
+
+        Returns:
+            list or None: The quiz questions, or None if no quiz could be generated.
         """
-        self.conn.commit()
-        self.conn.close()
+        try:
+            quiz_questions = await self.question_bank.sample(topic, user_id)
+            if quiz_questions is not None:
+                return quiz_questions
+        except sqlite3.Error as e:
+            self.logger.error(f"Error sampling question bank for topic '{topic}': {e}")
+
+        try:
+            quiz_questions = await self.quiz_cache.get(topic, user_id)
+            if quiz_questions is not None:
+                return quiz_questions
+        except sqlite3.Error as e:
+            self.logger.error(f"Error reading cached quiz for topic '{topic}': {e}")
+
+        quiz_questions = self.warm_pool.take(topic)
+        if quiz_questions is None:
+            self.active_generations += 1
+            try:
+                quiz_questions = await generate_quiz(topic)
+            finally:
+                self.active_generations -= 1
+
+        if quiz_questions:
+            try:
+                question_ids = await self.question_bank.add(topic, quiz_questions, 'generated')
+                await self.question_bank.mark_seen(user_id, question_ids)
+                await self.quiz_cache.put(topic, quiz_questions, user_id)
+            except sqlite3.Error as e:
+                self.logger.error(f"Error caching quiz for topic '{topic}': {e}")
+        return quiz_questions
 
     @commands.command(help="Take a multiple-choice quiz on a topic of your choice.")
     async def quiz(self, ctx, *, topic: str, timeout: int = 30):
@@ -73,10 +162,11 @@ class Quiz(commands.Cog):
             return
 
         self.ongoing_quizzes[ctx.author.id] = True
+        self.warm_pool.record(topic)
         await ctx.send(f"Alright, {ctx.author.mention}, let’s quiz you on **{topic}**!")
 
         try:
-            quiz_questions = generate_quiz(topic)
+            quiz_questions = await self.get_quiz(topic, ctx.author.id)
         except Exception as e:
             self.logger.error(f"Error generating quiz for topic '{topic}': {e}")
             await ctx.send("Sorry, I couldn’t generate a quiz. Try again later.")
@@ -105,11 +195,12 @@ class Quiz(commands.Cog):
             await ctx.send(embed=embed)
 
             def check(m):
-                return m.author == ctx.author and m.content.upper() in choices.keys()
+                return m.content.upper() in choices.keys()
 
             try:
-                # Wait for the user's answer or timeout
-                msg = await self.bot.wait_for("message", check=check, timeout=timeout)
+                # Wait for the user's answer in this channel or timeout
+                msg = await replies.wait_for_reply(ctx.channel.id, ctx.author.id, check=check,
+                                                   timeout=timeout, owner=self)
                 if msg.content.upper() == answer:
                     score += 1
                     await ctx.send("✅ Correct!")
@@ -117,6 +208,10 @@ class Quiz(commands.Cog):
                     await ctx.send(f"❌ Wrong! The correct answer was **{answer}**.")
             except asyncio.TimeoutError:
                 await ctx.send(f"⏰ Time's up! The correct answer was **{answer}**.")
+            except PromptCancelled:
+                # e.g. the user opened another prompt (like the shop) in this channel, or the bot is shutting down
+                await ctx.send("🤠 Quiz called off, partner. You keep the points you've earned so far.")
+                break
 
         # Final score summary
         embed = discord.Embed(
@@ -128,14 +223,8 @@ class Quiz(commands.Cog):
 
         try:
             # Update the user's score in the database
-            self.c.execute(
-                '''
-                INSERT OR REPLACE INTO study_points (user_id, points)
-                VALUES (?, COALESCE((SELECT points FROM study_points WHERE user_id = ?), 0) + ?)
-                ''',
-                (ctx.author.id, ctx.author.id, score)
-            )
-            self.conn.commit()
+            # Buffered by the Database cog and written with its next batched flush
+            await self.db.add_points(ctx.author.id, score, 'quiz')
         except sqlite3.Error as e:
             self.logger.error(f"Database error while updating study points: {e}")
             await ctx.send("Sorry, there was an error saving your quiz points. Try again later.")
@@ -6,9 +6,10 @@ on rewards like nickname color changes, roles, emoji perks, and XP boosts.
 
 import discord
 from discord.ext import commands
-import sqlite3
 import asyncio
+from utils.reply_router import replies, PromptCancelled
 from utils.shop_items import (
+    SHOP_ITEMS,
     change_nickname_color,
     assign_special_role,
     unlock_animated_emoji,
@@ -22,37 +23,24 @@ class Shop(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The Discord bot instance.
-        conn (sqlite3.Connection): SQLite database connection.
-        cursor (sqlite3.Cursor): Cursor for executing SQL queries.
+        db (Database): The shared Database cog used for all queries.
     """
 
     def __init__(self, bot):
         """
-        Initialize the Shop cog with a database connection and reference to the bot.
+        Initialize the Shop cog with a reference to the bot and the shared database.
 
         Args:
             bot (commands.Bot): The bot instance this cog is attached to.
         """
         self.bot = bot
-        self.conn = sqlite3.connect('study_points.db')
-        self.cursor = self.conn.cursor()
+        self.db = bot.get_cog("Database")
 
-    def execute_query(self, query, params):
+    async def cog_unload(self):
         """
-        Execute a SQL query with parameters and commit the transaction.
-
-        Args:
-            query (str): The SQL query to execute.
-            params (tuple): The parameters to safely insert into the query.
-
-        Raises:
-            Exception: If a database error occurs.
+        Close every shop menu still waiting for a choice.
         """
-        try:
-            self.cursor.execute(query, params)
-            self.conn.commit()
-        except sqlite3.Error as e:
-            raise Exception(f"Database error: {e}")
+        replies.cancel_all(owner=self)
 
     @commands.command(help="Open the shop to purchase items using points.")
     async def shop(self, ctx):
@@ -69,13 +57,10 @@ class Shop(commands.Cog):
         Returns:
             None
         """
-        # Define shop items and their costs
-        items = {
-            'Change Nickname Color': 50,
-            'Assign Special Role': 100,
-            'Unlock Animated Emoji': 75,
-            'XP Boost': 150
-        }
+        # Look up this server's prices from the cached settings (defaults come from SHOP_ITEMS)
+        guild_id = ctx.guild and ctx.guild.id
+        items = {item: self.db.settings.shop_price(guild_id, item, default)
+                 for item, default in SHOP_ITEMS.items()}
 
         # Create and send an embed with shop items
         embed = discord.Embed(
@@ -90,11 +75,12 @@ class Shop(commands.Cog):
         await ctx.send("🤠 Pick an item by typing the corresponding number.")
 
         def check(m):
-            return m.author == ctx.author and m.channel == ctx.channel and m.content.isdigit()
+            return m.content.isdigit()
 
         try:
-            # Wait for user input (item selection)
-            msg = await self.bot.wait_for('message', check=check, timeout=60)
+            # Wait for user input (item selection) from this user in this channel
+            msg = await replies.wait_for_reply(ctx.channel.id, ctx.author.id, check=check,
+                                               timeout=60, owner=self)
             choice = int(msg.content)
 
             if choice < 1 or choice > len(items):
@@ -104,22 +90,12 @@ class Shop(commands.Cog):
             item_name = list(items.keys())[choice - 1]
             price = items[item_name]
 
-            # Check user's available points
+            # Check user's available points and deduct the price in one step
             user_id = ctx.author.id
-            query = '''SELECT points FROM study_points WHERE user_id = ?'''
-            self.cursor.execute(query, (user_id,))
-            result = self.cursor.fetchone()
-
-            if result is None or result[0] < price:
+            if not await self.db.spend_points(user_id, price, 'shop'):
                 await ctx.send("🤠 You don't have enough points for this item!")
                 return
 
-            # Deduct the price from user's points
-            self.execute_query(
-                '''UPDATE study_points SET points = points - ? WHERE user_id = ?''',
-                (price, user_id)
-            )
-
             # Handle each shop item purchase
             if item_name == 'Change Nickname Color':
                 await ctx.send("🤠 You can choose a color for your nickname! Here's a list of options:")
@@ -132,10 +108,7 @@ class Shop(commands.Cog):
                 ])
                 await ctx.send(f"Available colors:\n{color_list}\n\nOr type the color name directly (e.g., Tomato).")
 
-                def color_check(m):
-                    return m.author == ctx.author and m.channel == ctx.channel
-
-                msg = await self.bot.wait_for('message', check=color_check, timeout=60)
+                msg = await replies.wait_for_reply(ctx.channel.id, ctx.author.id, timeout=60, owner=self)
                 selected_color = msg.content.strip()
 
                 valid_colors = ["Tomato", "OrangeRed", "LimeGreen", "SteelBlue", "BlueViolet"]
@@ -158,6 +131,8 @@ class Shop(commands.Cog):
 
         except asyncio.TimeoutError:
             await ctx.send("🤠 You took too long to make a choice, partner!")
+        except PromptCancelled:
+            await ctx.send("🤠 Shop's closed for this order, partner.")
         except Exception as e:
             await ctx.send(f"🤠 Something went wrong: {e}")
 
@@ -3,20 +3,69 @@
 
 This module defines a StudyTimer cog for a Discord bot, allowing users to track study sessions
 and earn points based on the time they spend studying. Users can start and stop study timers,
-and their points are stored in a SQLite database. This module includes cooldown logic to prevent
+and their points are stored in the shared SQLite database owned by the Database cog. This module includes cooldown logic to prevent
 users from starting multiple sessions too quickly.
 
+Every user can have their own session running at the same time. Sessions are held by a
+`SessionManager`, whose single background task closes sessions that reach the maximum
+length and awards their (capped) points, without any per-session task or polling.
+
+Time spent in study voice channels (chosen by admins with `!studyhall`) is tracked without any
+command. Who is in which channel is kept in memory from `on_voice_state_update`, and one tick
+per minute awards a point per new minute to everyone present as a single batch, written by one
+flush of the Database cog. A voice stay is recorded as a study session when the user joins, and
+closed when they leave or the cog unloads. Voice stays left open by a crash are closed at startup
+at their last award. Voice points are uncapped unless VOICE_POINTS_CAP is set.
+
+Session starts and stops are also recorded in the `study_sessions` table, in batches with the
+Database cog's point flush. Sessions still open when the bot stopped are reloaded with one query
+at startup, so a restart doesn't cost anyone their running session. `!studystats` reads
+per-user aggregates that the Database cog updates as each session closes.
+
 Dependencies:
 - discord.py
-- sqlite3
 - logging
 """
 
 import discord
-from discord.ext import commands
-import time
-import sqlite3
+from discord.ext import commands, tasks
+import os
 import logging
+import sqlite3
+import time
+from utils.cooldowns import cooldown
+from utils.study_sessions import SessionManager, VoiceSession
+
+# Default seconds between study session starts per user (admins can override it per guild)
+STUDY_COOLDOWN = 60
+
+# Longest a study session runs before it is closed automatically, and the most points one can earn
+STUDY_MAX_SECONDS = float(os.getenv('STUDY_MAX_SECONDS', '3600'))
+STUDY_POINTS_CAP = int(os.getenv('STUDY_POINTS_CAP', '60'))
+
+# Seconds between point awards to everyone in a study voice channel
+VOICE_TICK_INTERVAL = 60
+
+# Most points one stay in a study voice channel can earn (0 means no cap)
+VOICE_POINTS_CAP = int(os.getenv('VOICE_POINTS_CAP', '0'))
+
+# Weekday labels for !studystats, Monday first
+WEEKDAYS = ("Mon", "Tue", "Wed", "Thu", "Fri", "Sat", "Sun")
+
+
+def session_points(seconds):
+    """
+    Return the points earned for studying `seconds`: one per full minute, capped.
+    """
+    return min(int(seconds // 60), STUDY_POINTS_CAP)
+
+
+def format_duration(seconds):
+    """
+    Return a study duration as hours and minutes, e.g. "2h 05m" or "45m".
+    """
+    hours, minutes = divmod(int(seconds // 60), 60)
+    return f"{hours}h {minutes:02d}m" if hours else f"{minutes}m"
 
 
 class StudyTimer(commands.Cog):
@@ -25,12 +74,10 @@ class StudyTimer(commands.Cog):
 
     Attributes:
         bot (commands.Bot): The bot instance.
-        study_timer_start (float or None): The start time of the current study session (in seconds since epoch).
-        study_timer_user (int or None): The user ID of the person currently studying.
-        conn (sqlite3.Connection): The connection object to the SQLite database.
-        c (sqlite3.Cursor): The cursor object for interacting with the database.
+        db (Database): The shared Database cog used for all queries.
         logger (logging.Logger): Logger for error handling and debugging.
-        user_last_study (dict): A dictionary that tracks the last study session time for each user.
+        sessions (SessionManager): Every user's active study session.
+        voice (dict): Maps user_id to their VoiceSession while they sit in a study voice channel.
     """
 
     def __init__(self, bot):
@@ -41,22 +88,231 @@ class StudyTimer(commands.Cog):
             bot (commands.Bot): The bot instance to associate with this cog.
         """
         self.bot = bot
-        self.study_timer_start = None
-        self.study_timer_user = None
-        self.conn = sqlite3.connect('study_points.db')
-        self.c = self.conn.cursor()
+        self.db = bot.get_cog("Database")
         self.logger = logging.getLogger(__name__)
-        self.user_last_study = {}
+        self.sessions = SessionManager(STUDY_MAX_SECONDS, self.close_expired)
+        self.voice = {}
+
+    async def cog_load(self):
+        """
+        Reload the study sessions that were open when the bot stopped, then start the task
+        that closes expired ones. Sessions that ran out while the bot was down close right away.
+        """
+        try:
+            # Voice stays can't be resumed; whoever is still in voice starts a new one on ready
+            await self.db.close_stale_sessions('voice', 'voice_study')
+            open_sessions = await self.db.get_open_sessions()
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error while reloading study sessions: {e}")
+            open_sessions = []
+
+        open_sessions = [session for session in open_sessions if session[2] == 'command']
+        for user_id, channel_id, _, started_at in open_sessions:
+            self.sessions.start(user_id, channel_id, started_at=started_at)
+        if open_sessions:
+            self.logger.info(f"Reloaded {len(open_sessions)} open study session(s).")
+
+        self.sessions.begin()
+        self.voice_tick.start()
+
+        if self.bot.is_ready():
+            await self.sync_voice()
 
-    def cog_unload(self):
+    async def cog_unload(self):
         """
-        Closes the SQLite connection when the cog is unloaded.
-        This ensures any changes are saved to the database before the cog is removed.
+        Stop the expiry task and the voice tick, and close every voice stay.
+        Command sessions stay open and are reloaded on the next start.
         """
-        self.conn.commit()
-        self.conn.close()
+        self.sessions.close()
+        self.voice_tick.cancel()
+        for user_id in list(self.voice):
+            await self.leave_voice(user_id)
 
-    def get_points(self, user_id):
+    def is_study_channel(self, channel):
+        """
+        Return whether a voice channel is a study channel.
+
+        Parameters:
+            channel (discord.abc.GuildChannel or None): The channel to check.
+
+        Returns:
+            bool: True if admins chose the channel for automatic study tracking.
+        """
+        return channel is not None and channel.id in self.db.settings.study_channels(channel.guild.id)
+
+    async def join_voice(self, member, channel, now=None):
+        """
+        Start tracking a member who joined a study voice channel, and record the stay's start.
+
+        Parameters:
+            member (discord.Member): The member who joined.
+            channel (discord.VoiceChannel): The study channel.
+            now (float, optional): Unix time they joined. Defaults to now.
+        """
+        now = time.time() if now is None else now
+        self.voice[member.id] = VoiceSession(member.id, channel.guild.id, channel.id, now)
+        await self.db.record_session_start(member.id, now, channel.id, 'voice')
+
+    async def leave_voice(self, user_id, now=None):
+        """
+        Stop tracking a member, award their last whole minutes and record the end of the stay.
+
+        Parameters:
+            user_id (int): The member who left.
+            now (float, optional): Unix time they left. Defaults to now.
+        """
+        session = self.voice.pop(user_id, None)
+        if session is None:
+            return
+
+        now = time.time() if now is None else now
+        points = self.voice_points(session, session.new_minutes(now))
+        if points:
+            await self.db.add_points(user_id, points, 'voice_study')
+        await self.db.record_session_end(user_id, session.started_at, now, session.points)
+
+    def voice_points(self, session, minutes):
+        """
+        Award a voice session its points for newly credited minutes: one per minute,
+        up to VOICE_POINTS_CAP per stay if that is set.
+
+        Minutes spent while the user also runs `!startstudy` earn nothing here, so nobody earns twice.
+
+        Parameters:
+            session (VoiceSession): The voice stay to credit.
+            minutes (int): Whole minutes newly credited.
+
+        Returns:
+            int: The points to award now.
+        """
+        if session.user_id in self.sessions:
+            return 0
+        points = minutes
+        if VOICE_POINTS_CAP:
+            points = max(0, min(points, VOICE_POINTS_CAP - session.points))
+        session.points += points
+        return points
+
+    async def sync_voice(self):
+        """
+        Reconcile voice tracking with who is actually in study channels, e.g. after
+        startup or a reconnect, when voice updates may have been missed.
+        """
+        present = {}
+        for guild in self.bot.guilds:
+            for channel_id in self.db.settings.study_channels(guild.id):
+                channel = guild.get_channel(channel_id)
+                for member in getattr(channel, 'members', ()):
+                    if not member.bot:
+                        present[member.id] = (member, channel)
+
+        for user_id in [user_id for user_id in self.voice if user_id not in present]:
+            await self.leave_voice(user_id)
+        for user_id, (member, channel) in present.items():
+            session = self.voice.get(user_id)
+            if session is None:
+                await self.join_voice(member, channel)
+            else:
+                session.channel_id = channel.id
+
+    @commands.Cog.listener()
+    async def on_ready(self):
+        """
+        Pick up everyone already sitting in study channels.
+        """
+        await self.sync_voice()
+
+    @commands.Cog.listener()
+    async def on_voice_state_update(self, member, before, after):
+        """
+        Start or stop tracking a member as they move in and out of study voice channels.
+
+        Moving between two study channels of the same guild keeps the session going.
+        Mute and deafen changes are ignored.
+        """
+        if member.bot or before.channel == after.channel:
+            return
+
+        session = self.voice.get(member.id)
+        if self.is_study_channel(after.channel):
+            if session is not None and session.guild_id == after.channel.guild.id:
+                session.channel_id = after.channel.id
+                return
+            await self.leave_voice(member.id)
+            await self.join_voice(member, after.channel)
+        elif session is not None:
+            await self.leave_voice(member.id)
+
+    @tasks.loop(seconds=VOICE_TICK_INTERVAL)
+    async def voice_tick(self):
+        """
+        Award everyone in a study voice channel their new minutes, as one batch.
+
+        All awards go into the point buffer together and are written by one flush, in one
+        transaction. Members of channels that are no longer study channels are stopped.
+        """
+        now = time.time()
+        awards = {}
+        study_channels = {}
+        stale = []
+        for session in self.voice.values():
+            if session.guild_id not in study_channels:
+                study_channels[session.guild_id] = self.db.settings.study_channels(session.guild_id)
+            if session.channel_id not in study_channels[session.guild_id]:
+                stale.append(session.user_id)
+                continue
+
+            points = self.voice_points(session, session.new_minutes(now))
+            if points:
+                awards[session.user_id] = points
+
+        if awards:
+            await self.db.add_points_many(awards, 'voice_study')
+            self.db.schedule_flush()
+        for user_id in stale:
+            await self.leave_voice(user_id, now)
+
+    async def close_expired(self, sessions):
+        """
+        Award points for study sessions that reached the maximum length and let their users know.
+
+        Called by the session manager with every session that expired at the same time.
+
+        Parameters:
+            sessions (list): The expired StudySession records.
+        """
+        # Award everyone first, so a failed notice can't cost anybody their points
+        for session in sessions:
+            await self.end_session(session)
+
+        for session in sessions:
+            channel = self.bot.get_channel(session.channel_id) if session.channel_id else None
+            if channel is None:
+                continue
+            minutes = int(session.elapsed() // 60)
+            try:
+                await channel.send(f"🤠 <@{session.user_id}>, your study session wrapped up automatically "
+                                   f"after {minutes} minutes. You earned {session_points(session.elapsed())} points!")
+            except discord.HTTPException as e:
+                self.logger.error(f"Couldn't send study session notice to channel {session.channel_id}: {e}")
+
+    async def end_session(self, session):
+        """
+        Award the points for a finished session and record its end.
+
+        Parameters:
+            session (StudySession): The session that just stopped or expired.
+
+        Returns:
+            int: The points awarded.
+        """
+        ended_at = min(time.time(), session.expires_at)
+        points = session_points(session.elapsed(ended_at))
+        await self.update_points(session.user_id, points)
+        await self.db.record_session_end(session.user_id, session.started_at, ended_at, points)
+        return points
+
+    async def get_points(self, user_id):
         """
         Retrieves the current study points for a given user from the database.
 
@@ -64,49 +320,39 @@ class StudyTimer(commands.Cog):
             user_id (int): The user ID to query for points.
 
         Returns:
-            int: The current points of the user.
+            int or None: The current points of the user, or None if they have no row yet.
         """
-        self.c.execute('SELECT points FROM study_points WHERE user_id = ?', (user_id,))
-        return self.c.fetchone()
+        return await self.db.get_points(user_id)
 
-    def update_points(self, user_id, points):
+    async def update_points(self, user_id, points):
         """
-        Updates the points of a user in the database. If the user doesn't exist, they are added.
+        Adds the points earned in a study session to the user's total. If the user doesn't exist,
+        they are added. The change is buffered and written with the Database cog's next flush.
 
         Parameters:
             user_id (int): The user ID to update points for.
-            points (int): The number of points to assign to the user.
+            points (int): The number of points the user earned.
         """
-        self.c.execute('INSERT OR REPLACE INTO study_points (user_id, points) VALUES (?, ?)',
-                       (user_id, points))
-        self.conn.commit()
+        await self.db.add_points(user_id, points, 'study_timer')
 
     @commands.command(help="Start your study timer and earn points based on time.")
+    @cooldown(STUDY_COOLDOWN, "🤠 Hold your horses, partner! You can only start a new study session once every minute.")
     async def startstudy(self, ctx):
         """
         Starts the study timer for the user. Users can only start a new study session once every 60 seconds.
+        Sessions close on their own after STUDY_MAX_SECONDS.
 
         Parameters:
             ctx (commands.Context): The context of the command invocation.
         """
-        user_id = ctx.author.id
-        current_time = time.time()
-
-        # Cooldown system: Prevent starting a study session more than once every minute
-        if user_id in self.user_last_study and (current_time - self.user_last_study[user_id]) < 60:
-            await ctx.send(
-                "🤠 Hold your horses, partner! You can only start a new study session once every minute.")
+        session = self.sessions.start(ctx.author.id, ctx.channel.id)
+        if session is None:
+            await ctx.send("Your study timer is already running!")
             return
+        await self.db.record_session_start(ctx.author.id, session.started_at, ctx.channel.id)
 
-        self.user_last_study[user_id] = current_time
-
-        if self.study_timer_start is not None:
-            await ctx.send("The study timer is already running!")
-        else:
-            self.study_timer_start = time.time()
-            self.study_timer_user = ctx.author.id
-            points = self.get_points(ctx.author.id) or 0
-            await ctx.send(f"🤠 You currently have {points} points. Let's start studying, partner!")
+        points = await self.get_points(ctx.author.id) or 0
+        await ctx.send(f"🤠 You currently have {points} points. Let's start studying, partner!")
 
     @commands.command(help="Stop your study timer and see how many points you earned.")
     async def stopstudy(self, ctx):
@@ -116,33 +362,52 @@ class StudyTimer(commands.Cog):
         Parameters:
             ctx (commands.Context): The context of the command invocation.
         """
-        if self.study_timer_start is None:
+        session = self.sessions.stop(ctx.author.id)
+        if session is None:
             await ctx.send("No timer is running.")
             return
 
-        if self.study_timer_user != ctx.author.id:
-            await ctx.send("You can't stop someone else's study timer.")
-            return
-
-        time_spent = time.time() - self.study_timer_start
+        minutes = int(session.elapsed() // 60)
+        points = await self.end_session(session)
 
-        # Timeout safeguard: automatically stop after 1 hour
-        if time_spent > 3600:
-            await ctx.send("Your study session automatically timed out after 1 hour.")
-            self.study_timer_start = None
-            self.study_timer_user = None
-            return
+        await ctx.send(
+            f"{ctx.author.mention}, you studied for {minutes} minutes and earned {points} points!")
 
-        minutes = int(time_spent // 60)
-        points = minutes
+    @commands.command(help="Show your study history: total time, streaks and your best days.")
+    async def studystats(self, ctx, member: discord.Member = None):
+        """
+        Shows a user's study statistics: total time, sessions, current and longest streak,
+        and time studied per weekday. Covers `!startstudy` sessions and study voice channels.
 
-        self.update_points(ctx.author.id, points)
+        Parameters:
+            ctx (commands.Context): The context of the command invocation.
+            member (discord.Member, optional): Whose stats to show. Defaults to the caller.
+        """
+        member = member or ctx.author
+        try:
+            stats = await self.db.get_study_stats(member.id)
+        except sqlite3.Error as e:
+            self.logger.error(f"Database error while reading study stats: {e}")
+            await ctx.send("Sorry, there was an error reading the study stats. Try again later.")
+            return
 
-        self.study_timer_start = None
-        self.study_timer_user = None
+        if stats is None:
+            await ctx.send(f"🤠 {member.display_name} ain't finished a study session yet, partner. "
+                           f"Try `!startstudy`!")
+            return
 
-        await ctx.send(
-            f"{ctx.author.mention}, you studied for {minutes} minutes and earned {points} points!")
+        weekdays = stats['weekdays']
+        busiest = max((seconds for seconds, _ in weekdays.values()), default=0)
+        lines = [
+            f"🤠 **{member.display_name}'s study trail**",
+            f"Total: {format_duration(stats['total_seconds'])} over {stats['sessions']} session(s)",
+            f"Streak: {stats['current_streak']} day(s), longest {stats['longest_streak']} day(s)",
+        ]
+        for weekday, label in enumerate(WEEKDAYS):
+            seconds, _ = weekdays.get(weekday, (0.0, 0))
+            bar = "█" * round(10 * seconds / busiest) if busiest else ""
+            lines.append(f"`{label} {bar:<10}` {format_duration(seconds)}")
+        await ctx.send("\n".join(lines))
 
 
 # Setup function to add the cog to the bot
@@ -10,6 +10,7 @@ from discord.ext import commands
 import os
 from dotenv import load_dotenv
 import logging
+from utils.reply_router import replies
 
 # === Load environment variables from .env file ===
 load_dotenv()
@@ -32,8 +33,32 @@ logger.addHandler(ch)
 intents = discord.Intents.default()
 intents.message_content = True  # Required to read message content (for commands)
 
+
+class SpaceCowBot(commands.Bot):
+    """
+    The bot, with a shutdown that unloads the Database cog last.
+    """
+
+    async def close(self):
+        """
+        Unload every extension in reverse load order, then close the connection to Discord.
+
+        The Database cog is loaded first, so it is unloaded last: its final flush then
+        covers everything the other cogs buffered while shutting down.
+        """
+        for name in reversed(list(self.extensions)):
+            try:
+                await self.unload_extension(name)
+            except Exception as e:
+                logger.error(f'❌ Error unloading {name}: {e}')
+        await super().close()
+
+
 # Create bot instance with custom command prefix and intents
-bot = commands.Bot(command_prefix="!", intents=intents)
+bot = SpaceCowBot(command_prefix="!", intents=intents)
+
+# Route replies to pending quiz and shop prompts with one lookup per message
+bot.add_listener(replies.on_message)
 
 
 @bot.event
@@ -52,10 +77,13 @@ async def load_cogs():
     Load all Python files in the `cogs/` directory as bot extensions.
 
     This function looks for `.py` files and attempts to load them as Discord bot extensions.
+    The `database` cog is always loaded first because the other cogs depend on it.
     It logs both successful and failed cog loads for debugging.
     """
     logger.info("🔧 Starting to load cogs...")
-    for filename in os.listdir('./cogs'):
+    # The Database cog owns the shared connection, so it must be loaded before any cog that uses it
+    filenames = sorted(os.listdir('./cogs'), key=lambda name: name != 'database.py')
+    for filename in filenames:
         if filename.endswith('.py'):
             cog_name = f'cogs.{filename[:-3]}'
             try:
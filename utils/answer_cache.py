@@ -0,0 +1,226 @@
+"""
+🧲 answer_cache.py
+
+This module provides a local cache of `!ask` answers that also matches reworded
+near-duplicate questions, with no external service. Questions are normalized
+(case, punctuation, whitespace) and split into overlapping character shingles.
+Each question gets a MinHash signature, and the signature is split into bands
+for locality-sensitive hashing (LSH). A lookup only compares the question with
+cached questions that share at least one band. The match is then confirmed
+with the exact Jaccard similarity of the two shingle sets.
+
+Entries expire after a TTL, and the least recently used entries are evicted
+once the cache is full. Hit and miss counters are kept so the threshold can be
+tuned (see `!cachestats`).
+
+Configuration (environment variables):
+- ASK_CACHE_THRESHOLD: Jaccard similarity a cached question needs to count as a match (default: 0.7)
+- ASK_CACHE_TTL: seconds an answer stays cached (default: 86400)
+- ASK_CACHE_SIZE: maximum number of cached answers (default: 2000)
+
+Usage:
+    from utils.answer_cache import AnswerCache
+    cache = AnswerCache()
+    answer = cache.lookup(question)
+    if answer is None:
+        answer = ...
+        cache.store(question, answer)
+"""
+
+import os
+import random
+import re
+import time
+import zlib
+from collections import OrderedDict
+
+ASK_CACHE_THRESHOLD = float(os.getenv('ASK_CACHE_THRESHOLD', '0.7'))
+ASK_CACHE_TTL = float(os.getenv('ASK_CACHE_TTL', '86400'))
+ASK_CACHE_SIZE = int(os.getenv('ASK_CACHE_SIZE', '2000'))
+
+# Characters per shingle
+SHINGLE_SIZE = 3
+
+# MinHash signature layout: BANDS bands of ROWS hashes each
+BANDS = 16
+ROWS = 4
+
+# Prime modulus for the MinHash permutations, and their fixed coefficients
+_PRIME = (1 << 61) - 1
+_rng = random.Random(723)
+_PERMUTATIONS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(BANDS * ROWS)]
+
+
+def normalize_question(question):
+    """
+    Normalize a question for matching: lowercase, no punctuation, single spaces.
+
+    Parameters:
+        question (str): The question as asked.
+
+    Returns:
+        str: The normalized question.
+    """
+    return " ".join(re.sub(r"[^\w\s]", " ", question.lower()).split())
+
+
+def shingles(text):
+    """
+    Return the set of overlapping character shingles of a normalized question.
+    """
+    if len(text) <= SHINGLE_SIZE:
+        return {text}
+    return {text[i:i + SHINGLE_SIZE] for i in range(len(text) - SHINGLE_SIZE + 1)}
+
+
+def signature(shingle_set):
+    """
+    Return the MinHash signature of a shingle set.
+    """
+    hashes = [zlib.crc32(s.encode()) for s in shingle_set]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMUTATIONS)
+
+
+def bands(sig):
+    """
+    Return the LSH bucket keys of a signature, one per band.
+    """
+    return [(band, sig[band * ROWS:(band + 1) * ROWS]) for band in range(BANDS)]
+
+
+class AnswerCache:
+    """
+    An LRU + TTL cache of answers, looked up by question similarity.
+
+    Attributes:
+        entries (OrderedDict): Maps normalized question to `(shingles, signature, answer, created_at)`,
+                               least recently used first.
+        buckets (dict): Maps an LSH band key to the set of normalized questions in that bucket.
+        hits (int): Lookups answered from the cache (exact or near-duplicate).
+        near_hits (int): The subset of hits that matched a reworded question.
+        misses (int): Lookups that found no match.
+    """
+
+    def __init__(self, threshold=ASK_CACHE_THRESHOLD, ttl=ASK_CACHE_TTL, size=ASK_CACHE_SIZE):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+            threshold (float): Jaccard similarity needed for a near-duplicate match.
+            ttl (float): Seconds an answer stays cached.
+            size (int): Maximum number of cached answers.
+        """
+        self.threshold = threshold
+        self.ttl = ttl
+        self.size = size
+        self.entries = OrderedDict()
+        self.buckets = {}
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        """
+        Return the number of cached answers.
+        """
+        return len(self.entries)
+
+    @property
+    def hit_rate(self):
+        """
+        Return the fraction of lookups answered from the cache (0 before any lookup).
+        """
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+    def _remove(self, key):
+        """
+        Drop an entry and its LSH bucket memberships.
+        """
+        _, sig, _, _ = self.entries.pop(key)
+        for band_key in bands(sig):
+            bucket = self.buckets.get(band_key)
+            if bucket is not None:
+                bucket.discard(key)
+                if not bucket:
+                    del self.buckets[band_key]
+
+    def _fresh(self, key, now):
+        """
+        Return whether an entry exists and hasn't expired, dropping it if it has.
+        """
+        entry = self.entries.get(key)
+        if entry is None:
+            return False
+        if now - entry[3] > self.ttl:
+            self._remove(key)
+            return False
+        return True
+
+    def lookup(self, question, threshold=None):
+        """
+        Return the cached answer to the same or a similar question.
+
+        Only lookups at the default threshold count towards the hit-rate metrics.
+
+        Parameters:
+            question (str): The question as asked.
+            threshold (float, optional): Override the similarity threshold for this lookup,
+                                         e.g. a looser one when the API is too busy to ask.
+
+        Returns:
+            str or None: The cached answer, or None on a miss.
+        """
+        counted = threshold is None
+        threshold = self.threshold if threshold is None else threshold
+        now = time.time()
+        key = normalize_question(question)
+
+        # Exact (normalized) repeat: no hashing needed
+        if self._fresh(key, now):
+            self.entries.move_to_end(key)
+            self.hits += counted
+            return self.entries[key][2]
+
+        shingle_set = shingles(key)
+        best, best_score = None, threshold
+        for band_key in bands(signature(shingle_set)):
+            for candidate in list(self.buckets.get(band_key, ())):
+                if not self._fresh(candidate, now):
+                    continue
+                other = self.entries[candidate][0]
+                score = len(shingle_set & other) / len(shingle_set | other)
+                if score >= best_score:
+                    best, best_score = candidate, score
+
+        if best is None:
+            self.misses += counted
+            return None
+
+        self.entries.move_to_end(best)
+        self.hits += counted
+        self.near_hits += counted
+        return self.entries[best][2]
+
+    def store(self, question, answer):
+        """
+        Cache the answer to a question, evicting the least recently used entries if full.
+
+        Parameters:
+            question (str): The question as asked.
+            answer (str): The complete answer.
+        """
+        key = normalize_question(question)
+        if not key:
+            return
+        if key in self.entries:
+            self._remove(key)
+
+        shingle_set = shingles(key)
+        sig = signature(shingle_set)
+        self.entries[key] = (shingle_set, sig, answer, time.time())
+        for band_key in bands(sig):
+            self.buckets.setdefault(band_key, set()).add(key)
+
+        while len(self.entries) > self.size:
+            self._remove(next(iter(self.entries)))
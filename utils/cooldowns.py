@@ -0,0 +1,131 @@
+"""
+⏳ cooldowns.py
+
+This module provides per-user command cooldowns keyed by (command, guild, user).
+Active cooldowns live in a dict for an O(1) check on every command, and an
+expiry min-heap lets expired entries be dropped in order. Memory therefore only
+grows with the users who used a command within its cooldown window, not with
+every user who ever ran it.
+
+Cooldown lengths come from the guild settings (`!setcooldown`), falling back to
+the default passed to the decorator.
+
+Usage:
+    from utils.cooldowns import cooldown
+
+    @commands.command()
+    @cooldown(10, "🤠 Slow down, partner!")
+    async def ask(self, ctx, *, question: str):
+        ...
+"""
+
+import functools
+import heapq
+import time
+
+
+class CooldownManager:
+    """
+    Tracks when each (command, guild, user) key may be used again.
+
+    Attributes:
+        expires (dict): Maps an active key to the monotonic time its cooldown ends.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no active cooldowns.
+        """
+        self.expires = {}
+        self._heap = []  # (expiry, key); may hold stale entries for keys that were re-triggered
+
+    def __len__(self):
+        """
+        Return the number of tracked cooldowns (some may have just expired).
+        """
+        return len(self.expires)
+
+    def remaining(self, key):
+        """
+        Return how long a key is still cooling down.
+
+        Parameters:
+            key (tuple): `(command, guild_id, user_id)`.
+
+        Returns:
+            float: Seconds left, or 0 if the key may be used now.
+        """
+        expiry = self.expires.get(key)
+        if expiry is None:
+            return 0.0
+        return max(0.0, expiry - time.monotonic())
+
+    def trigger(self, key, seconds):
+        """
+        Start a key's cooldown, and drop cooldowns that have expired.
+
+        Parameters:
+            key (tuple): `(command, guild_id, user_id)`.
+            seconds (float): Length of the cooldown.
+        """
+        now = time.monotonic()
+        self.prune(now)
+        if seconds <= 0:
+            self.expires.pop(key, None)
+            return
+        expiry = now + seconds
+        self.expires[key] = expiry
+        heapq.heappush(self._heap, (expiry, key))
+
+    def prune(self, now=None):
+        """
+        Remove every cooldown that has expired.
+
+        Parameters:
+            now (float, optional): The current monotonic time.
+        """
+        now = time.monotonic() if now is None else now
+        while self._heap and self._heap[0][0] <= now:
+            expiry, key = heapq.heappop(self._heap)
+            # Only drop the key if this heap entry is its latest cooldown
+            if self.expires.get(key) == expiry:
+                del self.expires[key]
+
+
+# ⏲️ Cooldowns shared by every command
+cooldowns = CooldownManager()
+
+
+def cooldown(default, message):
+    """
+    Decorate a cog command so each user must wait between uses in each guild.
+
+    The cooldown length is the guild's `cooldown:<command>` setting, or `default`.
+    A user still cooling down is sent `message` (which may use `{remaining}` for the
+    whole seconds left) and the command body doesn't run.
+
+    Parameters:
+        default (float): Cooldown in seconds when the guild hasn't configured one.
+        message (str): Reply sent to a user who is still cooling down.
+
+    Returns:
+        Callable: The decorator. Apply it below `@commands.command`.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, ctx, *args, **kwargs):
+            guild_id = ctx.guild and ctx.guild.id
+            key = (ctx.command.name, guild_id, ctx.author.id)
+
+            left = cooldowns.remaining(key)
+            if left > 0:
+                await ctx.send(message.format(remaining=int(left) + 1))
+                return
+
+            seconds = ctx.bot.get_cog("Database").settings.cooldown(guild_id, ctx.command.name, default)
+            cooldowns.trigger(key, seconds)
+            return await func(self, ctx, *args, **kwargs)
+
+        return wrapper
+
+    return decorator
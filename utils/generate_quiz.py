@@ -5,26 +5,70 @@ This module uses OpenAI's GPT model to dynamically generate multiple-choice quiz
 based on a given topic. The quiz is returned as structured JSON that includes
 questions, choices, and the correct answer.
 
+Every generated question is checked by `validate_question`, which is also used
+when question sets are imported into the question bank.
+
 Requirements:
-- OpenAI Python SDK (`openai`)
+- The shared async LLM client at `utils.llm_client`
 - A logger utility at `utils.logger` for error reporting
 """
 
-import openai
 import json
+from utils.llm_client import llm, LLMError, LLMBusy, INTERACTIVE
 from utils.logger import logger  # Custom logger for consistent error reporting
 
 
-def generate_quiz(topic):
+def validate_question(data):
+    """
+    Check a quiz question and return it in canonical form.
+
+    A valid question has non-empty question text, at least two lettered choices
+    with non-empty text, and an answer that is one of the choice letters.
+
+    Parameters:
+        data (dict): A question with keys "question", "choices" and "answer".
+
+    Returns:
+        dict or None: The question with stripped text and upper-case choice letters,
+                      or None if it is malformed.
+    """
+    if not isinstance(data, dict):
+        return None
+
+    question = data.get("question")
+    choices = data.get("choices")
+    answer = data.get("answer")
+    if not isinstance(question, str) or not question.strip():
+        return None
+    if not isinstance(choices, dict) or len(choices) < 2 or not isinstance(answer, str):
+        return None
+
+    clean_choices = {}
+    for letter, text in choices.items():
+        letter = str(letter).strip().upper()
+        if len(letter) != 1 or not letter.isalpha() or not isinstance(text, str) or not text.strip():
+            return None
+        clean_choices[letter] = text.strip()
+
+    answer = answer.strip().upper()
+    if answer not in clean_choices:
+        return None
+
+    return {"question": question.strip(), "choices": clean_choices, "answer": answer}
+
+
+async def generate_quiz(topic, priority=INTERACTIVE):
     """
     Generate a quiz containing 3 multiple-choice questions based on the provided topic.
 
     Parameters:
         topic (str): The subject or theme to generate quiz questions about.
+        priority (int, optional): The LLM scheduler priority; BACKGROUND for pre-generation.
 
     Returns:
         list or None: A list of dictionaries with keys: "question", "choices", and "answer".
-                      Returns None if there is an error in quiz generation or API call.
+                      Malformed questions are dropped. Returns None if there is an error in
+                      quiz generation or API call, or if no question is valid.
     """
     try:
         # Define the role of the assistant in the conversation
@@ -41,23 +85,31 @@ Format your response as a JSON list like this:
 [{{"question": "What is 2 + 2?", "choices": {{"A": "3", "B": "4", "C": "5", "D": "6"}}, "answer": "B"}}]"""
         }
 
-        # Call the OpenAI API to generate quiz content
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[system_message, user_message],
+        # Call the OpenAI API to generate quiz content (without blocking the event loop)
+        content = await llm.chat(
+            [system_message, user_message],
+            priority=priority,
             temperature=0.7,
             max_tokens=500
         )
 
-        # Extract and clean the generated content
-        content = response.choices[0].message.content.strip()
-
         # Convert the JSON string into Python list of dicts
         quiz_data = json.loads(content)
+        if not isinstance(quiz_data, list):
+            logger.error(f"❌ Quiz for topic '{topic}' was not a JSON list")
+            return None
 
-        return quiz_data
+        # Keep only well-formed questions
+        questions = [q for q in map(validate_question, quiz_data) if q]
+        if len(questions) < len(quiz_data):
+            logger.warning(f"⚠️ Dropped {len(quiz_data) - len(questions)} malformed question(s) for topic '{topic}'")
 
-    except openai.error.OpenAIError as e:
+        return questions or None
+
+    except LLMBusy as e:
+        logger.warning(f"⚠️ Quiz generation for topic '{topic}' shed by the LLM scheduler: {e}")
+        return None
+    except LLMError as e:
         logger.error(f"❌ OpenAI API error while generating quiz for topic '{topic}': {e}")
         return None
     except Exception as e:
@@ -0,0 +1,227 @@
+"""
+⚙️ guild_settings.py
+
+This module provides a cached, per-guild settings store backed by the
+`guild_settings` table. Every setting is loaded into memory once at startup, so
+command hot paths read settings from a dict and never touch SQLite. Updates are
+written through to the database first and then replace the cached value, so the
+cache is never stale.
+
+Settings stored under guild 0 are global defaults that apply to every guild
+without its own value. Channel settings never fall back to guild 0, since a
+channel belongs to exactly one guild; a channel stored under guild 0 (the tip
+channel set before settings were per-guild) is moved to the guild that owns it
+by `claim_global_channels` once the bot can see its channels.
+
+Usage:
+    from utils.guild_settings import GuildSettings
+    settings = GuildSettings(db)           # db is the Database cog
+    await settings.load()
+    settings.tip_channel(guild_id)         # int or None
+    await settings.set_tip_channel(guild_id, channel_id)
+    settings.study_channels(guild_id)      # set of voice channel IDs
+"""
+
+# Guild ID used for global defaults
+GLOBAL_GUILD = 0
+
+# Settings whose values are channel IDs, and so only ever apply to their own guild
+CHANNEL_SETTINGS = ('daily_tip_channel', 'study_voice_channels')
+
+
+class GuildSettings:
+    """
+    An in-memory cache of per-guild key/value settings with write-through updates.
+
+    Attributes:
+        db (Database): The Database cog used to load and persist settings.
+        values (dict): Maps `(guild_id, key)` to the stored string value.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize an empty settings cache.
+
+        Parameters:
+            db (Database): The Database cog used to load and persist settings.
+        """
+        self.db = db
+        self.values = {}
+
+    async def load(self):
+        """
+        Load every stored setting into memory. Called once at startup.
+
+        Raises:
+            sqlite3.Error: If the settings can't be read.
+        """
+        rows = await self.db.fetch_query('SELECT guild_id, key, value FROM guild_settings')
+        self.values = {(guild_id, key): value for guild_id, key, value in rows}
+
+    def get(self, guild_id, key, default=None):
+        """
+        Return a raw setting for a guild, falling back to the global default
+        (except for channel settings).
+
+        Parameters:
+            guild_id (int or None): The guild to look up; None (e.g. in DMs) means global.
+            key (str): The setting name.
+            default (Any, optional): Returned if neither the guild nor the global value exists.
+
+        Returns:
+            str or Any: The stored string value, or `default`.
+        """
+        guild_id = guild_id or GLOBAL_GUILD
+        value = self.values.get((guild_id, key))
+        if value is None and guild_id != GLOBAL_GUILD and key not in CHANNEL_SETTINGS:
+            value = self.values.get((GLOBAL_GUILD, key))
+        return default if value is None else value
+
+    async def set(self, guild_id, key, value):
+        """
+        Store a setting for a guild. The database is written first, then the cache.
+
+        Parameters:
+            guild_id (int or None): The guild to update; None means global.
+            key (str): The setting name.
+            value (Any): The new value; stored as text.
+
+        Raises:
+            sqlite3.Error: If the write fails. The cached value is left unchanged.
+        """
+        guild_id = guild_id or GLOBAL_GUILD
+        value = str(value)
+        await self.db.execute_query(
+            'REPLACE INTO guild_settings (guild_id, key, value) VALUES (?, ?, ?)',
+            (guild_id, key, value))
+        self.values[(guild_id, key)] = value
+
+    async def reset(self, guild_id, key):
+        """
+        Remove a guild's own value for a setting, so the global default applies again.
+
+        Parameters:
+            guild_id (int or None): The guild to update; None means global.
+            key (str): The setting name.
+
+        Raises:
+            sqlite3.Error: If the write fails. The cached value is left unchanged.
+        """
+        guild_id = guild_id or GLOBAL_GUILD
+        await self.db.execute_query(
+            'DELETE FROM guild_settings WHERE guild_id = ? AND key = ?', (guild_id, key))
+        self.values.pop((guild_id, key), None)
+
+    async def claim_global_channels(self, get_channel):
+        """
+        Move channel settings stored under guild 0 to the guild that owns the channel.
+
+        A guild that already has its own value keeps it. Values whose channel can't be
+        found are left under guild 0 and tried again on the next start.
+
+        Parameters:
+            get_channel (Callable): Returns the channel for an ID, or None (e.g. `bot.get_channel`).
+
+        Returns:
+            int: Number of settings moved.
+
+        Raises:
+            sqlite3.Error: If a write fails.
+        """
+        moved = 0
+        for key in CHANNEL_SETTINGS:
+            value = self.values.get((GLOBAL_GUILD, key))
+            if value is None:
+                continue
+            channel = get_channel(int(value.split(',')[0])) if value else None
+            guild = getattr(channel, 'guild', None)
+            if guild is None:
+                continue
+            if (guild.id, key) not in self.values:
+                await self.set(guild.id, key, value)
+            await self.reset(GLOBAL_GUILD, key)
+            moved += 1
+        return moved
+
+    def tip_channel(self, guild_id):
+        """
+        Return the channel ID that receives daily tips for a guild.
+
+        Returns:
+            int or None: The channel ID, or None if no tip channel is set.
+        """
+        value = self.get(guild_id, 'daily_tip_channel')
+        return int(value) if value is not None else None
+
+    async def set_tip_channel(self, guild_id, channel_id):
+        """
+        Set the channel that receives daily tips for a guild.
+        """
+        await self.set(guild_id, 'daily_tip_channel', channel_id)
+
+    def tip_channels(self):
+        """
+        Return the tip channel of every guild that has one.
+
+        Returns:
+            dict: Maps guild_id to channel ID (guild 0 holds a legacy channel whose
+                guild hasn't been found yet).
+        """
+        return {guild_id: int(value) for (guild_id, key), value in self.values.items()
+                if key == 'daily_tip_channel'}
+
+    def shop_price(self, guild_id, item, default):
+        """
+        Return the price of a shop item in a guild.
+
+        Parameters:
+            guild_id (int or None): The guild the shop was opened in.
+            item (str): The shop item name.
+            default (int): The price to use if none is configured.
+
+        Returns:
+            int: The item's price in points.
+        """
+        return int(self.get(guild_id, f'shop_price:{item}', default))
+
+    async def set_shop_price(self, guild_id, item, price):
+        """
+        Set the price of a shop item in a guild.
+        """
+        await self.set(guild_id, f'shop_price:{item}', int(price))
+
+    def cooldown(self, guild_id, command, default):
+        """
+        Return a command's per-user cooldown in a guild.
+
+        Parameters:
+            guild_id (int or None): The guild the command was used in.
+            command (str): The command name (e.g. 'ask').
+            default (float): The cooldown to use if none is configured.
+
+        Returns:
+            float: The cooldown in seconds.
+        """
+        return float(self.get(guild_id, f'cooldown:{command}', default))
+
+    async def set_cooldown(self, guild_id, command, seconds):
+        """
+        Set a command's per-user cooldown in a guild.
+        """
+        await self.set(guild_id, f'cooldown:{command}', float(seconds))
+
+    def study_channels(self, guild_id):
+        """
+        Return the voice channels of a guild where study time is tracked automatically.
+
+        Returns:
+            set: Channel IDs (empty if none are set).
+        """
+        value = self.get(guild_id, 'study_voice_channels', '')
+        return {int(channel_id) for channel_id in value.split(',') if channel_id}
+
+    async def set_study_channels(self, guild_id, channel_ids):
+        """
+        Set the voice channels of a guild where study time is tracked automatically.
+        """
+        await self.set(guild_id, 'study_voice_channels', ','.join(map(str, sorted(channel_ids))))
@@ -0,0 +1,355 @@
+"""
+🛰️ llm_client.py
+
+This module provides one shared, fully async client for OpenAI's chat completions
+API. It talks to the HTTP API directly over a persistent `aiohttp` session with a
+pooled connector, so no completion ever blocks the bot's event loop or ties up an
+executor thread, and connections are reused across `!ask`, quizzes and tips.
+
+Identical requests are coalesced ("single-flight"): while a completion is in
+flight, any other caller asking for the same model, parameters and normalized
+messages awaits that same request instead of sending its own, so a burst of
+identical `!quiz mitosis` or `!ask` commands costs one API call.
+
+`stream` yields a completion as it is generated (server-sent events), so callers
+can show the first words long before the whole answer is ready. Streams are
+coalesced too: one request is read in the background, and every caller asking
+the same thing gets the text received so far followed by the rest as it arrives.
+
+Every request waits for a slot from the shared `LLMScheduler`, which enforces the
+global rate, token and concurrency limits and serves interactive calls before
+background ones. Calls it sheds raise `LLMBusy`.
+
+Configuration (environment variables):
+- OPENAI_API_KEY: API key used for every request
+- OPENAI_API_BASE: API base URL (default: https://api.openai.com/v1)
+- LLM_TIMEOUT: total seconds allowed per request (default: 60)
+- LLM_CONNECT_TIMEOUT: seconds allowed to establish a connection (default: 10)
+- LLM_POOL_SIZE: maximum number of pooled connections (default: 20)
+
+Usage:
+    from utils.llm_client import llm
+    answer = await llm.chat([{"role": "user", "content": "Howdy?"}])
+    async for text in llm.stream([{"role": "user", "content": "Howdy?"}]):
+        ...
+"""
+
+import asyncio
+import json
+import os
+
+import aiohttp
+from dotenv import load_dotenv
+from utils.llm_scheduler import LLMScheduler, LLMBusy, INTERACTIVE, BACKGROUND  # noqa: F401 (re-exported)
+
+# Load environment variables so the API key is available however this module is imported
+load_dotenv()
+
+# Model used when a caller doesn't ask for a specific one
+DEFAULT_MODEL = "gpt-3.5-turbo"
+
+OPENAI_API_BASE = os.getenv('OPENAI_API_BASE', 'https://api.openai.com/v1')
+LLM_TIMEOUT = float(os.getenv('LLM_TIMEOUT', '60'))
+LLM_CONNECT_TIMEOUT = float(os.getenv('LLM_CONNECT_TIMEOUT', '10'))
+LLM_POOL_SIZE = int(os.getenv('LLM_POOL_SIZE', '20'))
+
+# Completion tokens assumed for rate limiting when a request doesn't set max_tokens
+DEFAULT_COMPLETION_TOKENS = 500
+
+
+class LLMError(Exception):
+    """
+    Raised when a chat completion request fails.
+
+    Attributes:
+        status (int or None): The HTTP status code, or None for network errors and timeouts.
+    """
+
+    def __init__(self, message, status=None):
+        super().__init__(message)
+        self.status = status
+
+
+class _SharedStream:
+    """
+    One streamed completion, read once in the background and replayed to every follower.
+
+    Attributes:
+        chunks (list): Every piece of text received so far.
+        done (bool): Whether the stream has ended.
+        error (Exception or None): Why the stream failed, if it did.
+        task (asyncio.Task): The task reading the stream.
+    """
+
+    def __init__(self, source):
+        """
+        Start reading an async iterator of text in the background.
+
+        Parameters:
+            source (AsyncIterator): The stream to read.
+        """
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self._updated = asyncio.Event()
+        self.task = asyncio.ensure_future(self._pump(source))
+
+    def _notify(self):
+        """
+        Wake every follower waiting for more text, and arm a fresh event for the next wait.
+        """
+        updated, self._updated = self._updated, asyncio.Event()
+        updated.set()
+
+    async def _pump(self, source):
+        """
+        Read the stream to the end, recording each piece and any error.
+        """
+        try:
+            async for text in source:
+                self.chunks.append(text)
+                self._notify()
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+            self._notify()
+
+    async def follow(self):
+        """
+        Yield every piece of the stream from the start, waiting for new ones until it ends.
+
+        Raises:
+            LLMBusy or LLMError: Whatever ended the stream early.
+        """
+        position = 0
+        while True:
+            updated = self._updated
+            while position < len(self.chunks):
+                yield self.chunks[position]
+                position += 1
+            if self.done:
+                if self.error is not None:
+                    raise self.error
+                return
+            await updated.wait()
+
+
+class LLMClient:
+    """
+    An async chat completions client backed by one pooled HTTP session.
+
+    The session is created lazily on first use (it must be created inside the
+    running event loop) and reused until `close` is called.
+
+    Attributes:
+        api_key (str): The OpenAI API key.
+        base_url (str): The API base URL.
+        timeout (aiohttp.ClientTimeout): Per-request timeouts.
+        pool_size (int): Maximum number of pooled connections.
+        coalesced (int): Number of calls that were served by another caller's in-flight request.
+        scheduler (LLMScheduler): Admits requests within the global rate and concurrency limits.
+    """
+
+    def __init__(self, api_key=None, base_url=OPENAI_API_BASE, timeout=LLM_TIMEOUT,
+                 connect_timeout=LLM_CONNECT_TIMEOUT, pool_size=LLM_POOL_SIZE, scheduler=None):
+        """
+        Initialize the client without opening any connections.
+
+        Parameters:
+            api_key (str, optional): The API key. Defaults to the OPENAI_API_KEY environment variable.
+            base_url (str): The API base URL.
+            timeout (float): Total seconds allowed per request.
+            connect_timeout (float): Seconds allowed to establish a connection.
+            pool_size (int): Maximum number of pooled connections.
+            scheduler (LLMScheduler, optional): The scheduler to use. Defaults to one with the configured limits.
+        """
+        self.api_key = api_key or os.getenv('OPENAI_API_KEY')
+        self.base_url = base_url.rstrip('/')
+        self.timeout = aiohttp.ClientTimeout(total=timeout, connect=connect_timeout)
+        self.pool_size = pool_size
+        self.coalesced = 0
+        self.scheduler = scheduler or LLMScheduler()
+        self._session = None
+        self._in_flight = {}
+        self._streams = {}
+
+    def session(self):
+        """
+        Return the shared HTTP session, creating it on first use.
+
+        Returns:
+            aiohttp.ClientSession: The pooled session.
+        """
+        if self._session is None or self._session.closed:
+            self._session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=self.pool_size),
+                timeout=self.timeout,
+                headers={"Authorization": f"Bearer {self.api_key}"}
+            )
+        return self._session
+
+    @staticmethod
+    def _flight_key(messages, model, params):
+        """
+        Return the key identifying identical requests: messages are compared by role and
+        case-folded, whitespace-collapsed content, and parameters regardless of order.
+        """
+        normalized = [(m.get("role"), " ".join(str(m.get("content", "")).split()).casefold()) for m in messages]
+        return json.dumps([model, normalized, params], sort_keys=True, default=str)
+
+    @staticmethod
+    def _estimate_tokens(messages, params):
+        """
+        Roughly estimate a request's total tokens (about 4 characters per prompt token).
+        """
+        prompt = sum(len(str(m.get("content", ""))) for m in messages) // 4
+        return prompt + int(params.get("max_tokens", DEFAULT_COMPLETION_TOKENS))
+
+    async def chat(self, messages, model=DEFAULT_MODEL, priority=INTERACTIVE, **params):
+        """
+        Request a chat completion and return the generated text.
+
+        If an identical request is already in flight, its result is shared instead of
+        sending another one. Cancelling one caller doesn't cancel the shared request.
+
+        Parameters:
+            messages (list): Chat messages, e.g. `[{"role": "user", "content": "..."}]`.
+            model (str, optional): The model to use.
+            priority (int, optional): INTERACTIVE for user-facing calls, BACKGROUND for pre-generation.
+            **params: Extra request fields such as `temperature` or `max_tokens`.
+
+        Returns:
+            str: The stripped content of the first choice.
+
+        Raises:
+            LLMBusy: If the scheduler sheds the request.
+            LLMError: If the request fails, times out or returns an error status.
+        """
+        key = self._flight_key(messages, model, params)
+        flight = self._in_flight.get(key)
+        if flight is None:
+            flight = asyncio.ensure_future(self._chat(messages, model, params, priority))
+            self._in_flight[key] = flight
+            flight.add_done_callback(lambda _: self._in_flight.pop(key, None))
+        else:
+            self.coalesced += 1
+        return await asyncio.shield(flight)
+
+    async def _chat(self, messages, model, params, priority):
+        """
+        Send one chat completion request once the scheduler admits it. See `chat`.
+        """
+        payload = {"model": model, "messages": messages, **params}
+        try:
+            async with self.scheduler.slot(priority, self._estimate_tokens(messages, params)) as slot:
+                async with self.session().post(f"{self.base_url}/chat/completions", json=payload) as response:
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    if response.status != 200:
+                        raise self._status_error(response, data)
+
+                # Charge the token bucket for what the request really used
+                usage = data.get("usage") if isinstance(data, dict) else None
+                if isinstance(usage, dict) and isinstance(usage.get("total_tokens"), int):
+                    slot.settle(usage["total_tokens"])
+        except asyncio.TimeoutError as e:
+            raise LLMError("OpenAI API request timed out") from e
+        except aiohttp.ClientError as e:
+            raise LLMError(f"OpenAI API request failed: {e}") from e
+
+        try:
+            return data["choices"][0]["message"]["content"].strip()
+        except (KeyError, IndexError, TypeError) as e:
+            raise LLMError(f"Unexpected OpenAI API response: {data}") from e
+
+    @staticmethod
+    def _status_error(response, data):
+        """
+        Build the LLMError for a non-200 response, using the API's error message if it sent one.
+        """
+        error = data.get("error") if isinstance(data, dict) else None
+        message = error.get("message") if isinstance(error, dict) else response.reason
+        return LLMError(f"OpenAI API error {response.status}: {message}", response.status)
+
+    async def stream(self, messages, model=DEFAULT_MODEL, priority=INTERACTIVE, **params):
+        """
+        Request a streamed chat completion and yield the text as it arrives.
+
+        If an identical stream is already in flight, its text so far is replayed and
+        the rest follows live, instead of sending another request. Leaving the loop
+        early doesn't stop the shared stream for the others.
+
+        Parameters:
+            messages (list): Chat messages, e.g. `[{"role": "user", "content": "..."}]`.
+            model (str, optional): The model to use.
+            priority (int, optional): INTERACTIVE for user-facing calls, BACKGROUND for pre-generation.
+            **params: Extra request fields such as `temperature` or `max_tokens`.
+
+        Yields:
+            str: Successive non-empty pieces of the first choice's content.
+
+        Raises:
+            LLMBusy: If the scheduler sheds the request.
+            LLMError: If the request fails, times out, returns an error status or sends a malformed event.
+        """
+        key = self._flight_key(messages, model, {**params, "stream": True})
+        flight = self._streams.get(key)
+        if flight is None:
+            flight = _SharedStream(self._stream(messages, model, params, priority))
+            self._streams[key] = flight
+            flight.task.add_done_callback(lambda _: self._streams.pop(key, None))
+        else:
+            self.coalesced += 1
+
+        async for text in flight.follow():
+            yield text
+
+    async def _stream(self, messages, model, params, priority):
+        """
+        Send one streamed chat completion request once the scheduler admits it, holding
+        the scheduler slot until the stream ends. See `stream`.
+        """
+        payload = {"model": model, "messages": messages, **params, "stream": True}
+        try:
+            async with self.scheduler.slot(priority, self._estimate_tokens(messages, params)), \
+                    self.session().post(f"{self.base_url}/chat/completions", json=payload) as response:
+                if response.status != 200:
+                    try:
+                        data = await response.json(content_type=None)
+                    except ValueError:
+                        data = None
+                    raise self._status_error(response, data)
+
+                # Server-sent events: one "data: {json}" line per chunk, ending with "data: [DONE]"
+                async for line in response.content:
+                    line = line.strip()
+                    if not line.startswith(b"data:"):
+                        continue
+                    data = line[len(b"data:"):].strip()
+                    if data == b"[DONE]":
+                        break
+                    try:
+                        text = json.loads(data)["choices"][0]["delta"].get("content")
+                    except (ValueError, KeyError, IndexError, TypeError, AttributeError) as e:
+                        raise LLMError(f"Unexpected OpenAI API stream event: {data[:200]!r}") from e
+                    if text:
+                        yield text
+        except asyncio.TimeoutError as e:
+            raise LLMError("OpenAI API request timed out") from e
+        except aiohttp.ClientError as e:
+            raise LLMError(f"OpenAI API request failed: {e}") from e
+
+    async def close(self):
+        """
+        Close the shared HTTP session and its pooled connections.
+        """
+        if self._session is not None and not self._session.closed:
+            await self._session.close()
+        self._session = None
+
+
+# 🔌 The client shared by every cog and utility
+llm = LLMClient()
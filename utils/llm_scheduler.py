@@ -0,0 +1,242 @@
+"""
+🚦 llm_scheduler.py
+
+This module provides the outbound scheduler every LLM call passes through. It
+keeps the whole bot inside OpenAI's rate limits instead of letting a busy
+server run into 429s:
+
+- Two token buckets, one for requests per minute and one for (estimated)
+  tokens per minute, refilled continuously.
+- A cap on how many requests may be in flight at once.
+- A priority queue: interactive calls (`!ask`, `!quiz`) always go ahead of
+  background work (tip and quiz pre-generation).
+- Load shedding: when a priority's queue is already too deep, or a call has
+  waited too long for its turn, it fails fast with `LLMBusy` so the caller can
+  answer from a cache or send a quick "busy" message instead of hanging.
+
+Configuration (environment variables):
+- LLM_RPM: requests per minute (default: 60)
+- LLM_TPM: tokens per minute (default: 60000)
+- LLM_MAX_CONCURRENCY: requests in flight at once (default: 4)
+- LLM_MAX_QUEUE: interactive calls allowed to wait (default: 20)
+- LLM_MAX_BACKGROUND_QUEUE: background calls allowed to wait (default: 5)
+- LLM_QUEUE_TIMEOUT: seconds a call may wait for its turn (default: 20)
+
+Usage:
+    from utils.llm_scheduler import LLMScheduler, INTERACTIVE
+    scheduler = LLMScheduler()
+    async with scheduler.slot(INTERACTIVE, estimated_tokens) as slot:
+        ...  # send the request
+        slot.settle(actual_tokens)
+"""
+
+import asyncio
+import heapq
+import itertools
+import os
+import time
+from contextlib import asynccontextmanager
+
+LLM_RPM = float(os.getenv('LLM_RPM', '60'))
+LLM_TPM = float(os.getenv('LLM_TPM', '60000'))
+LLM_MAX_CONCURRENCY = int(os.getenv('LLM_MAX_CONCURRENCY', '4'))
+LLM_MAX_QUEUE = int(os.getenv('LLM_MAX_QUEUE', '20'))
+LLM_MAX_BACKGROUND_QUEUE = int(os.getenv('LLM_MAX_BACKGROUND_QUEUE', '5'))
+LLM_QUEUE_TIMEOUT = float(os.getenv('LLM_QUEUE_TIMEOUT', '20'))
+
+# Priority classes; lower values are served first
+INTERACTIVE = 0
+BACKGROUND = 1
+
+
+class LLMBusy(Exception):
+    """
+    Raised when a call is shed because the LLM queue is too deep or the wait too long.
+    """
+
+
+class TokenBucket:
+    """
+    A continuously refilled token bucket holding at most one minute's worth of tokens.
+
+    Attributes:
+        capacity (float): Tokens added per minute, and the most the bucket can hold.
+        tokens (float): Tokens currently available.
+    """
+
+    def __init__(self, per_minute):
+        """
+        Initialize a full bucket.
+
+        Parameters:
+            per_minute (float): Tokens added per minute.
+        """
+        self.capacity = per_minute
+        self.tokens = per_minute
+        self._updated = time.monotonic()
+
+    def _refill(self):
+        """
+        Add the tokens earned since the last refill.
+        """
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.capacity / 60)
+        self._updated = now
+
+    def wait_time(self, amount):
+        """
+        Return how many seconds until `amount` tokens are available (0 if they are now).
+        """
+        self._refill()
+        amount = min(amount, self.capacity)
+        return max(0.0, (amount - self.tokens) * 60 / self.capacity)
+
+    def take(self, amount):
+        """
+        Remove tokens from the bucket. May go negative when settling an underestimate.
+        """
+        self._refill()
+        self.tokens -= min(amount, self.capacity)
+
+
+class LLMScheduler:
+    """
+    Admits LLM calls by priority within rate, token and concurrency limits.
+
+    Attributes:
+        requests (TokenBucket): Requests-per-minute bucket.
+        tokens (TokenBucket): Tokens-per-minute bucket.
+        max_concurrency (int): Requests allowed in flight at once.
+        active (int): Requests currently in flight.
+        shed (int): Calls rejected with LLMBusy so far.
+    """
+
+    def __init__(self, rpm=LLM_RPM, tpm=LLM_TPM, max_concurrency=LLM_MAX_CONCURRENCY,
+                 max_queue=LLM_MAX_QUEUE, max_background_queue=LLM_MAX_BACKGROUND_QUEUE,
+                 queue_timeout=LLM_QUEUE_TIMEOUT):
+        """
+        Initialize an idle scheduler.
+
+        Parameters:
+            rpm (float): Requests per minute.
+            tpm (float): Estimated tokens per minute.
+            max_concurrency (int): Requests allowed in flight at once.
+            max_queue (int): Interactive calls allowed to wait.
+            max_background_queue (int): Background calls allowed to wait.
+            queue_timeout (float): Seconds a call may wait for its turn.
+        """
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max_concurrency
+        self.max_queue = {INTERACTIVE: max_queue, BACKGROUND: max_background_queue}
+        self.queue_timeout = queue_timeout
+        self.active = 0
+        self.shed = 0
+        self._queue = []  # Heap of (priority, sequence, estimated tokens, future)
+        self._queued = {INTERACTIVE: 0, BACKGROUND: 0}
+        self._sequence = itertools.count()
+        self._timer = None
+
+    def queued(self, priority=None):
+        """
+        Return how many calls are waiting, of one priority or in total.
+        """
+        if priority is None:
+            return sum(self._queued.values())
+        return self._queued[priority]
+
+    def _dispatch(self):
+        """
+        Admit waiting calls in priority order while concurrency and both buckets allow.
+
+        The head of the queue is never skipped, so a large interactive call can't be
+        starved by smaller background ones. If a bucket is short, a timer retries
+        once it has refilled enough.
+        """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        while self._queue and self.active < self.max_concurrency:
+            priority, _, estimate, future = self._queue[0]
+            if future.done():
+                # Timed out or cancelled while waiting
+                heapq.heappop(self._queue)
+                continue
+
+            wait = max(self.requests.wait_time(1), self.tokens.wait_time(estimate))
+            if wait > 0:
+                self._timer = asyncio.get_running_loop().call_later(wait, self._dispatch)
+                return
+
+            heapq.heappop(self._queue)
+            self._queued[priority] -= 1
+            self.requests.take(1)
+            self.tokens.take(estimate)
+            self.active += 1
+            future.set_result(None)
+
+    @asynccontextmanager
+    async def slot(self, priority, estimated_tokens):
+        """
+        Wait for permission to send one request, and hold it until the block exits.
+
+        Parameters:
+            priority (int): INTERACTIVE or BACKGROUND.
+            estimated_tokens (int): Expected prompt plus completion tokens.
+
+        Yields:
+            Slot: Lets the caller report the request's real token usage.
+
+        Raises:
+            LLMBusy: If the priority's queue is full or the wait exceeds the queue timeout.
+        """
+        if self._queued[priority] >= self.max_queue[priority]:
+            self.shed += 1
+            raise LLMBusy("LLM queue is full")
+
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(self._queue, (priority, next(self._sequence), estimated_tokens, future))
+        self._queued[priority] += 1
+        self._dispatch()
+
+        try:
+            await asyncio.wait_for(asyncio.shield(future), self.queue_timeout)
+        except BaseException as e:
+            if future.done():
+                # Granted just as we gave up: hand the slot straight back
+                self.active -= 1
+                self._dispatch()
+            else:
+                # Give up our place in the queue; _dispatch drops the entry lazily
+                future.cancel()
+                self._queued[priority] -= 1
+            if isinstance(e, asyncio.TimeoutError):
+                self.shed += 1
+                raise LLMBusy("Timed out waiting for an LLM slot") from None
+            raise
+
+        try:
+            yield Slot(self, estimated_tokens)
+        finally:
+            self.active -= 1
+            self._dispatch()
+
+
+class Slot:
+    """
+    A granted request slot, used to correct the token estimate once usage is known.
+    """
+
+    def __init__(self, scheduler, estimate):
+        self.scheduler = scheduler
+        self.estimate = estimate
+
+    def settle(self, actual_tokens):
+        """
+        Charge (or refund) the difference between the estimated and actual token usage.
+
+        Parameters:
+            actual_tokens (int): Tokens the request really used, as reported by the API.
+        """
+        self.scheduler.tokens.take(actual_tokens - self.estimate)
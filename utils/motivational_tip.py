@@ -1,37 +1,78 @@
 """
 🤠 motivational_tip.py
 
-This module uses OpenAI's ChatCompletion API to generate a short, cowboy-themed
+This module uses OpenAI's chat completions API to generate a short, cowboy-themed
 motivational message or study tip. These tips are designed to encourage students
 with a bit of Western-style flair.
 
 Example Output:
 "Keep yer boots steady on the path of learnin’. One step at a time, partner."
 
+`generate_motivational_tips` asks for a whole batch of tips in one completion;
+it is used to refill the tip pool behind `!tip` (see `utils.tip_pool`).
+
 Usage:
     from utils.motivational_tip import generate_motivational_tip
-    tip = generate_motivational_tip()
+    tip = await generate_motivational_tip()
     print(tip)
+    tips = await generate_motivational_tips(10)
 """
 
-import openai
+import json
 import logging
+import re
+from utils.llm_client import llm, LLMError, LLMBusy, BACKGROUND
 
 # 📝 Set up a logger for capturing API errors or unexpected issues
 logger = logging.getLogger(__name__)
 
-def generate_motivational_tip():
+# Markdown code fence the model often wraps its JSON in (```json ... ```)
+CODE_FENCE = re.compile(r"^\s*```[\w-]*\s*\n?|\n?\s*```\s*$")
+
+# Leftover JSON syntax in a line: brackets, braces, or a trailing `",`
+JSON_PUNCTUATION = re.compile(r'[\[\]{}]|"\s*,?\s*$|^\s*,')
+
+
+def parse_tip_list(content):
+    """
+    Parse a batch of tips from a completion: a JSON list of strings, possibly in a
+    code fence, or failing that one tip per line.
+
+    Lines without any letters or with leftover JSON syntax are dropped, so a
+    malformed JSON reply never turns its brackets and quoted fragments into tips.
+
+    Parameters:
+        content (str): The completion text.
+
+    Returns:
+        list: The tips found (possibly empty).
+    """
+    content = CODE_FENCE.sub("", content.strip())
+    try:
+        tips = json.loads(content)
+    except ValueError:
+        # 📝 Not JSON after all: fall back to one tip per line
+        tips = [line for line in content.splitlines()
+                if re.search(r"[^\W\d_]", line) and not JSON_PUNCTUATION.search(line)]
+    if not isinstance(tips, list):
+        return []
+    return [tip for tip in tips if isinstance(tip, str) and tip.strip()]
+
+
+async def generate_motivational_tip(priority=BACKGROUND):
     """
     Generates a short motivational study tip or quote in cowboy style using OpenAI.
 
+    Parameters:
+        priority (int, optional): The LLM scheduler priority; tips are background work by default.
+
     Returns:
         str: A motivational quote or message. If the API fails, a fallback message is returned.
     """
     try:
         # 🧠 Send a prompt to OpenAI instructing it to respond in a cowboy tone
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[
+        return await llm.chat(
+            [
                 {
                     "role": "system",
                     "content": "You're a wise cowboy who gives short motivational messages to students."
@@ -41,14 +82,16 @@ def generate_motivational_tip():
                     "content": "Give me a short motivational study tip or quote in cowboy style."
                 }
             ],
+            priority=priority,
             temperature=0.9,  # 🔥 Add creativity and variation to the response
             max_tokens=100     # ⏱ Limit response length to keep it snappy
         )
 
-        # ✅ Extract and return the message content
-        return response['choices'][0]['message']['content'].strip()
-
-    except openai.error.OpenAIError as e:
+    except LLMBusy as e:
+        # 🚦 Shed by the LLM scheduler because interactive commands are busy
+        logger.warning(f"Motivational tip shed by the LLM scheduler: {e}")
+        return "Couldn't rustle up a tip right now, partner. Try again later."
+    except LLMError as e:
         # ❌ Log OpenAI-specific errors
         logger.error(f"OpenAI API error: {e}")
         return "Couldn't rustle up a tip right now, partner. Try again later."
@@ -56,3 +99,45 @@ def generate_motivational_tip():
         # ❌ Log unexpected errors
         logger.error(f"Error generating motivational tip: {e}")
         return "Couldn't rustle up a tip right now, partner. Try again later."
+
+
+async def generate_motivational_tips(count, priority=BACKGROUND):
+    """
+    Generates a batch of distinct cowboy-style study tips in a single completion.
+
+    Parameters:
+        count (int): How many tips to ask for.
+        priority (int, optional): The LLM scheduler priority; background by default.
+
+    Returns:
+        list: The generated tips (possibly fewer than asked for). Empty if the API fails.
+    """
+    try:
+        # 🧠 One request for the whole batch, returned as a JSON list of strings
+        content = await llm.chat(
+            [
+                {
+                    "role": "system",
+                    "content": "You're a wise cowboy who gives short motivational messages to students."
+                },
+                {
+                    "role": "user",
+                    "content": f"Give me {count} different short motivational study tips or quotes in "
+                               f"cowboy style. Reply with only a JSON list of strings."
+                }
+            ],
+            priority=priority,
+            temperature=0.9,        # 🔥 Variety across the batch
+            max_tokens=60 * count   # ⏱ Room for every tip, but no essays
+        )
+
+        return parse_tip_list(content)
+
+    except LLMBusy as e:
+        # 🚦 Shed by the LLM scheduler; the pool will try again on its next refill
+        logger.warning(f"Motivational tip batch shed by the LLM scheduler: {e}")
+        return []
+    except Exception as e:
+        # ❌ Log API and unexpected errors alike; the pool keeps serving what it has
+        logger.error(f"Error generating motivational tips: {e}")
+        return []
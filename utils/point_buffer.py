@@ -0,0 +1,100 @@
+"""
+🧮 point_buffer.py
+
+This module provides a small in-memory write-behind buffer for study point changes.
+Point awards from every cog are merged into a single pending delta per user, and the
+Database cog periodically drains the buffer into one `executemany` transaction
+instead of committing every award on its own.
+
+Every individual change is also kept as an event, so the flush can append it to
+the `point_events` ledger.
+
+Usage:
+    from utils.point_buffer import PointBuffer
+    buffer = PointBuffer()
+    buffer.add(user_id, 5, 'quiz')
+    buffer.add(user_id, 3, 'study_timer')
+    batch, events = buffer.drain()  # {user_id: 8}, [(user_id, 5, 'quiz', ts), ...]
+"""
+
+import time
+
+
+class PointBuffer:
+    """
+    Coalesces point increments per user until they are flushed to the database.
+
+    Attributes:
+        pending (dict): Maps user_id to the summed, not yet flushed point delta.
+        events (list): `(user_id, delta, source, created_at)` for every change since the last drain.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty buffer.
+        """
+        self.pending = {}
+        self.events = []
+
+    def __len__(self):
+        """
+        Return the number of users with a pending delta.
+        """
+        return len(self.pending)
+
+    @property
+    def operations(self):
+        """
+        Return the number of changes buffered since the last drain.
+        """
+        return len(self.events)
+
+    def add(self, user_id, delta, source):
+        """
+        Merge a point change for a user into the buffer.
+
+        Parameters:
+            user_id (int): The user whose points change.
+            delta (int): The number of points to add (negative to deduct).
+            source (str): Which feature made the change (e.g. 'quiz', 'shop').
+        """
+        self.pending[user_id] = self.pending.get(user_id, 0) + delta
+        self.events.append((user_id, delta, source, int(time.time())))
+
+    def get(self, user_id):
+        """
+        Return the pending (unflushed) delta for a user.
+
+        Parameters:
+            user_id (int): The user to look up.
+
+        Returns:
+            int: The pending delta, or 0 if nothing is buffered for the user.
+        """
+        return self.pending.get(user_id, 0)
+
+    def drain(self):
+        """
+        Remove and return everything that is buffered.
+
+        Returns:
+            tuple: `(batch, events)`, where batch maps user_id to the delta that should be
+                   applied (zero deltas are dropped) and events lists every individual change.
+        """
+        batch = {user_id: delta for user_id, delta in self.pending.items() if delta}
+        events = self.events
+        self.pending = {}
+        self.events = []
+        return batch, events
+
+    def restore(self, batch, events):
+        """
+        Merge a drained batch back into the buffer, e.g. after a failed flush.
+
+        Parameters:
+            batch (dict): A batch previously returned by `drain`.
+            events (list): The events drained with it.
+        """
+        for user_id, delta in batch.items():
+            self.pending[user_id] = self.pending.get(user_id, 0) + delta
+        self.events = events + self.events
@@ -0,0 +1,228 @@
+"""
+📚 question_bank.py
+
+This module provides the quiz question bank: every validated question is stored
+once in the `quiz_questions` table, which has an FTS5 full-text index over its
+topic and question text. Quizzes are built by sampling questions a user hasn't
+seen yet from the best full-text matches, so the API is only needed when the
+bank runs short on a topic.
+
+Question sets can also be bulk-imported from local JSON or CSV files:
+- JSON: a list of `{"topic", "question", "choices", "answer"}` objects, or an
+  object mapping each topic to a list of `{"question", "choices", "answer"}`.
+- CSV: a header row with `topic`, `question` and `answer` columns plus one
+  column per choice letter (`A`, `B`, `C`, `D`, ...).
+
+Configuration (environment variables):
+- QUIZ_LENGTH: number of questions per quiz (default: 3)
+- QUESTION_IMPORT_DIR: directory admins can import question files from (default: question_sets)
+
+Usage:
+    from utils.question_bank import QuestionBank
+    bank = QuestionBank(db)  # db is the Database cog
+    questions = await bank.sample(topic, user_id)
+    await bank.add(topic, generated_questions, 'generated')
+"""
+
+import csv
+import json
+import os
+import random
+import re
+import time
+
+from utils.generate_quiz import validate_question
+
+QUIZ_LENGTH = int(os.getenv('QUIZ_LENGTH', '3'))
+QUESTION_IMPORT_DIR = os.getenv('QUESTION_IMPORT_DIR', 'question_sets')
+
+# How many of the best full-text matches a quiz is sampled from, per question needed
+CANDIDATE_FACTOR = 4
+
+# Stores a question once; a duplicate returns the existing row's ID
+INSERT_QUESTION_QUERY = '''INSERT INTO quiz_questions (topic, question, choices, answer, source, created_at)
+                           VALUES (?, ?, ?, ?, ?, ?)
+                           ON CONFLICT(question) DO UPDATE SET source = quiz_questions.source
+                           RETURNING id'''
+
+# Best unseen matches for a full-text query; topic matches weigh more than question text
+SAMPLE_QUERY = '''SELECT q.id, q.question, q.choices, q.answer
+                  FROM quiz_questions_fts
+                  JOIN quiz_questions q ON q.id = quiz_questions_fts.rowid
+                  WHERE quiz_questions_fts MATCH ?
+                    AND NOT EXISTS (SELECT 1 FROM quiz_question_seen s
+                                    WHERE s.user_id = ? AND s.question_id = q.id)
+                  ORDER BY bm25(quiz_questions_fts, 5.0, 1.0)
+                  LIMIT ?'''
+
+
+def match_expression(topic):
+    """
+    Turn a free-text topic into an FTS5 query matching every word of it.
+
+    Each word is quoted, so punctuation and FTS5 operators typed by users are
+    treated as plain text: "World War II?" -> '"world" "war" "ii"'.
+
+    Parameters:
+        topic (str): The topic as typed by the user.
+
+    Returns:
+        str or None: The FTS5 query, or None if the topic has no words.
+    """
+    words = re.findall(r"\w+", topic.lower())
+    return " ".join(f'"{word}"' for word in words) or None
+
+
+def load_question_file(path):
+    """
+    Read a question set from a JSON or CSV file.
+
+    Parameters:
+        path (str): Path to a `.json` or `.csv` file.
+
+    Returns:
+        list: `(topic, question)` tuples, where each question is an unvalidated dict.
+
+    Raises:
+        ValueError: If the file type is unsupported or the content has the wrong shape.
+        OSError: If the file can't be read.
+    """
+    extension = os.path.splitext(path)[1].lower()
+
+    if extension == '.json':
+        with open(path, encoding='utf-8') as f:
+            data = json.load(f)
+        if isinstance(data, dict):
+            return [(topic, question) for topic, questions in data.items()
+                    for question in (questions if isinstance(questions, list) else [])]
+        if isinstance(data, list):
+            return [(item.get('topic', ''), item) for item in data if isinstance(item, dict)]
+        raise ValueError("JSON question sets must be a list or an object of topic lists")
+
+    if extension == '.csv':
+        with open(path, encoding='utf-8', newline='') as f:
+            rows = list(csv.DictReader(f))
+        entries = []
+        for row in rows:
+            choices = {key: value for key, value in row.items()
+                       if key and len(key.strip()) == 1 and key.strip().isalpha() and value}
+            entries.append((row.get('topic') or '', {
+                "question": row.get('question'),
+                "choices": choices,
+                "answer": row.get('answer'),
+            }))
+        return entries
+
+    raise ValueError(f"Unsupported question file type: {extension or 'none'}")
+
+
+class QuestionBank:
+    """
+    Stores validated quiz questions and samples unseen ones through the full-text index.
+
+    Attributes:
+        db (Database): The Database cog that owns the question tables.
+    """
+
+    def __init__(self, db):
+        """
+        Initialize the question bank.
+
+        Parameters:
+            db (Database): The Database cog that owns the question tables.
+        """
+        self.db = db
+
+    async def add(self, topic, questions, source):
+        """
+        Validate and store questions under a topic.
+
+        Questions already in the bank (same text, ignoring case) are not stored twice.
+
+        Parameters:
+            topic (str): The topic the questions belong to.
+            questions (list): Question dicts with "question", "choices" and "answer".
+            source (str): Where the questions came from (e.g. 'generated', 'import').
+
+        Returns:
+            list: The bank IDs of the valid questions, in order. Invalid questions are skipped.
+
+        Raises:
+            sqlite3.Error: If the questions can't be stored.
+        """
+        return await self.add_many([(topic, question) for question in questions], source)
+
+    async def add_many(self, entries, source):
+        """
+        Validate and store `(topic, question)` pairs in one transaction.
+
+        Parameters:
+            entries (list): `(topic, question)` tuples, e.g. from `load_question_file`.
+            source (str): Where the questions came from.
+
+        Returns:
+            list: The bank IDs of the valid questions, in order. Invalid questions are skipped.
+
+        Raises:
+            sqlite3.Error: If the questions can't be stored.
+        """
+        created_at = int(time.time())
+        params = []
+        for topic, question in entries:
+            question = validate_question(question)
+            topic = str(topic or '').strip()
+            if question is None or not topic:
+                continue
+            params.append((topic, question["question"], json.dumps(question["choices"]),
+                           question["answer"], source, created_at))
+
+        if not params:
+            return []
+        rows = await self.db.execute_returning(INSERT_QUESTION_QUERY, params)
+        return [row[0] for row in rows]
+
+    async def sample(self, topic, user_id, count=QUIZ_LENGTH):
+        """
+        Build a quiz from bank questions the user hasn't been served yet.
+
+        Questions are picked at random from the best full-text matches for the topic
+        and marked as seen by the user.
+
+        Parameters:
+            topic (str): The topic as typed by the user.
+            user_id (int): The user taking the quiz.
+            count (int, optional): Number of questions wanted.
+
+        Returns:
+            list or None: `count` question dicts, or None if the bank has too few unseen matches.
+
+        Raises:
+            sqlite3.Error: If the bank can't be read.
+        """
+        expression = match_expression(topic)
+        if expression is None:
+            return None
+
+        rows = await self.db.fetch_query(SAMPLE_QUERY, (expression, user_id, count * CANDIDATE_FACTOR))
+        if len(rows) < count:
+            return None
+
+        picked = random.sample(rows, count)
+        await self.mark_seen(user_id, [row[0] for row in picked])
+        return [{"question": question, "choices": json.loads(choices), "answer": answer}
+                for _, question, choices, answer in picked]
+
+    async def mark_seen(self, user_id, question_ids):
+        """
+        Record that a user has been served questions.
+
+        Parameters:
+            user_id (int): The user taking the quiz.
+            question_ids (list): Bank IDs of the questions served.
+
+        Raises:
+            sqlite3.Error: If the write fails.
+        """
+        await self.db.execute_many(
+            'INSERT OR IGNORE INTO quiz_question_seen (user_id, question_id) VALUES (?, ?)',
+            [(user_id, question_id) for question_id in question_ids])
@@ -0,0 +1,222 @@
+"""
+🗃️ quiz_cache.py
+
+This module provides a two-tier cache for generated quizzes, keyed by a
+normalized topic ("Photosynthesis " and "photosynthesis" share an entry).
+The first tier is an in-process LRU of topics; the second is the `quiz_cache`
+SQLite table, so cached quizzes survive restarts.
+
+Each topic keeps several quiz variants. A user is served a variant they haven't
+seen yet; once they've seen them all and the topic has room for more, the cache
+reports a miss so a fresh variant gets generated and added. Evicted quizzes are
+dropped from both tiers at once.
+
+The quiz cog asks the question bank first, so this cache is only reached when
+the bank has too few unseen matches for a topic; it then replays a stored quiz
+instead of paying for a new one.
+
+Configuration (environment variables):
+- QUIZ_CACHE_TTL: seconds a generated quiz stays valid (default: 7 days)
+- QUIZ_CACHE_VARIANTS: variants kept per topic (default: 5)
+- QUIZ_CACHE_TOPICS: topics kept in memory (default: 256)
+- QUIZ_CACHE_MAX_ROWS: quizzes kept in SQLite (default: 5000)
+
+Usage:
+    from utils.quiz_cache import QuizCache
+    cache = QuizCache(db)  # db is the Database cog
+    questions = await cache.get(topic, user_id)
+    if questions is None:
+        questions = await generate_quiz(topic)
+        await cache.put(topic, questions, user_id)
+"""
+
+import json
+import os
+import random
+import re
+import time
+from collections import OrderedDict
+
+QUIZ_CACHE_TTL = float(os.getenv('QUIZ_CACHE_TTL', str(7 * 24 * 3600)))
+QUIZ_CACHE_VARIANTS = int(os.getenv('QUIZ_CACHE_VARIANTS', '5'))
+QUIZ_CACHE_TOPICS = int(os.getenv('QUIZ_CACHE_TOPICS', '256'))
+QUIZ_CACHE_MAX_ROWS = int(os.getenv('QUIZ_CACHE_MAX_ROWS', '5000'))
+
+# Maximum number of (user, topic) pairs whose seen variants are remembered
+SEEN_LIMIT = 5000
+
+
+def normalize_topic(topic):
+    """
+    Normalize a quiz topic so trivially different spellings share a cache entry.
+
+    Lowercases, drops punctuation and collapses whitespace: " Photosynthesis! " -> "photosynthesis".
+
+    Parameters:
+        topic (str): The topic as typed by the user.
+
+    Returns:
+        str: The normalized topic.
+    """
+    topic = re.sub(r"[^\w\s]", " ", topic.lower())
+    return " ".join(topic.split())
+
+
+class QuizCache:
+    """
+    A memory + SQLite cache of quiz variants per normalized topic.
+
+    Attributes:
+        db (Database): The Database cog used for the persistent tier.
+        topics (OrderedDict): LRU of normalized topic -> list of `(variant_id, questions, created_at)`.
+        seen (OrderedDict): LRU of `(user_id, topic)` -> set of variant IDs the user was served.
+    """
+
+    def __init__(self, db, ttl=QUIZ_CACHE_TTL, variants=QUIZ_CACHE_VARIANTS,
+                 max_topics=QUIZ_CACHE_TOPICS, max_rows=QUIZ_CACHE_MAX_ROWS):
+        """
+        Initialize an empty cache.
+
+        Parameters:
+            db (Database): The Database cog used for the persistent tier.
+            ttl (float): Seconds a generated quiz stays valid.
+            variants (int): Variants kept per topic.
+            max_topics (int): Topics kept in memory.
+            max_rows (int): Quizzes kept in SQLite.
+        """
+        self.db = db
+        self.ttl = ttl
+        self.variants = variants
+        self.max_topics = max_topics
+        self.max_rows = max_rows
+        self.topics = OrderedDict()
+        self.seen = OrderedDict()
+
+    async def _variants(self, topic):
+        """
+        Return the unexpired variants of a normalized topic, loading them from SQLite on a memory miss.
+        """
+        variants = self.topics.get(topic)
+        if variants is None:
+            rows = await self.db.fetch_query(
+                'SELECT id, questions, created_at FROM quiz_cache WHERE topic = ? AND created_at >= ? ORDER BY id',
+                (topic, int(time.time() - self.ttl)))
+            variants = [(variant_id, json.loads(questions), created_at)
+                        for variant_id, questions, created_at in rows]
+            self.topics[topic] = variants
+        self.topics.move_to_end(topic)
+        while len(self.topics) > self.max_topics:
+            self.topics.popitem(last=False)
+
+        # Drop variants that expired while they were cached in memory
+        cutoff = time.time() - self.ttl
+        if variants and variants[0][2] < cutoff:
+            variants[:] = [variant for variant in variants if variant[2] >= cutoff]
+        return variants
+
+    def _mark_seen(self, user_id, topic, variant_id):
+        """
+        Remember that a user was served a variant.
+        """
+        key = (user_id, topic)
+        self.seen.setdefault(key, set()).add(variant_id)
+        self.seen.move_to_end(key)
+        while len(self.seen) > SEEN_LIMIT:
+            self.seen.popitem(last=False)
+
+    async def get(self, topic, user_id):
+        """
+        Return a cached quiz for a topic that the user hasn't been served yet.
+
+        Parameters:
+            topic (str): The topic as typed by the user.
+            user_id (int): The user taking the quiz.
+
+        Returns:
+            list or None: The quiz questions, or None on a miss (nothing cached, or the
+                          user has seen every variant and the topic has room for a new one).
+
+        Raises:
+            sqlite3.Error: If the persistent tier can't be read.
+        """
+        topic = normalize_topic(topic)
+        variants = await self._variants(topic)
+        if not variants:
+            return None
+
+        seen = self.seen.get((user_id, topic), set())
+        unseen = [variant for variant in variants if variant[0] not in seen]
+        if not unseen:
+            if len(variants) < self.variants:
+                return None
+
+            # Every variant has been seen and the topic is full: start the rotation over
+            self.seen.pop((user_id, topic), None)
+            unseen = variants
+
+        variant_id, questions, _ = random.choice(unseen)
+        self._mark_seen(user_id, topic, variant_id)
+        return questions
+
+    def _forget(self, rows):
+        """
+        Drop evicted variants from the memory tier.
+
+        Parameters:
+            rows (list): `(variant_id, topic)` pairs deleted from SQLite.
+        """
+        evicted = {}
+        for variant_id, topic in rows:
+            evicted.setdefault(topic, set()).add(variant_id)
+        for topic, variant_ids in evicted.items():
+            variants = self.topics.get(topic)
+            if variants:
+                variants[:] = [variant for variant in variants if variant[0] not in variant_ids]
+
+    async def put(self, topic, questions, user_id=None):
+        """
+        Store a newly generated quiz as a variant of its topic.
+
+        The oldest variant is dropped if the topic already has the maximum number,
+        and the oldest quizzes overall are dropped once SQLite holds too many.
+
+        Parameters:
+            topic (str): The topic as typed by the user.
+            questions (list): The generated quiz questions.
+            user_id (int, optional): The user the quiz was generated for, marked as having seen it.
+
+        Raises:
+            sqlite3.Error: If the quiz can't be stored.
+        """
+        topic = normalize_topic(topic)
+        variants = await self._variants(topic)
+
+        # Coalesced generations hand the same quiz to several users; store it only once
+        for variant_id, cached, _ in variants:
+            if cached == questions:
+                if user_id is not None:
+                    self._mark_seen(user_id, topic, variant_id)
+                return
+
+        created_at = int(time.time())
+
+        variant_id = await self.db.execute_query(
+            'INSERT INTO quiz_cache (topic, questions, created_at) VALUES (?, ?, ?)',
+            (topic, json.dumps(questions), created_at))
+        variants.append((variant_id, questions, created_at))
+        if user_id is not None:
+            self._mark_seen(user_id, topic, variant_id)
+
+        # Size-based eviction: per topic, then across the whole table (expired rows go first)
+        if len(variants) > self.variants:
+            evicted = variants[:len(variants) - self.variants]
+            del variants[:len(variants) - self.variants]
+            await self.db.execute_many('DELETE FROM quiz_cache WHERE id = ?',
+                                       [(variant[0],) for variant in evicted])
+        rows = await self.db.fetch_query(
+            '''SELECT id, topic FROM quiz_cache WHERE created_at < ? OR id IN (
+                   SELECT id FROM quiz_cache ORDER BY id DESC LIMIT -1 OFFSET ?)''',
+            (int(time.time() - self.ttl), self.max_rows))
+        if rows:
+            await self.db.execute_many('DELETE FROM quiz_cache WHERE id = ?', [(row[0],) for row in rows])
+            self._forget([tuple(row) for row in rows])
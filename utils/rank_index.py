@@ -0,0 +1,290 @@
+"""
+📊 rank_index.py
+
+This module provides an in-memory order-statistic index over every user's study
+points, so a user's rank, percentile and nearest rivals can be found without
+running `COUNT(*) WHERE points > ?` against SQLite.
+
+The distinct point totals are kept sorted, split into blocks of at most
+2 * RANK_BLOCK_SIZE values. A Fenwick tree over the blocks' user counts, plus
+one per block over its values' user counts, makes counting the users below a
+total two bisects and two prefix sums, so a rank lookup is O(log n). Memory
+grows with the number of distinct totals, not with the size of the largest one.
+
+Usage:
+    from utils.rank_index import RankIndex
+    index = RankIndex()
+    index.seed([(user_id, points), ...])
+    index.update(user_id, new_total)
+    index.rank(user_id)  # (rank, total_users) or None
+"""
+
+from bisect import bisect_left, bisect_right, insort
+
+# Distinct point totals per block; a block is split once it holds twice as many
+RANK_BLOCK_SIZE = 256
+
+
+def _fenwick_build(counts):
+    """
+    Return a Fenwick tree (1-indexed list) over a list of counts, in O(n).
+    """
+    tree = [0] + list(counts)
+    for i in range(1, len(tree)):
+        j = i + (i & -i)
+        if j < len(tree):
+            tree[j] += tree[i]
+    return tree
+
+
+def _fenwick_add(tree, i, delta):
+    """
+    Add `delta` to the i-th (0-based) count of a Fenwick tree.
+    """
+    i += 1
+    while i < len(tree):
+        tree[i] += delta
+        i += i & -i
+
+
+def _fenwick_prefix(tree, i):
+    """
+    Return the sum of the first `i` counts of a Fenwick tree.
+    """
+    total = 0
+    while i > 0:
+        total += tree[i]
+        i -= i & -i
+    return total
+
+
+class RankIndex:
+    """
+    Order-statistic index of users by study points.
+
+    Ranks use standard competition ranking: users with equal points share a rank.
+
+    Attributes:
+        points (dict): Maps user_id to their current point total.
+        buckets (dict): Maps a point value to the set of users who have exactly that many points.
+    """
+
+    def __init__(self):
+        """
+        Initialize an empty index.
+        """
+        self.points = {}
+        self.buckets = {}
+        self._blocks = []       # Sorted distinct point totals, split into blocks
+        self._maxes = []        # Largest total in each block
+        self._counts = []       # Number of users in each block
+        self._tree = [0]        # Fenwick tree over _counts
+        self._block_trees = []  # Per block, a Fenwick tree over its values' user counts
+
+    def __len__(self):
+        """
+        Return the number of indexed users.
+        """
+        return len(self.points)
+
+    def _block_of(self, value):
+        """
+        Return the index of the block that holds, or would hold, a point value.
+        """
+        return min(bisect_left(self._maxes, value), len(self._maxes) - 1)
+
+    def _block_tree(self, block):
+        """
+        Return a Fenwick tree over the user counts of a block's values.
+        """
+        return _fenwick_build([len(self.buckets.get(v, ())) for v in block])
+
+    def _insert_value(self, value):
+        """
+        Add a new distinct point value (with no users yet), splitting its block if it gets too big.
+
+        Costs O(RANK_BLOCK_SIZE) to rebuild the block's tree, plus O(n / RANK_BLOCK_SIZE)
+        for the block tree when a block splits (once every RANK_BLOCK_SIZE new values).
+        """
+        if not self._blocks:
+            self._blocks, self._maxes, self._counts = [[value]], [value], [0]
+            self._tree, self._block_trees = _fenwick_build(self._counts), [_fenwick_build([0])]
+            return
+
+        b = self._block_of(value)
+        block = self._blocks[b]
+        insort(block, value)
+        self._maxes[b] = block[-1]
+        if len(block) > 2 * RANK_BLOCK_SIZE:
+            tail = block[RANK_BLOCK_SIZE:]
+            del block[RANK_BLOCK_SIZE:]
+            tail_count = sum(len(self.buckets.get(v, ())) for v in tail)
+            self._blocks.insert(b + 1, tail)
+            self._maxes[b] = block[-1]
+            self._maxes.insert(b + 1, tail[-1])
+            self._counts[b] -= tail_count
+            self._counts.insert(b + 1, tail_count)
+            self._block_trees.insert(b + 1, self._block_tree(tail))
+            self._tree = _fenwick_build(self._counts)
+        self._block_trees[b] = self._block_tree(block)
+
+    def _remove_value(self, value):
+        """
+        Drop a distinct point value that no user has anymore.
+        """
+        b = self._block_of(value)
+        block = self._blocks[b]
+        del block[bisect_left(block, value)]
+        if block:
+            self._maxes[b] = block[-1]
+            self._block_trees[b] = self._block_tree(block)
+        else:
+            del self._blocks[b], self._maxes[b], self._counts[b], self._block_trees[b]
+            self._tree = _fenwick_build(self._counts)
+
+    def _add_count(self, value, delta):
+        """
+        Add `delta` users to an existing distinct point value.
+        """
+        b = self._block_of(value)
+        self._counts[b] += delta
+        _fenwick_add(self._tree, b, delta)
+        _fenwick_add(self._block_trees[b], bisect_left(self._blocks[b], value), delta)
+
+    def _count_at_most(self, value):
+        """
+        Return the number of users with at most `value` points, in O(log n).
+        """
+        b = bisect_right(self._maxes, value)
+        total = _fenwick_prefix(self._tree, b)
+        if b < len(self._blocks):
+            total += _fenwick_prefix(self._block_trees[b], bisect_right(self._blocks[b], value))
+        return total
+
+    def _next_value(self, value):
+        """
+        Return the smallest distinct point total above `value`, or None.
+        """
+        b = bisect_right(self._maxes, value)
+        if b == len(self._blocks):
+            return None
+        block = self._blocks[b]
+        return block[bisect_right(block, value)]
+
+    def _previous_value(self, value):
+        """
+        Return the largest distinct point total below `value`, or None.
+        """
+        b = bisect_left(self._maxes, value)
+        if b < len(self._blocks):
+            block = self._blocks[b]
+            i = bisect_left(block, value)
+            if i:
+                return block[i - 1]
+        return self._maxes[b - 1] if b else None
+
+    def seed(self, rows):
+        """
+        Replace the index contents with rows from the database.
+
+        Parameters:
+            rows (iterable): `(user_id, points)` rows, in any order.
+        """
+        self.points = {}
+        self.buckets = {}
+        for user_id, points in rows:
+            points = max(points or 0, 0)
+            self.points[user_id] = points
+            self.buckets.setdefault(points, set()).add(user_id)
+
+        values = sorted(self.buckets)
+        self._blocks = [values[i:i + RANK_BLOCK_SIZE] for i in range(0, len(values), RANK_BLOCK_SIZE)]
+        self._maxes = [block[-1] for block in self._blocks]
+        self._counts = [sum(len(self.buckets[v]) for v in block) for block in self._blocks]
+        self._tree = _fenwick_build(self._counts)
+        self._block_trees = [self._block_tree(block) for block in self._blocks]
+
+    def update(self, user_id, points):
+        """
+        Record a user's new exact point total.
+
+        Parameters:
+            user_id (int): The user whose points changed.
+            points (int): The user's new total.
+        """
+        points = max(points, 0)
+        old = self.points.get(user_id)
+        if old == points:
+            return
+
+        if old is not None:
+            bucket = self.buckets[old]
+            bucket.discard(user_id)
+            self._add_count(old, -1)
+            if not bucket:
+                del self.buckets[old]
+                self._remove_value(old)
+
+        self.points[user_id] = points
+        if points not in self.buckets:
+            self.buckets[points] = set()
+            self._insert_value(points)
+        self.buckets[points].add(user_id)
+        self._add_count(points, 1)
+
+    def rank(self, user_id):
+        """
+        Return a user's rank among all indexed users.
+
+        Parameters:
+            user_id (int): The user to rank.
+
+        Returns:
+            tuple or None: `(rank, total_users)`, or None if the user has no points row.
+        """
+        points = self.points.get(user_id)
+        if points is None:
+            return None
+        total = len(self.points)
+        return total - self._count_at_most(points) + 1, total
+
+    def percentile(self, user_id):
+        """
+        Return the percentage of users with fewer points than this user.
+
+        Parameters:
+            user_id (int): The user to look up.
+
+        Returns:
+            float or None: A value from 0 to 100, or None if the user has no points row.
+        """
+        points = self.points.get(user_id)
+        if points is None:
+            return None
+        return 100.0 * self._count_at_most(points - 1) / len(self.points)
+
+    def neighbours(self, user_id):
+        """
+        Return the closest rivals directly above and below a user.
+
+        Parameters:
+            user_id (int): The user to look up.
+
+        Returns:
+            tuple: `(above, below)`, each a `(user_id, points)` tuple for a user with the
+                   next higher / next lower point total, or None if there is no such user.
+        """
+        points = self.points.get(user_id)
+        if points is None:
+            return None, None
+
+        above = below = None
+        value = self._next_value(points)
+        if value is not None:
+            above = (next(iter(self.buckets[value])), value)
+
+        value = self._previous_value(points)
+        if value is not None:
+            below = (next(iter(self.buckets[value])), value)
+
+        return above, below
@@ -0,0 +1,150 @@
+"""
+📬 reply_router.py
+
+This module routes users' replies to the prompts waiting for them (quiz answers,
+shop choices). Pending prompts live in a dict keyed by (channel_id, user_id),
+so each incoming message is matched with one dict lookup. `bot.wait_for`
+instead runs the check of every pending wait against every message, so its cost
+grows with the number of open quizzes and shop menus.
+
+Each prompt has its own timeout. A user has at most one prompt per channel: a
+new prompt cancels the one it replaces, and prompts can also be cancelled
+explicitly, one at a time or all prompts of one owner (e.g. a cog that is being
+unloaded). A cancelled prompt raises PromptCancelled in the code waiting on it.
+
+Usage:
+    from utils.reply_router import replies, PromptCancelled
+    bot.add_listener(replies.on_message)   # once, in main.py
+
+    try:
+        msg = await replies.wait_for_reply(ctx.channel.id, ctx.author.id,
+                                           check=lambda m: m.content.isdigit(), timeout=60)
+    except asyncio.TimeoutError:
+        ...
+    except PromptCancelled:
+        ...
+
+    replies.cancel_all(owner=self)         # in a cog's cog_unload
+"""
+
+import asyncio
+
+
+class PromptCancelled(Exception):
+    """
+    Raised in the code waiting on a prompt when the prompt is cancelled or replaced.
+    """
+
+
+class ReplyRouter:
+    """
+    Resolves pending prompts with the matching user's next reply in the same channel.
+
+    Attributes:
+        pending (dict): Maps `(channel_id, user_id)` to `(future, check, owner)` for each waiting prompt.
+    """
+
+    def __init__(self):
+        """
+        Initialize with no pending prompts.
+        """
+        self.pending = {}
+
+    def __len__(self):
+        """
+        Return the number of pending prompts.
+        """
+        return len(self.pending)
+
+    async def wait_for_reply(self, channel_id, user_id, check=None, timeout=None, owner=None):
+        """
+        Wait for a user's next accepted message in a channel.
+
+        Messages the check rejects are ignored, and the prompt keeps waiting.
+
+        Parameters:
+            channel_id (int): The channel the reply must be sent in.
+            user_id (int): The user who must reply.
+            check (Callable, optional): Called with each message from the user; returns whether to accept it.
+            timeout (float, optional): Seconds to wait before giving up. None waits forever.
+            owner (Any, optional): Who opened the prompt (e.g. the cog), for `cancel_all`.
+
+        Returns:
+            discord.Message: The accepted reply.
+
+        Raises:
+            asyncio.TimeoutError: If no accepted reply arrives in time.
+            PromptCancelled: If the prompt is cancelled or replaced by a newer one.
+        """
+        key = (channel_id, user_id)
+        self.cancel(channel_id, user_id)
+
+        future = asyncio.get_running_loop().create_future()
+        self.pending[key] = (future, check, owner)
+        try:
+            return await asyncio.wait_for(future, timeout)
+        finally:
+            # A newer prompt may already have taken this key
+            if self.pending.get(key, (None,))[0] is future:
+                del self.pending[key]
+
+    def dispatch(self, message):
+        """
+        Hand a message to the prompt waiting for its author in its channel, if any.
+
+        Parameters:
+            message (discord.Message): An incoming message.
+
+        Returns:
+            bool: True if the message resolved a prompt.
+        """
+        entry = self.pending.get((message.channel.id, message.author.id))
+        if entry is None:
+            return False
+
+        future, check, _ = entry
+        if future.done() or (check is not None and not check(message)):
+            return False
+        future.set_result(message)
+        return True
+
+    async def on_message(self, message):
+        """
+        Listener that dispatches every message the bot receives.
+        """
+        self.dispatch(message)
+
+    def cancel(self, channel_id, user_id):
+        """
+        Cancel a user's pending prompt in a channel.
+
+        Parameters:
+            channel_id (int): The prompt's channel.
+            user_id (int): The prompted user.
+
+        Returns:
+            bool: True if a prompt was cancelled.
+        """
+        entry = self.pending.pop((channel_id, user_id), None)
+        if entry is None or entry[0].done():
+            return False
+        entry[0].set_exception(PromptCancelled())
+        return True
+
+    def cancel_all(self, owner=None):
+        """
+        Cancel every pending prompt, or only those opened by one owner.
+
+        Parameters:
+            owner (Any, optional): Only cancel prompts opened by this owner (e.g. a cog being unloaded).
+
+        Returns:
+            int: The number of prompts cancelled.
+        """
+        keys = [key for key, (_, _, prompt_owner) in self.pending.items()
+                if owner is None or prompt_owner is owner]
+        return sum(self.cancel(*key) for key in keys)
+
+
+# Shared router used by every cog that prompts users for a reply
+replies = ReplyRouter()
@@ -15,6 +15,15 @@ import discord
 import random
 
 
+# 🏷️ Shop items and their default prices in points (admins can override prices per guild)
+SHOP_ITEMS = {
+    'Change Nickname Color': 50,
+    'Assign Special Role': 100,
+    'Unlock Animated Emoji': 75,
+    'XP Boost': 150
+}
+
+
 # 💥 Change Nickname Color
 async def change_nickname_color(user, selected_color=None):
     """
@@ -0,0 +1,140 @@
+"""
+💬 streaming_reply.py
+
+This module shows a streamed LLM answer in Discord while it is being generated.
+The first message is sent as soon as the first words arrive. After that, the
+text is edited in batches: at most once per edit interval instead of once per
+token. A message that reaches Discord's 2000-character limit is finalized at a
+line or word break, and the answer continues in a new message.
+
+discord.py waits out rate limits inside `send` and `edit`, so a slow edit means
+the channel is being throttled. The edit interval then backs off to twice the
+time the last call took, and drops back once edits are fast again.
+
+Configuration (environment variables):
+- STREAM_EDIT_INTERVAL: minimum seconds between edits of a streaming message (default: 1.0)
+
+Usage:
+    from utils.streaming_reply import StreamingReply
+    reply = StreamingReply(ctx)
+    async for text in llm.stream(messages):
+        await reply.feed(text)
+    await reply.finish()
+"""
+
+import os
+import time
+
+STREAM_EDIT_INTERVAL = float(os.getenv('STREAM_EDIT_INTERVAL', '1.0'))
+
+# Discord's maximum message length
+DISCORD_MESSAGE_LIMIT = 2000
+
+# Appended to a message while more text is still coming
+CURSOR = " ▌"
+
+
+class StreamingReply:
+    """
+    Streams text into one or more Discord messages with batched edits.
+
+    Attributes:
+        channel (discord.abc.Messageable): Where the reply is sent (e.g. a command context).
+        messages (list): Every message sent so far, in order.
+        text (str): Text of the current message, including text not shown yet.
+        interval (float): Current minimum seconds between edits.
+    """
+
+    def __init__(self, channel, interval=STREAM_EDIT_INTERVAL, limit=DISCORD_MESSAGE_LIMIT):
+        """
+        Initialize a reply that hasn't sent anything yet.
+
+        Parameters:
+            channel (discord.abc.Messageable): Where the reply is sent.
+            interval (float): Minimum seconds between edits.
+            limit (int): Maximum characters per message.
+        """
+        self.channel = channel
+        self.base_interval = interval
+        self.interval = interval
+        self.limit = limit
+        self.messages = []
+        self.text = ""
+        self._message = None
+        self._shown = ""
+        self._last_edit = 0.0
+
+    def _split_point(self):
+        """
+        Return where to end a full message: the last line break, else the last space,
+        in the second half of the allowed length, else a hard cut at the limit.
+        """
+        window = self.text[:self.limit]
+        for separator in ("\n", " "):
+            cut = window.rfind(separator)
+            if cut >= self.limit // 2:
+                return cut
+        return self.limit
+
+    async def _show(self, content):
+        """
+        Send or edit the current message so it displays `content`.
+        """
+        if content == self._shown:
+            return
+
+        started = time.monotonic()
+        if self._message is None:
+            self._message = await self.channel.send(content)
+            self.messages.append(self._message)
+        else:
+            await self._message.edit(content=content)
+        self._last_edit = time.monotonic()
+
+        # Back off while Discord is throttling us, recover once calls are fast again
+        self.interval = max(self.base_interval, 2 * (self._last_edit - started))
+        self._shown = content
+
+    async def _finalize_full(self, room):
+        """
+        Finalize full messages while the text is longer than `room`, carrying the rest over into a new one.
+        """
+        while len(self.text) > room:
+            cut = self._split_point()
+            head, self.text = self.text[:cut], self.text[cut:].lstrip()
+            await self._show(head)
+            self._message = None
+            self._shown = ""
+
+    async def feed(self, text):
+        """
+        Add newly generated text, updating Discord if an update is due.
+
+        Parameters:
+            text (str): The next piece of the answer.
+        """
+        self.text += text
+        await self._finalize_full(self.limit - len(CURSOR))
+
+        if not self.text.strip():
+            return
+        if self._message is None or time.monotonic() - self._last_edit >= self.interval:
+            await self._show(self.text + CURSOR)
+
+    async def send(self, text):
+        """
+        Send a complete text at once (e.g. a cached answer), split across messages if needed.
+
+        Parameters:
+            text (str): The whole answer.
+        """
+        self.text += text
+        await self._finalize_full(self.limit)
+        await self.finish()
+
+    async def finish(self):
+        """
+        Show the complete text of the current message, without the cursor.
+        """
+        if self.text.strip():
+            await self._show(self.text)
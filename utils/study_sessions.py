@@ -0,0 +1,227 @@
+"""
+📖 study_sessions.py
+
+This module tracks every user's study session at once. Sessions are small
+`__slots__` records kept in a dict keyed by user_id, and their expiry times sit
+in one min-heap. A single background task sleeps until the earliest expiry,
+closes every session that has run out, and hands them to a callback in one
+batch. There is no per-session task and no polling. A new session that expires
+before everything else wakes the task early.
+
+Stopped sessions leave their heap entry behind; it is skipped when it comes up,
+so stopping a session is O(1) and the heap never holds more than the sessions
+started within the last maximum session length.
+
+Time spent in a study voice channel is tracked with `VoiceSession` records
+instead. They don't expire; their minutes are credited by a periodic tick while
+the user stays in the channel.
+
+Usage:
+    from utils.study_sessions import SessionManager
+    sessions = SessionManager(3600, on_expire=award_expired)  # async on_expire(list_of_sessions)
+    sessions.begin()                       # inside the running event loop
+    sessions.start(user_id, channel_id)
+    session = sessions.stop(user_id)
+"""
+
+import asyncio
+import heapq
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class StudySession:
+    """
+    One user's running study session.
+
+    Attributes:
+        user_id (int): The studying user.
+        started_at (float): Unix time the session started.
+        expires_at (float): Unix time the session is closed automatically.
+        channel_id (int or None): Where the session was started, for the auto-close notice.
+    """
+
+    __slots__ = ('user_id', 'started_at', 'expires_at', 'channel_id')
+
+    def __init__(self, user_id, started_at, expires_at, channel_id=None):
+        self.user_id = user_id
+        self.started_at = started_at
+        self.expires_at = expires_at
+        self.channel_id = channel_id
+
+    def elapsed(self, now=None):
+        """
+        Return how many seconds the session has run, never beyond its expiry.
+        """
+        now = time.time() if now is None else now
+        return max(0.0, min(now, self.expires_at) - self.started_at)
+
+
+class VoiceSession:
+    """
+    One user's stay in a study voice channel.
+
+    Attributes:
+        user_id (int): The studying user.
+        guild_id (int): The guild of the voice channel.
+        channel_id (int): The study voice channel the user is in.
+        started_at (float): Unix time the user joined.
+        minutes (int): Whole minutes credited so far.
+        points (int): Points awarded so far.
+    """
+
+    __slots__ = ('user_id', 'guild_id', 'channel_id', 'started_at', 'minutes', 'points')
+
+    def __init__(self, user_id, guild_id, channel_id, started_at):
+        self.user_id = user_id
+        self.guild_id = guild_id
+        self.channel_id = channel_id
+        self.started_at = started_at
+        self.minutes = 0
+        self.points = 0
+
+    def new_minutes(self, now):
+        """
+        Return how many whole minutes have passed since the last credit, and credit them.
+        """
+        minutes = int((now - self.started_at) // 60)
+        new, self.minutes = minutes - self.minutes, max(minutes, self.minutes)
+        return max(new, 0)
+
+
+class SessionManager:
+    """
+    Holds every active study session and closes expired ones from a single task.
+
+    Attributes:
+        max_seconds (float): Longest a session may run before it is closed automatically.
+        sessions (dict): Maps user_id to their active StudySession.
+    """
+
+    def __init__(self, max_seconds, on_expire):
+        """
+        Initialize with no sessions. Call `begin` to start the expiry task.
+
+        Parameters:
+            max_seconds (float): Longest a session may run.
+            on_expire (Callable): Coroutine function called with a list of sessions that just expired.
+        """
+        self.max_seconds = max_seconds
+        self.on_expire = on_expire
+        self.sessions = {}
+        self._heap = []  # (expires_at, user_id); stale once the session stops or restarts
+        self._wakeup = None
+        self._task = None
+
+    def __len__(self):
+        """
+        Return the number of active sessions.
+        """
+        return len(self.sessions)
+
+    def __contains__(self, user_id):
+        """
+        Return whether a user has an active session.
+        """
+        return user_id in self.sessions
+
+    def get(self, user_id):
+        """
+        Return a user's active session, or None.
+        """
+        return self.sessions.get(user_id)
+
+    def start(self, user_id, channel_id=None, started_at=None):
+        """
+        Start a session for a user.
+
+        Parameters:
+            user_id (int): The studying user.
+            channel_id (int, optional): Where the session was started.
+            started_at (float, optional): Unix start time, e.g. when restoring a session. Defaults to now.
+
+        Returns:
+            StudySession or None: The new session, or None if the user already has one.
+        """
+        if user_id in self.sessions:
+            return None
+
+        started_at = time.time() if started_at is None else started_at
+        session = StudySession(user_id, started_at, started_at + self.max_seconds, channel_id)
+        self.sessions[user_id] = session
+
+        # Wake the expiry task if this session is now the next one to expire
+        if not self._heap or session.expires_at < self._heap[0][0]:
+            self._notify()
+        heapq.heappush(self._heap, (session.expires_at, user_id))
+        return session
+
+    def stop(self, user_id):
+        """
+        Stop a user's session.
+
+        Parameters:
+            user_id (int): The studying user.
+
+        Returns:
+            StudySession or None: The stopped session, or None if the user had none.
+        """
+        return self.sessions.pop(user_id, None)
+
+    def _notify(self):
+        """
+        Wake the expiry task so it recomputes how long to sleep.
+        """
+        if self._wakeup is not None:
+            self._wakeup.set()
+
+    def _pop_expired(self, now):
+        """
+        Remove and return every session that has expired by `now`.
+        """
+        expired = []
+        while self._heap and self._heap[0][0] <= now:
+            expires_at, user_id = heapq.heappop(self._heap)
+            session = self.sessions.get(user_id)
+            if session is not None and session.expires_at == expires_at:
+                del self.sessions[user_id]
+                expired.append(session)
+        return expired
+
+    async def _run(self):
+        """
+        Sleep until the next expiry, close expired sessions in one batch, repeat.
+        """
+        while True:
+            now = time.time()
+            expired = self._pop_expired(now)
+            if expired:
+                try:
+                    await self.on_expire(expired)
+                except Exception as e:
+                    logger.error(f"Error closing {len(expired)} expired study session(s): {e}")
+                continue
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def begin(self):
+        """
+        Start the expiry task. Must be called from within the running event loop.
+        """
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run())
+
+    def close(self):
+        """
+        Stop the expiry task. Active sessions are kept.
+        """
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
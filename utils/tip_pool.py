@@ -0,0 +1,230 @@
+"""
+🌵 tip_pool.py
+
+This module provides the persistent pool of cowboy study tips behind `!tip`.
+Tips live in the `tips` table, so `!tip` always answers from local data and
+never waits on the API. Each tip served is the least recently served one (never
+served tips first, picked at random among the oldest few), so recently seen
+tips don't come back until the rest of the pool has had its turn.
+
+Serving a tip only reads the pool. Which tips were served is kept in memory and
+written by `flush_served` in one batched transaction, so `!tip` never waits on
+a commit.
+
+When too few tips remain unserved and the pool isn't full yet, `refill`
+generates new ones in batches (many tips per completion) at background
+priority. Duplicates are dropped, ignoring case, whitespace and surrounding
+quotes. A handful of starter tips are stored on
+first use, so the pool is never empty, even before the first refill.
+
+Configuration (environment variables):
+- TIP_LOW_WATER: unserved tips below which the pool is refilled (default: 20)
+- TIP_BATCH_SIZE: tips requested per completion (default: 10)
+- TIP_MAX_BATCHES: completions per refill at most (default: 3)
+- TIP_POOL_SIZE: tips kept in total; once reached, the pool just rotates (default: 500)
+
+Usage:
+    from utils.tip_pool import TipPool
+    pool = TipPool(db)  # db is the Database cog
+    await pool.seed()
+    tip = await pool.next_tip()
+    await pool.flush_served()  # periodically
+    if await pool.needs_refill():
+        await pool.refill()
+"""
+
+import os
+import random
+import re
+import sqlite3
+import time
+
+from utils.motivational_tip import generate_motivational_tips
+
+TIP_LOW_WATER = int(os.getenv('TIP_LOW_WATER', '20'))
+TIP_BATCH_SIZE = int(os.getenv('TIP_BATCH_SIZE', '10'))
+TIP_MAX_BATCHES = int(os.getenv('TIP_MAX_BATCHES', '3'))
+TIP_POOL_SIZE = int(os.getenv('TIP_POOL_SIZE', '500'))
+
+# A tip is picked at random among this many least recently served tips
+TIP_CHOICES = 5
+
+# Stored when the pool is first created, so there is always something to serve
+STARTER_TIPS = [
+    "Keep yer boots steady on the path of learnin'. One step at a time, partner.",
+    "A cowboy don't rope the whole herd at once. Break yer studyin' into small chunks.",
+    "Saddle up early, partner. The mind's sharpest when the sun's still low.",
+    "Even the toughest bronco tires out. Take a break every hour and come back fresh.",
+    "Write it down, say it out loud, teach it to yer horse. That's how it sticks.",
+    "Don't cram the night before the cattle drive. A good night's sleep wins the race.",
+]
+
+
+def normalize_tip(text):
+    """
+    Clean up a generated tip: strip list numbering, bullets, quotes and extra whitespace.
+
+    Parameters:
+        text (str): A tip as generated.
+
+    Returns:
+        str: The cleaned tip (empty if nothing is left).
+    """
+    text = re.sub(r"^\s*(?:\d+[.)]|[-*•])\s*", "", text)
+    return " ".join(text.split()).strip(" \"'“”")
+
+
+class TipPool:
+    """
+    Serves tips from SQLite and refills them in batches.
+
+    Attributes:
+        db (Database): The Database cog that owns the `tips` table.
+    """
+
+    def __init__(self, db, low_water=TIP_LOW_WATER, batch_size=TIP_BATCH_SIZE, max_batches=TIP_MAX_BATCHES,
+                 size=TIP_POOL_SIZE):
+        """
+        Initialize the pool.
+
+        Parameters:
+            db (Database): The Database cog that owns the `tips` table.
+            low_water (int): Unserved tips below which the pool needs a refill.
+            batch_size (int): Tips requested per completion.
+            max_batches (int): Completions per refill at most.
+            size (int): Tips kept in total before the pool stops growing.
+        """
+        self.db = db
+        self.low_water = low_water
+        self.batch_size = batch_size
+        self.max_batches = max_batches
+        self.size = size
+        self.served = {}  # tip id -> (last served_at, times served) not written yet
+
+    async def add(self, tips, source):
+        """
+        Store tips, skipping empty ones and duplicates of stored tips.
+
+        Parameters:
+            tips (list): Tip texts.
+            source (str): Where the tips came from (e.g. 'starter', 'generated').
+
+        Returns:
+            int: The number of tips given (before duplicates were skipped).
+
+        Raises:
+            sqlite3.Error: If the tips can't be stored.
+        """
+        now = int(time.time())
+        rows = [(tip, source, now) for tip in map(normalize_tip, tips) if tip]
+        await self.db.execute_many(
+            'INSERT OR IGNORE INTO tips (text, source, created_at) VALUES (?, ?, ?)', rows)
+        return len(rows)
+
+    async def seed(self):
+        """
+        Store the starter tips if the pool has never been filled.
+
+        Raises:
+            sqlite3.Error: If the pool can't be read or written.
+        """
+        row = await self.db.fetch_one('SELECT 1 FROM tips LIMIT 1')
+        if row is None:
+            await self.add(STARTER_TIPS, 'starter')
+
+    async def counts(self):
+        """
+        Return how many tips are stored, and how many of them have never been served.
+
+        Returns:
+            tuple: `(total, unserved)`.
+
+        Raises:
+            sqlite3.Error: If the pool can't be read.
+        """
+        row = await self.db.fetch_one(
+            'SELECT COUNT(*), COUNT(*) - COUNT(served_at) FROM tips')
+        return row[0], row[1]
+
+    async def needs_refill(self):
+        """
+        Return whether fewer than the low-water mark of tips are left unserved and the pool can still grow.
+
+        Raises:
+            sqlite3.Error: If the pool can't be read.
+        """
+        total, unserved = await self.counts()
+        return unserved < self.low_water and total < self.size
+
+    async def next_tip(self):
+        """
+        Serve the next tip: one of the least recently served, marked as served now.
+
+        The serve is only recorded in memory; `flush_served` writes it later.
+
+        Returns:
+            str or None: The tip, or None if the pool is empty.
+
+        Raises:
+            sqlite3.Error: If the pool can't be read.
+        """
+        # NULLs sort first, so never-served tips come before the least recently served.
+        # Tips served since the last flush still look unserved in the table, so skip them.
+        rows = await self.db.fetch_query(
+            'SELECT id, text FROM tips ORDER BY served_at, id LIMIT ?', (TIP_CHOICES + len(self.served),))
+        if not rows:
+            return None
+
+        choices = [row for row in rows if row[0] not in self.served][:TIP_CHOICES] or rows
+        tip_id, text = random.choice(choices)
+        _, count = self.served.get(tip_id, (None, 0))
+        self.served[tip_id] = (time.time(), count + 1)
+        return text
+
+    async def flush_served(self):
+        """
+        Write every tip served since the last flush, in one transaction.
+
+        Raises:
+            sqlite3.Error: If the write fails. The serves are kept for the next flush.
+        """
+        if not self.served:
+            return
+
+        served, self.served = self.served, {}
+        try:
+            await self.db.execute_many(
+                'UPDATE tips SET served_at = ?, served_count = served_count + ? WHERE id = ?',
+                [(served_at, count, tip_id) for tip_id, (served_at, count) in served.items()])
+        except sqlite3.Error:
+            # Keep newer serves that happened during the write
+            for tip_id, (served_at, count) in served.items():
+                later_at, later_count = self.served.get(tip_id, (served_at, 0))
+                self.served[tip_id] = (max(served_at, later_at), count + later_count)
+            raise
+
+    async def refill(self):
+        """
+        Generate batches of new tips until the pool is back above the low-water mark.
+
+        Stops early once the pool is full, after `max_batches` completions, or when a
+        batch brings no new tips (e.g. the API is down or only repeats itself).
+
+        Returns:
+            int: The number of new tips stored.
+
+        Raises:
+            sqlite3.Error: If the pool can't be read or written.
+        """
+        added = 0
+        for _ in range(self.max_batches):
+            if not await self.needs_refill():
+                break
+
+            before, _ = await self.counts()
+            await self.add(await generate_motivational_tips(self.batch_size), 'generated')
+            new = (await self.counts())[0] - before
+            added += new
+            if new <= 0:
+                break
+        return added
@@ -0,0 +1,107 @@
+"""
+🏆 top_k.py
+
+This module provides an in-memory top-K structure for the study points leaderboard.
+It is seeded once from the `study_points` table and then kept up to date with the
+exact totals of every user whose points change, so the leaderboard can be answered
+without querying SQLite.
+
+Only the best `k + slack` users are tracked. The extra slack absorbs users that
+drop out of the top (e.g. after spending points in the shop); if too many drop
+out at once, `top` reports that the structure needs to be reseeded.
+
+Users are ordered by `(points, user_id)` descending, the same order as the
+leaderboard's keyset pagination, so ties always break the same way.
+
+Usage:
+    from utils.top_k import TopK
+    top = TopK(k=10)
+    top.seed([(user_id, points), ...])   # rows ordered by points DESC
+    top.update(user_id, new_total)
+    top.top(10)  # [(user_id, points), ...] or None if a reseed is needed
+"""
+
+
+class TopK:
+    """
+    Tracks the users with the most study points.
+
+    Attributes:
+        k (int): Number of users the leaderboard needs.
+        capacity (int): Number of users tracked (k plus slack).
+        entries (dict): Maps tracked user_id to their exact point total.
+        floor (tuple or None): Upper bound on the `(points, user_id)` key of every
+            untracked user, or None if every user is tracked.
+    """
+
+    def __init__(self, k=10, slack=40):
+        """
+        Initialize an empty top-K structure.
+
+        Parameters:
+            k (int): Number of users the leaderboard needs.
+            slack (int): Extra users tracked beyond k to absorb point decreases.
+        """
+        self.k = k
+        self.capacity = k + slack
+        self.entries = {}
+        self.floor = None
+
+    def seed(self, rows):
+        """
+        Replace the tracked users with rows from the database.
+
+        Parameters:
+            rows (list): `(user_id, points)` rows ordered by points and user_id
+                descending, at most `capacity` of them.
+        """
+        self.entries = {user_id: points for user_id, points in rows}
+
+        # A full page means there may be more users below the last row
+        self.floor = (rows[-1][1], rows[-1][0]) if len(rows) >= self.capacity else None
+
+    def update(self, user_id, points):
+        """
+        Record a user's new exact point total.
+
+        Parameters:
+            user_id (int): The user whose points changed.
+            points (int): The user's new total.
+        """
+        if user_id in self.entries:
+            self.entries[user_id] = points
+            return
+
+        # Untracked users below the floor can't be in the top
+        if self.floor is not None and (points, user_id) < self.floor:
+            return
+
+        self.entries[user_id] = points
+        if len(self.entries) > self.capacity:
+            evicted = min(self.entries, key=lambda tracked: (self.entries[tracked], tracked))
+            evicted_key = (self.entries.pop(evicted), evicted)
+            self.floor = evicted_key if self.floor is None else max(self.floor, evicted_key)
+
+    def top(self, n=None):
+        """
+        Return the n users with the most points.
+
+        Parameters:
+            n (int, optional): Number of users to return. Defaults to k.
+
+        Returns:
+            list or None: `(user_id, points)` tuples ordered by points and user_id
+                descending, or None if too many tracked users dropped below the floor
+                and the structure must be reseeded.
+        """
+        n = self.k if n is None else n
+        ranked = sorted(self.entries.items(), key=lambda item: (item[1], item[0]), reverse=True)
+
+        if self.floor is None:
+            return ranked[:n]
+
+        # Only users at or above the floor are guaranteed to beat every untracked user
+        ranked = [item for item in ranked if (item[1], item[0]) >= self.floor]
+        if len(ranked) < n:
+            return None
+        return ranked[:n]
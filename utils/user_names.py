@@ -0,0 +1,159 @@
+"""
+👤 user_names.py
+
+This module provides a bounded, self-expiring cache of Discord user names.
+Names are looked up in the bot's local user cache first; anything missing is
+fetched from the Discord API concurrently (with a cap on parallel requests),
+so rendering a leaderboard costs at most one round trip instead of one per row.
+Users that no longer exist (`discord.NotFound`) are cached as unknown too.
+
+Usage:
+    from utils.user_names import UserNameCache
+    names = UserNameCache(bot)
+    resolved = await names.resolve_many([user_id, ...])
+    resolved.get(user_id)  # "name", None for unknown users, missing on errors
+"""
+
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+
+import discord
+
+# 📝 Logger for unexpected API errors
+logger = logging.getLogger(__name__)
+
+# Maximum number of names kept in the cache
+USER_NAME_CACHE_SIZE = int(os.getenv('USER_NAME_CACHE_SIZE', '5000'))
+
+# Seconds a resolved name stays valid, and how long an unknown user is remembered
+USER_NAME_TTL = float(os.getenv('USER_NAME_TTL', '3600'))
+USER_NAME_NEGATIVE_TTL = float(os.getenv('USER_NAME_NEGATIVE_TTL', '600'))
+
+# Maximum number of concurrent `fetch_user` requests
+USER_FETCH_CONCURRENCY = int(os.getenv('USER_FETCH_CONCURRENCY', '10'))
+
+
+class UserNameCache:
+    """
+    An LRU + TTL cache mapping user IDs to display names.
+
+    Attributes:
+        bot (commands.Bot): The bot used to look up and fetch users.
+        max_size (int): Maximum number of cached entries.
+        entries (OrderedDict): Maps user_id to `(name or None, expires_at)`, least recently used first.
+    """
+
+    def __init__(self, bot, max_size=USER_NAME_CACHE_SIZE, ttl=USER_NAME_TTL,
+                 negative_ttl=USER_NAME_NEGATIVE_TTL, concurrency=USER_FETCH_CONCURRENCY):
+        """
+        Initialize an empty name cache.
+
+        Parameters:
+            bot (commands.Bot): The bot used to look up and fetch users.
+            max_size (int): Maximum number of cached entries.
+            ttl (float): Seconds a resolved name stays valid.
+            negative_ttl (float): Seconds an unknown user is remembered.
+            concurrency (int): Maximum number of concurrent API fetches.
+        """
+        self.bot = bot
+        self.max_size = max_size
+        self.ttl = ttl
+        self.negative_ttl = negative_ttl
+        self.entries = OrderedDict()
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    def _get_cached(self, user_id):
+        """
+        Return `(found, name)` for a cached, unexpired entry.
+        """
+        entry = self.entries.get(user_id)
+        if entry is None:
+            return False, None
+
+        name, expires_at = entry
+        if expires_at <= time.monotonic():
+            del self.entries[user_id]
+            return False, None
+
+        self.entries.move_to_end(user_id)
+        return True, name
+
+    def _store(self, user_id, name):
+        """
+        Cache a name (or None for an unknown user), evicting the least recently used entry if full.
+        """
+        ttl = self.ttl if name is not None else self.negative_ttl
+        self.entries[user_id] = (name, time.monotonic() + ttl)
+        self.entries.move_to_end(user_id)
+        while len(self.entries) > self.max_size:
+            self.entries.popitem(last=False)
+
+    async def _fetch(self, user_id):
+        """
+        Fetch a single user from the API, bounded by the concurrency cap.
+
+        Returns:
+            tuple: `(user_id, name)` with name None for unknown users.
+
+        Raises:
+            discord.HTTPException: For API errors other than NotFound.
+        """
+        async with self._semaphore:
+            try:
+                user = await self.bot.fetch_user(user_id)
+                return user_id, user.name
+            except discord.NotFound:
+                return user_id, None
+
+    async def resolve_many(self, user_ids):
+        """
+        Resolve many user IDs to names, fetching all cache misses concurrently.
+
+        Parameters:
+            user_ids (iterable): The user IDs to resolve.
+
+        Returns:
+            dict: Maps user_id to a name, or to None if the user doesn't exist.
+                  Users that failed to resolve for another reason are left out.
+        """
+        resolved = {}
+        missing = []
+        for user_id in dict.fromkeys(user_ids):
+            found, name = self._get_cached(user_id)
+            if found:
+                resolved[user_id] = name
+                continue
+
+            # The gateway cache is free, so try it before spending an API request
+            user = self.bot.get_user(user_id)
+            if user is not None:
+                self._store(user_id, user.name)
+                resolved[user_id] = user.name
+            else:
+                missing.append(user_id)
+
+        results = await asyncio.gather(*(self._fetch(user_id) for user_id in missing),
+                                       return_exceptions=True)
+        for user_id, result in zip(missing, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error while fetching user data for {user_id}: {result}")
+                continue
+            self._store(user_id, result[1])
+            resolved[user_id] = result[1]
+
+        return resolved
+
+    async def resolve(self, user_id):
+        """
+        Resolve a single user ID to a name.
+
+        Parameters:
+            user_id (int): The user ID to resolve.
+
+        Returns:
+            str or None: The name, or None if the user is unknown or couldn't be fetched.
+        """
+        return (await self.resolve_many([user_id])).get(user_id)
@@ -0,0 +1,155 @@
+"""
+🔥 warm_pool.py
+
+This module keeps ready-made quizzes for the most requested topics, so a popular
+topic never waits on the API. Every quiz request bumps its topic's popularity
+score, which decays with a configurable half-life so trending topics rise and
+old ones fade. A background task asks `next_topic` which popular topic is short
+of quizzes and refills it, within an hourly API call budget.
+
+Configuration (environment variables):
+- QUIZ_WARM_TOPICS: number of top topics kept warm (default: 5)
+- QUIZ_WARM_SIZE: ready-made quizzes kept per warm topic (default: 3)
+- QUIZ_WARM_MIN_REQUESTS: decayed request count a topic needs to be kept warm (default: 2)
+- QUIZ_WARM_HALF_LIFE: seconds for a topic's popularity to halve (default: 3600)
+- QUIZ_WARM_BUDGET: quiz generations the pool may spend per hour (default: 30)
+
+Usage:
+    from utils.warm_pool import WarmPool
+    pool = WarmPool()
+    pool.record(topic)               # on every quiz request
+    quiz = pool.take(topic)          # a ready-made quiz, or None
+    topic = pool.next_topic()        # in the refill task
+    if topic: pool.put(topic, await generate_quiz(topic))
+"""
+
+import heapq
+import os
+import time
+from collections import deque
+
+from utils.quiz_cache import normalize_topic
+
+QUIZ_WARM_TOPICS = int(os.getenv('QUIZ_WARM_TOPICS', '5'))
+QUIZ_WARM_SIZE = int(os.getenv('QUIZ_WARM_SIZE', '3'))
+QUIZ_WARM_MIN_REQUESTS = float(os.getenv('QUIZ_WARM_MIN_REQUESTS', '2'))
+QUIZ_WARM_HALF_LIFE = float(os.getenv('QUIZ_WARM_HALF_LIFE', '3600'))
+QUIZ_WARM_BUDGET = int(os.getenv('QUIZ_WARM_BUDGET', '30'))
+
+# Maximum number of topics whose popularity is tracked
+TRACKED_TOPICS = 500
+
+
+class WarmPool:
+    """
+    Tracks topic popularity and holds ready-made quizzes for the top topics.
+
+    Attributes:
+        scores (dict): Maps normalized topic to `(score, updated_at)`; the score decays over time.
+        pools (dict): Maps normalized topic to a deque of ready-made quizzes.
+        spent (deque): Timestamps of refill generations in the last hour.
+    """
+
+    def __init__(self, topics=QUIZ_WARM_TOPICS, size=QUIZ_WARM_SIZE, min_requests=QUIZ_WARM_MIN_REQUESTS,
+                 half_life=QUIZ_WARM_HALF_LIFE, budget=QUIZ_WARM_BUDGET):
+        """
+        Initialize an empty pool.
+
+        Parameters:
+            topics (int): Number of top topics kept warm.
+            size (int): Ready-made quizzes kept per warm topic.
+            min_requests (float): Decayed request count a topic needs to be kept warm.
+            half_life (float): Seconds for a topic's popularity to halve.
+            budget (int): Refill generations allowed per hour.
+        """
+        self.topics = topics
+        self.size = size
+        self.min_requests = min_requests
+        self.half_life = half_life
+        self.budget = budget
+        self.scores = {}
+        self.pools = {}
+        self.spent = deque()
+
+    def _score(self, topic, now):
+        """
+        Return a topic's popularity decayed to `now`.
+        """
+        score, updated_at = self.scores.get(topic, (0.0, now))
+        return score * 0.5 ** ((now - updated_at) / self.half_life)
+
+    def record(self, topic):
+        """
+        Count a quiz request for a topic.
+
+        Parameters:
+            topic (str): The topic as typed by the user.
+        """
+        topic = normalize_topic(topic)
+        now = time.time()
+        self.scores[topic] = (self._score(topic, now) + 1, now)
+
+        # Forget the least popular topics (and their quizzes) once too many are tracked
+        if len(self.scores) > 2 * TRACKED_TOPICS:
+            keep = set(heapq.nlargest(TRACKED_TOPICS, self.scores, key=lambda t: self._score(t, now)))
+            self.scores = {t: value for t, value in self.scores.items() if t in keep}
+            self.pools = {t: quizzes for t, quizzes in self.pools.items() if t in keep}
+
+    def take(self, topic):
+        """
+        Remove and return a ready-made quiz for a topic.
+
+        Parameters:
+            topic (str): The topic as typed by the user.
+
+        Returns:
+            list or None: The quiz questions, or None if the topic has no ready quiz.
+        """
+        quizzes = self.pools.get(normalize_topic(topic))
+        return quizzes.popleft() if quizzes else None
+
+    def put(self, topic, quiz):
+        """
+        Add a ready-made quiz to a topic's pool.
+
+        Parameters:
+            topic (str): The (normalized) topic the quiz was generated for.
+            quiz (list): The quiz questions.
+        """
+        self.pools.setdefault(normalize_topic(topic), deque(maxlen=self.size)).append(quiz)
+
+    def top_topics(self):
+        """
+        Return the topics currently popular enough to keep warm, most popular first.
+
+        Returns:
+            list: Normalized topics.
+        """
+        now = time.time()
+        scored = ((self._score(topic, now), topic) for topic in self.scores)
+        return [topic for score, topic in heapq.nlargest(self.topics, scored) if score >= self.min_requests]
+
+    def budget_left(self):
+        """
+        Return how many refill generations may still be made this hour.
+        """
+        cutoff = time.time() - 3600
+        while self.spent and self.spent[0] < cutoff:
+            self.spent.popleft()
+        return self.budget - len(self.spent)
+
+    def next_topic(self):
+        """
+        Return the most popular topic that is short of quizzes and spend one unit of budget on it.
+
+        Returns:
+            str or None: A normalized topic to generate a quiz for, or None if every warm
+                         topic is full or the hourly budget is used up.
+        """
+        if self.budget_left() <= 0:
+            return None
+        for topic in self.top_topics():
+            if len(self.pools.get(topic, ())) < self.size:
+                self.spent.append(time.time())
+                return topic
+        return None